@@ -3,9 +3,27 @@ app.py — Streamlit Main App (Analyze Email landing page)
 After analysis, navigates to Dashboard.
 """
 import streamlit as st
+import io
 import time
 import datetime
 from classifier import EmailClassifier, ROUTING_MAP, REPLY_TEMPLATES
+from classify_bulk import (
+    FORMATS, SENDER_COLUMNS, SUBJECT_COLUMNS, detect_format, email_text, find_column, iter_records,
+)
+from email_store import STORE_BACKEND, EmailStore, open_store
+from prepare_custom_dataset import detect_columns
+
+BULK_BATCH_SIZE = 256  # emails per predict_batch call in bulk mode
+PAGE_SIZES = [10, 25, 50, 100]
+SORT_OPTIONS = {
+    "Best match / Urgency (High first)": ("relevance", False),
+    "Urgency (High first)": ("urgency", False),
+    "Newest first": ("id", True),
+    "Oldest first": ("id", False),
+    "Confidence (high → low)": ("confidence", True),
+    "Confidence (low → high)": ("confidence", False),
+    "Category (A → Z)": ("category", False),
+}
 
 # ─── Page Config ─────────────────────────────────────────────────────────────
 st.set_page_config(
@@ -204,8 +222,14 @@ st.markdown("""
 
 
 # ─── Initialize Session State ────────────────────────────────────────────────
-if "classified_emails" not in st.session_state:
-    st.session_state.classified_emails = []
+@st.cache_resource
+def shared_email_store():
+    """One SQLite-backed store per server process, shared by every session."""
+    return open_store("sqlite")
+
+
+if "email_store" not in st.session_state:
+    st.session_state.email_store = shared_email_store() if STORE_BACKEND == "sqlite" else EmailStore()
 if "classifier" not in st.session_state:
     try:
         st.session_state.classifier = EmailClassifier()
@@ -248,11 +272,12 @@ with st.sidebar:
     st.markdown('<div class="custom-divider"></div>', unsafe_allow_html=True)
 
     # Stats in sidebar
-    total = len(st.session_state.classified_emails)
-    high_count = sum(1 for e in st.session_state.classified_emails if e["urgency"] == "High")
+    session_kpis = st.session_state.email_store.kpis()
+    total = session_kpis["total"]
+    high_count = session_kpis["High"]
     st.markdown(f"""
     <div style="padding: 16px; background: rgba(255,255,255,0.03); border-radius: 12px;">
-        <div style="color: rgba(255,255,255,0.4); font-size: 0.75rem; text-transform: uppercase; letter-spacing: 1px;">Session Stats</div>
+        <div style="color: rgba(255,255,255,0.4); font-size: 0.75rem; text-transform: uppercase; letter-spacing: 1px;">Email Stats</div>
         <div style="display: flex; justify-content: space-between; margin-top: 12px;">
             <div>
                 <div style="font-size: 1.5rem; font-weight: 700; color: #667eea;">{total}</div>
@@ -297,6 +322,71 @@ EXAMPLE_EMAILS = [
 ]
 
 
+# ─── Helpers ─────────────────────────────────────────────────────────────────
+def make_email_record(sender, subject, body, result):
+    """Store record for one classified email (shared by single and bulk mode); the store assigns the id."""
+    routing = ROUTING_MAP.get(result["category"], {"team": "General Support", "color": "#888"})
+    return {
+        "sender": sender or "Unknown",
+        "subject": subject or "No Subject",
+        "content": body[:200] + "..." if len(body) > 200 else body,
+        "full_content": body,
+        "category": result["category"],
+        "urgency": result["urgency"],
+        "confidence": result["confidence"],
+        "team": routing["team"],
+        "timestamp": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+
+def reset_table_page():
+    """on_change for the Dashboard filters: a new result starts at page 1."""
+    st.session_state["table_page"] = 1
+
+
+def classify_upload(uploaded, classifier, progress):
+    """Classify every email in an uploaded CSV/JSONL/mbox file in batches.
+
+    Returns the new session records; progress is an st.progress bar that is
+    advanced after each batch.
+    """
+    fmt = detect_format(uploaded.name)
+    uploaded.seek(0)
+    f = io.TextIOWrapper(uploaded, encoding="utf-8", errors="replace", newline="")
+    try:
+        records = list(iter_records(f, fmt))
+    finally:
+        f.detach()  # leave the upload buffer open for Streamlit
+    if not records:
+        raise ValueError(f"No emails found in {uploaded.name}")
+
+    headers = list(records[0].keys())
+    text_col = detect_columns(headers)[0]
+    if text_col is None:
+        raise ValueError(f"Could not find the email text column. Available columns: {headers}")
+    sender_col = find_column(headers, SENDER_COLUMNS)
+    subject_col = find_column(headers, SUBJECT_COLUMNS)
+    if subject_col == text_col:
+        subject_col = None
+
+    rows = []
+    for record in records:
+        body = str(record.get(text_col) or "")
+        subject = str(record.get(subject_col) or "") if subject_col else ""
+        sender = str(record.get(sender_col) or "") if sender_col else ""
+        rows.append((sender, subject, body, email_text(body, subject)))
+
+    new_records = []
+    for start in range(0, len(rows), BULK_BATCH_SIZE):
+        batch = rows[start:start + BULK_BATCH_SIZE]
+        results = classifier.predict_batch([text for *_, text in batch])
+        for (sender, subject, body, _), result in zip(batch, results):
+            new_records.append(make_email_record(sender, subject, body, result))
+        done = start + len(batch)
+        progress.progress(done / len(rows), text=f"Classified {done:,} of {len(rows):,} emails")
+    return new_records
+
+
 # ═══════════════════════════════════════════════════════════════════════════════
 #  ANALYZE EMAIL PAGE
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -355,47 +445,15 @@ if page == "📧 Analyze Email":
 
     # ─── Classification ──────────────────────────────────────────────────
     if classify_btn and email_content:
-        full_text = f"Subject: {subject_line}\n\n{email_content}" if subject_line else email_content
-
-        with st.spinner(""):
-            # Show processing animation
-            progress_placeholder = st.empty()
-            steps = [
-                ("🔍 Preprocessing text...", 0.3),
-                ("🧮 Extracting features...", 0.3),
-                ("🧠 Running AI classifier...", 0.4),
-                ("✅ Classification complete!", 0.2),
-            ]
-            for step_text, delay in steps:
-                progress_placeholder.markdown(f"""
-                <div style="text-align: center; padding: 20px; color: rgba(255,255,255,0.7);">
-                    <div style="font-size: 1.2rem;">{step_text}</div>
-                </div>
-                """, unsafe_allow_html=True)
-                time.sleep(delay)
-            progress_placeholder.empty()
+        full_text = email_text(email_content, subject_line)
 
-        # Get prediction
-        result = st.session_state.classifier.predict(full_text)
-        category = result["category"]
-        urgency = result["urgency"]
-        confidence = result["confidence"]
-        routing = ROUTING_MAP.get(category, {"team": "General Support", "color": "#888"})
+        with st.spinner("🧠 Classifying..."):
+            result = st.session_state.classifier.predict(full_text)
+        routing = ROUTING_MAP.get(result["category"], {"team": "General Support", "color": "#888"})
 
         # Save to session
-        email_record = {
-            "id": len(st.session_state.classified_emails) + 1,
-            "sender": sender_email or "Unknown",
-            "subject": subject_line or "No Subject",
-            "content": email_content[:200] + "..." if len(email_content) > 200 else email_content,
-            "full_content": email_content,
-            "category": category,
-            "urgency": urgency,
-            "confidence": confidence,
-            "team": routing["team"],
-            "timestamp": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        }
-        st.session_state.classified_emails.append(email_record)
+        email_record = make_email_record(sender_email, subject_line, email_content, result)
+        st.session_state.email_store.append(email_record)
 
         # Store result for persistent display
         st.session_state["last_result"] = {
@@ -406,6 +464,40 @@ if page == "📧 Analyze Email":
     elif classify_btn and not email_content:
         st.warning("⚠ Please enter email content to classify.")
 
+    # ─── Bulk Upload ─────────────────────────────────────────────────────
+    with st.expander("📁 Bulk Upload — classify a CSV, JSONL or mbox export", expanded=False):
+        uploaded = st.file_uploader(
+            "Email export",
+            type=[ext.lstrip(".") for ext in FORMATS],
+            key="bulk_file",
+            help="CSV/JSONL need an email text column (email_text, text, body, ...); "
+                 "sender and subject columns are picked up when present.",
+        )
+        if st.button("🚀 Classify File", use_container_width=True, disabled=uploaded is None):
+            progress = st.progress(0.0, text="Reading file...")
+            started = time.perf_counter()
+            try:
+                new_records = classify_upload(uploaded, st.session_state.classifier, progress)
+            except (ValueError, UnicodeError) as e:
+                progress.empty()
+                st.error(f"⚠ {e}")
+            else:
+                st.session_state.email_store.extend(new_records)
+                st.session_state["last_bulk"] = {
+                    "file": uploaded.name,
+                    "count": len(new_records),
+                    "seconds": time.perf_counter() - started,
+                }
+
+        if "last_bulk" in st.session_state:
+            bulk = st.session_state["last_bulk"]
+            st.success(f"✅ Classified {bulk['count']:,} emails from {bulk['file']} in {bulk['seconds']:.1f}s "
+                       f"({bulk['count'] / max(bulk['seconds'], 1e-9):,.0f} emails/s)")
+            if st.button("📊 Go to Dashboard →", use_container_width=True, key="bulk_go_dashboard"):
+                st.session_state.pop("last_bulk", None)
+                st.session_state["_go_dashboard"] = True
+                st.rerun()
+
     # ─── Show Results (persists across reruns) ────────────────────────────
     if "last_result" in st.session_state:
         result = st.session_state["last_result"]
@@ -500,9 +592,9 @@ elif page == "📊 Dashboard":
     st.markdown('<div class="main-header">📊 Dashboard</div>', unsafe_allow_html=True)
     st.markdown('<div class="sub-header">Real-time overview of classified emails</div>', unsafe_allow_html=True)
 
-    emails = st.session_state.classified_emails
+    store = st.session_state.email_store
 
-    if not emails:
+    if not len(store):
         st.markdown("""
         <div class="glass-panel" style="text-align: center; padding: 60px;">
             <div style="font-size: 4rem;">📭</div>
@@ -517,11 +609,10 @@ elif page == "📊 Dashboard":
         st.stop()
 
     # ─── KPI Cards ────────────────────────────────────────────────────────
-    total = len(emails)
-    high = sum(1 for e in emails if e["urgency"] == "High")
-    medium = sum(1 for e in emails if e["urgency"] == "Medium")
-    low = sum(1 for e in emails if e["urgency"] == "Low")
-    avg_conf = sum(e["confidence"] for e in emails) / total if total else 0
+    kpis = store.kpis()
+    total = kpis["total"]
+    high, medium, low = kpis["High"], kpis["Medium"], kpis["Low"]
+    avg_conf = kpis["avg_confidence"]
 
     c1, c2, c3, c4, c5 = st.columns(5)
     kpi_data = [
@@ -547,14 +638,11 @@ elif page == "📊 Dashboard":
     import plotly.graph_objects as go
     import pandas as pd
 
-    df = pd.DataFrame(emails)
-
     chart_col1, chart_col2 = st.columns(2)
 
     with chart_col1:
         st.markdown("#### 📂 Category Distribution")
-        cat_counts = df["category"].value_counts().reset_index()
-        cat_counts.columns = ["Category", "Count"]
+        cat_counts = pd.DataFrame(list(store.category_counts().items()), columns=["Category", "Count"])
 
         color_map = {k: v["color"] for k, v in ROUTING_MAP.items()}
         colors = [color_map.get(c, "#888") for c in cat_counts["Category"]]
@@ -579,8 +667,7 @@ elif page == "📊 Dashboard":
 
     with chart_col2:
         st.markdown("#### ⚡ Urgency Distribution")
-        urg_counts = df["urgency"].value_counts().reindex(["High", "Medium", "Low"], fill_value=0).reset_index()
-        urg_counts.columns = ["Urgency", "Count"]
+        urg_counts = pd.DataFrame(list(store.urgency_counts().items()), columns=["Urgency", "Count"])
 
         urg_colors = {"High": "#ff416c", "Medium": "#ffd200", "Low": "#38ef7d"}
         colors = [urg_colors.get(u, "#888") for u in urg_counts["Urgency"]]
@@ -613,43 +700,61 @@ elif page == "📊 Dashboard":
     st.markdown("#### 🔍 Filter & Search")
     filter_col1, filter_col2, filter_col3 = st.columns(3)
 
+    category_options = store.categories()
     with filter_col1:
         filter_category = st.multiselect(
             "Category",
-            options=df["category"].unique().tolist(),
-            default=df["category"].unique().tolist(),
+            options=category_options,
+            default=category_options,
+            on_change=reset_table_page,
         )
     with filter_col2:
         filter_urgency = st.multiselect(
             "Urgency",
             options=["High", "Medium", "Low"],
             default=["High", "Medium", "Low"],
+            on_change=reset_table_page,
         )
     with filter_col3:
-        search_text = st.text_input("🔎 Search", placeholder="Filter by keyword...")
-
-    filtered = df[
-        (df["category"].isin(filter_category)) &
-        (df["urgency"].isin(filter_urgency))
-    ]
-    if search_text:
-        mask = (
-            filtered["subject"].str.contains(search_text, case=False, na=False) |
-            filtered["content"].str.contains(search_text, case=False, na=False) |
-            filtered["sender"].str.contains(search_text, case=False, na=False)
-        )
-        filtered = filtered[mask]
-
-    # Sort: High first
-    urgency_order = {"High": 0, "Medium": 1, "Low": 2}
-    filtered = filtered.copy()
-    filtered["_sort"] = filtered["urgency"].map(urgency_order)
-    filtered = filtered.sort_values("_sort").drop(columns=["_sort"])
+        search_text = st.text_input("🔎 Search", placeholder="Words or word starts, e.g. refund charg",
+                                    on_change=reset_table_page)
 
     # ─── Email Table ──────────────────────────────────────────────────────
-    st.markdown(f"#### 📬 Classified Emails ({len(filtered)})")
-
-    for _, row in filtered.iterrows():
+    sort_col, size_col, page_col = st.columns([2, 1, 1])
+    with sort_col:
+        sort_label = st.selectbox("Sort by", list(SORT_OPTIONS), key="table_sort", on_change=reset_table_page)
+    with size_col:
+        page_size = st.selectbox("Per page", PAGE_SIZES, index=1, key="table_page_size",
+                                 on_change=reset_table_page)
+
+    # Filtering, sorting and paging run in the store; only one page comes back
+    sort_by, descending = SORT_OPTIONS[sort_label]
+    filters = dict(
+        # A filter with every option selected is no filter; lets the store skip it
+        categories=None if set(filter_category) >= set(category_options) else filter_category,
+        urgencies=None if set(filter_urgency) >= {"High", "Medium", "Low"} else filter_urgency,
+        search=search_text, sort=sort_by, descending=descending,
+    )
+    # The page widget is driven through its key only (no value=), so the
+    # callbacks and the clamp below can set it without a Streamlit warning
+    if "table_page" not in st.session_state:
+        st.session_state["table_page"] = 1
+    page_number = st.session_state["table_page"]
+    visible, matched = store.query(**filters, offset=(page_number - 1) * page_size, limit=page_size)
+    pages = max(1, -(-matched // page_size))
+    if page_number > pages:
+        # Filters shrank the result; clamp before the widget renders
+        page_number = st.session_state["table_page"] = pages
+        visible, matched = store.query(**filters, offset=(page_number - 1) * page_size, limit=page_size)
+    with page_col:
+        page_number = int(st.number_input("Page", min_value=1, max_value=pages, step=1, key="table_page"))
+    offset = (page_number - 1) * page_size
+
+    st.markdown(f"#### 📬 Classified Emails ({matched})")
+    if matched:
+        st.caption(f"Showing {offset + 1:,}–{offset + len(visible):,} of {matched:,} • page {page_number} of {pages}")
+
+    for _, row in visible.iterrows():
         urg_class = f"urgency-{row['urgency'].lower()}"
         cat_key = row["category"].lower().split()[0]
         routing_color = ROUTING_MAP.get(row["category"], {}).get("color", "#888")
@@ -678,11 +783,11 @@ elif page == "📊 Dashboard":
     # ─── Export ────────────────────────────────────────────────────────────
     st.markdown('<div class="custom-divider"></div>', unsafe_allow_html=True)
 
-    export_df = filtered[["id", "sender", "subject", "category", "urgency", "confidence", "team", "timestamp"]].copy()
-    csv_data = export_df.to_csv(index=False).encode("utf-8")
+    export_columns = ["id", "sender", "subject", "category", "urgency", "confidence", "team", "timestamp"]
     st.download_button(
         "📥 Export to CSV",
-        data=csv_data,
+        # Built only when clicked
+        data=lambda: store.query(**filters, columns=export_columns)[0].to_csv(index=False).encode("utf-8"),
         file_name="classified_emails.csv",
         mime="text/csv",
         use_container_width=True,
@@ -0,0 +1,242 @@
+"""
+bench/run_bench.py — Reproducible Performance Benchmarks
+Builds a deterministic corpus with generate_dataset.generate_email and
+measures the inference path end to end:
+
+    clean_text_eps              clean_text throughput (emails/s, cold cache)
+    transform_docs_per_s        tfidf.transform throughput (cleaned docs/s, one batch)
+    predict_p50/p95/p99_ms      single-email EmailClassifier.predict latency
+    batch_p50/p95/p99_ms        predict_batch latency per batch of --batch-size
+    batch_eps                   predict_batch throughput (emails/s)
+    load_ms                     EmailClassifier() construction (best of 3)
+    peak_rss_mb                 peak resident memory of the benchmark process
+
+Results are written as JSON. With a baseline (bench/baseline.json by
+default) every metric is compared against it and the run fails when one
+is worse by more than --tolerance (1.5× that for p95, 2× for p99).
+Timings depend on the machine, so record a baseline per machine with
+--update-baseline.
+
+--stages reruns the batch pass with StageMetrics enabled and prints where
+the time went (clean / transform / category / urgency) plus the overhead
+of instrumentation itself.
+
+Usage:
+    python bench/run_bench.py                          # compare with bench/baseline.json
+    python bench/run_bench.py --stages                 # per-stage breakdown
+    python bench/run_bench.py --output bench_results.json
+    python bench/run_bench.py --update-baseline        # store this run as the baseline
+    python bench/run_bench.py --bundle models/model_bundle.emb
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from train_model import peak_rss_mb  # noqa: E402
+
+BASELINE_PATH = os.path.join(ROOT, "bench", "baseline.json")
+
+# metric → (higher is better, tolerance multiplier); tail latencies are noisier
+METRICS = {
+    "clean_text_eps": (True, 1),
+    "transform_docs_per_s": (True, 1),
+    "predict_p50_ms": (False, 1),
+    "predict_p95_ms": (False, 1.5),
+    "predict_p99_ms": (False, 2),
+    "batch_p50_ms": (False, 1),
+    "batch_p95_ms": (False, 1.5),
+    "batch_p99_ms": (False, 2),
+    "batch_eps": (True, 1),
+    "load_ms": (False, 1),
+    "peak_rss_mb": (False, 1),
+}
+
+
+def build_corpus(count, seed):
+    """Deterministic email texts, all categories, generator urgency mix."""
+    from generate_dataset import CATEGORIES, URGENCY_RULES, generate_email
+
+    rng = random.Random(seed)
+    emails = []
+    categories = list(CATEGORIES)
+    for i in range(count):
+        category = categories[i % len(categories)]
+        weights = URGENCY_RULES[category]
+        urgency = rng.choices(list(weights), weights=list(weights.values()))[0]
+        emails.append(generate_email(category, urgency, rng))
+    return emails
+
+
+def percentiles(samples):
+    ms = np.asarray(samples) * 1000
+    return {p: float(np.percentile(ms, p)) for p in (50, 95, 99)}
+
+
+def run(corpus, bundle=None, batch_size=64, repeat=3):
+    from classifier import EmailClassifier
+    from text_processing import active_backend, benchmark, clean_text
+
+    metrics = {}
+
+    # ─── clean_text ─────────────────────────────────────────────────────
+    metrics["clean_text_eps"] = benchmark(corpus, [active_backend()], repeat)[active_backend()][0]
+    cleaned = [clean_text(text) for text in corpus]
+
+    # ─── Model load ─────────────────────────────────────────────────────
+    load = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        clf = EmailClassifier(bundle_path=bundle)
+        load = min(load, time.perf_counter() - start)
+    metrics["load_ms"] = load * 1000
+
+    # ─── tfidf.transform ────────────────────────────────────────────────
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        clf.tfidf.transform(cleaned)
+        best = min(best, time.perf_counter() - start)
+    metrics["transform_docs_per_s"] = len(cleaned) / best
+
+    # ─── Single-email predict ───────────────────────────────────────────
+    clf.predict(corpus[0])  # warm up
+    timings = []
+    for text in corpus:
+        start = time.perf_counter()
+        clf.predict(text)
+        timings.append(time.perf_counter() - start)
+    for p, value in percentiles(timings).items():
+        metrics[f"predict_p{p}_ms"] = value
+
+    # ─── Batch predict ──────────────────────────────────────────────────
+    timings = []
+    for i in range(0, len(corpus), batch_size):
+        batch = corpus[i:i + batch_size]
+        start = time.perf_counter()
+        clf.predict_batch(batch)
+        timings.append(time.perf_counter() - start)
+    for p, value in percentiles(timings).items():
+        metrics[f"batch_p{p}_ms"] = value
+    metrics["batch_eps"] = len(corpus) / sum(timings)
+
+    metrics["peak_rss_mb"] = peak_rss_mb()
+    return metrics
+
+
+def stage_breakdown(corpus, bundle=None, batch_size=64):
+    """Batch pass with and without StageMetrics → (snapshot, overhead ratio)."""
+    from classifier import EmailClassifier
+    from stage_metrics import StageMetrics
+
+    def batch_seconds(clf):
+        clf.predict_batch(corpus[:batch_size])  # warm up
+        start = time.perf_counter()
+        for i in range(0, len(corpus), batch_size):
+            clf.predict_batch(corpus[i:i + batch_size])
+        return time.perf_counter() - start
+
+    clf = EmailClassifier(bundle_path=bundle)
+    plain = batch_seconds(clf)
+    clf.metrics = StageMetrics()
+    timed = batch_seconds(clf)
+    return clf.metrics.snapshot(), timed / plain - 1
+
+
+def compare(metrics, baseline, tolerance):
+    """Return [(metric, current, baseline, change, regressed)] for shared metrics."""
+    rows = []
+    for name, (higher_is_better, scale) in METRICS.items():
+        current, base = metrics.get(name), baseline.get(name)
+        if current is None or not base:
+            continue
+        change = (current - base) / base
+        worse = -change if higher_is_better else change
+        rows.append((name, current, base, change, worse > tolerance * scale))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reproducible inference benchmarks")
+    parser.add_argument("--emails", type=int, default=2000, help="Corpus size (default: 2000)")
+    parser.add_argument("--seed", type=int, default=42, help="Corpus seed (default: 42)")
+    parser.add_argument("--batch-size", type=int, default=64, help="predict_batch size (default: 64)")
+    parser.add_argument("--bundle", help="Benchmark a model bundle instead of the .pkl models")
+    parser.add_argument("--output", help="Write results JSON here")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Baseline JSON (default: bench/baseline.json)")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed relative regression per metric, 1.5x for p95, 2x for p99 "
+                             "(default: 0.25 = 25%%)")
+    parser.add_argument("--update-baseline", action="store_true", help="Store this run as the baseline")
+    parser.add_argument("--stages", action="store_true", help="Print a per-stage timing breakdown")
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.emails, args.seed)
+    print(f"⏱ Benchmarking over {len(corpus)} generated emails (seed {args.seed})...")
+    metrics = run(corpus, args.bundle, args.batch_size)
+
+    result = {
+        "metrics": {k: round(v, 4) for k, v in metrics.items() if v is not None},
+        "config": {"emails": args.emails, "seed": args.seed, "batch_size": args.batch_size,
+                   "bundle": bool(args.bundle)},
+        "machine": {"python": platform.python_version(), "platform": platform.platform(),
+                    "cpus": os.cpu_count()},
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"💾 Results → {args.output}")
+
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+            f.write("\n")
+        print(f"✅ Baseline updated → {args.baseline}")
+
+    baseline = None
+    if not args.update_baseline and os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("config") != result["config"]:
+            print(f"⚠ Baseline was recorded with {baseline.get('config')}; comparing anyway")
+
+    print(f"\n{'metric':<24}{'value':>12}" + (f"{'baseline':>12}{'change':>9}" if baseline else ""))
+    rows = {row[0]: row for row in compare(metrics, baseline["metrics"], args.tolerance)} if baseline else {}
+    regressions = []
+    for name in METRICS:
+        if metrics.get(name) is None:
+            continue
+        line = f"{name:<24}{metrics[name]:>12.2f}"
+        if name in rows:
+            _, _, base, change, regressed = rows[name]
+            line += f"{base:>12.2f}{change:>+9.1%}  {'❌' if regressed else '✅'}"
+            if regressed:
+                regressions.append(name)
+        print(line)
+
+    if args.stages:
+        snapshot, overhead = stage_breakdown(corpus, args.bundle, args.batch_size)
+        print(f"\n📊 Per-stage timings (batches of {args.batch_size}; instrumentation overhead {overhead:+.1%})")
+        print(f"{'stage':<16}{'calls':>8}{'items':>8}{'total ms':>11}{'mean ms':>10}{'p95 ms':>10}{'max ms':>10}")
+        for stage, s in snapshot.items():
+            print(f"{stage:<16}{s['calls']:>8}{s['items']:>8}{s['total_ms']:>11.1f}"
+                  f"{s['mean_ms']:>10.3f}{s['p95_ms']:>10.3f}{s['max_ms']:>10.3f}")
+
+    if regressions:
+        print(f"\n❌ {len(regressions)} metric(s) regressed more than {args.tolerance:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+    if baseline:
+        print(f"\n✅ No metric regressed more than {args.tolerance:.0%}")
+
+
+if __name__ == "__main__":
+    main()
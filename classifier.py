@@ -2,86 +2,263 @@
 classifier.py — Model Loader & Prediction Helper
 Loads trained .pkl models and provides a predict() function.
 """
+import hashlib
+import json
 import os
-import re
+import time
 import joblib
-import nltk
-from nltk.corpus import stopwords
-from nltk.stem import WordNetLemmatizer
+import numpy as np
 
-# Ensure NLTK data is available
-for resource in ["stopwords", "wordnet", "punkt_tab"]:
-    nltk.download(resource, quiet=True)
-
-STOP_WORDS = set(stopwords.words("english"))
-LEMMATIZER = WordNetLemmatizer()
+from compiled_scorer import SCORER_NAME, load_scorer
+from model_bundle import BUNDLE_NAME, load_bundle
+from prediction_cache import PredictionCache
+from stage_metrics import StageMetrics
+from text_processing import clean_text
 
 MODEL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "models")
-
-
-def clean_text(text: str) -> str:
-    """Clean input text with same pipeline used in training."""
-    text = re.sub(r"<[^>]+>", " ", text)
-    text = re.sub(r"https?://\S+|www\.\S+", " ", text)
-    text = re.sub(r"\S+@\S+\.\S+", " ", text)
-    text = re.sub(r"[^a-zA-Z\s]", " ", text)
-    text = text.lower()
-    tokens = text.split()
-    tokens = [
-        LEMMATIZER.lemmatize(word)
-        for word in tokens
-        if word not in STOP_WORDS and len(word) > 2
-    ]
-    return " ".join(tokens)
+BUNDLE_PATH = os.path.join(MODEL_DIR, BUNDLE_NAME)
+MODEL_FILES = [
+    "tfidf_vectorizer.pkl",
+    "category_model.pkl",
+    "urgency_model.pkl",
+    "category_encoder.pkl",
+    "urgency_encoder.pkl",
+]
+# Optional cascade artifacts written by train_model.py
+CASCADE_FILES = ["category_fast_model.pkl", "cascade.json"]
+
+
+def model_fingerprint(paths) -> str:
+    """Short content hash identifying a set of model files."""
+    h = hashlib.sha256()
+    for path in paths:
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+    return h.hexdigest()[:16]
 
 
 class EmailClassifier:
-    """Loads models and classifies emails."""
-
-    def __init__(self):
-        self.tfidf = joblib.load(os.path.join(MODEL_DIR, "tfidf_vectorizer.pkl"))
-        self.cat_model = joblib.load(os.path.join(MODEL_DIR, "category_model.pkl"))
-        self.urg_model = joblib.load(os.path.join(MODEL_DIR, "urgency_model.pkl"))
-        self.cat_encoder = joblib.load(os.path.join(MODEL_DIR, "category_encoder.pkl"))
-        self.urg_encoder = joblib.load(os.path.join(MODEL_DIR, "urgency_encoder.pkl"))
+    """Loads models and classifies emails.
+
+    Pass a PredictionCache to skip model evaluation for texts that clean to
+    something already classified by the same model version. Pass bundle_path
+    to load a memory-mapped model bundle (model_bundle.py) instead of the
+    separate .pkl files.
+
+    With cascade=True the category is first predicted by a cheap linear
+    model; only emails whose top probability falls below the calibrated
+    threshold (or cascade_threshold, when given) are sent to XGBoost.
+
+    With compiled=True a single email's urgency is scored by the compiled
+    scorer (compiled_scorer.py, written next to the models by train_model.py)
+    instead of sklearn's predict_proba; batches keep the sparse matrix path,
+    which is faster from a couple of emails up.
+
+    Pass a StageMetrics to time each stage (clean, cache, transform,
+    category, category_fast, urgency) per call; read it with
+    metrics.snapshot(). Without one the hot path only pays an `is None` check.
+    """
+
+    def __init__(self, cache: PredictionCache = None, bundle_path: str = None,
+                 cascade: bool = False, cascade_threshold: float = None,
+                 metrics: StageMetrics = None, compiled: bool = False):
+        self.cat_fast_model = None
+        cascade_config = None
+        if bundle_path:
+            bundle = load_bundle(bundle_path)
+            self.tfidf = bundle.tfidf
+            self.cat_model = bundle.cat_model
+            self.urg_model = bundle.urg_model
+            self.cat_encoder = bundle.cat_encoder
+            self.urg_encoder = bundle.urg_encoder
+            self.model_version = bundle.model_version
+            if cascade:
+                self.cat_fast_model = bundle.cat_fast_model
+                cascade_config = bundle.cascade
+        else:
+            self.tfidf = joblib.load(os.path.join(MODEL_DIR, "tfidf_vectorizer.pkl"))
+            self.cat_model = joblib.load(os.path.join(MODEL_DIR, "category_model.pkl"))
+            self.urg_model = joblib.load(os.path.join(MODEL_DIR, "urgency_model.pkl"))
+            self.cat_encoder = joblib.load(os.path.join(MODEL_DIR, "category_encoder.pkl"))
+            self.urg_encoder = joblib.load(os.path.join(MODEL_DIR, "urgency_encoder.pkl"))
+            self.model_version = model_fingerprint(
+                os.path.join(MODEL_DIR, name) for name in MODEL_FILES
+            )
+            fast_path, config_path = (os.path.join(MODEL_DIR, name) for name in CASCADE_FILES)
+            if cascade and os.path.exists(fast_path) and os.path.exists(config_path):
+                self.cat_fast_model = joblib.load(fast_path)
+                with open(config_path, "r", encoding="utf-8") as f:
+                    cascade_config = json.load(f)
+                self.model_version = model_fingerprint(
+                    os.path.join(MODEL_DIR, name) for name in MODEL_FILES + CASCADE_FILES
+                )
+
+        self.cascade = cascade
+        self.cascade_threshold = None
+        self.cascade_stats = {"fast": 0, "escalated": 0}
+        if cascade:
+            if self.cat_fast_model is None:
+                raise FileNotFoundError(
+                    "No cascade model found. Retrain with train_model.py (XGBoost "
+                    "category model) to create category_fast_model.pkl."
+                )
+            self.cascade_threshold = float(
+                cascade_threshold if cascade_threshold is not None else cascade_config["threshold"]
+            )
+            # Cascade results differ from XGBoost-only ones; keep cache keys apart
+            self.model_version = f"{self.model_version}+cascade{self.cascade_threshold:g}"
+
+        self.urg_scorer = None
+        if compiled:
+            scorer_path = os.path.join(os.path.dirname(bundle_path) if bundle_path else MODEL_DIR, SCORER_NAME)
+            if not os.path.exists(scorer_path):
+                raise FileNotFoundError(
+                    f"No compiled urgency scorer at {scorer_path}. Retrain with train_model.py "
+                    f"or run `python compiled_scorer.py --export`."
+                )
+            self.urg_scorer = load_scorer(scorer_path)
+            # A scorer left over from other models would silently disagree
+            if not (np.array_equal(self.urg_scorer.classes_, self.urg_model.classes_)
+                    and np.allclose(self.urg_scorer.intercept, self.urg_model.intercept_, rtol=0, atol=1e-12)):
+                raise ValueError(
+                    f"{scorer_path} was compiled from a different urgency model. "
+                    f"Re-export it with `python compiled_scorer.py --export`."
+                )
+
+        # Label lookup tables indexed by predict_proba column
+        self._cat_labels = self.cat_encoder.inverse_transform(self.cat_model.classes_)
+        self._urg_labels = self.urg_encoder.inverse_transform(self.urg_model.classes_)
+        if self.cat_fast_model is not None:
+            self._cat_fast_labels = self.cat_encoder.inverse_transform(self.cat_fast_model.classes_)
+
+        self.cache = cache
+        self.metrics = metrics
 
     def predict(self, email_text: str) -> dict:
         """Classify a single email and return category, urgency, confidence."""
-        cleaned = clean_text(email_text)
-        features = self.tfidf.transform([cleaned])
-
-        # Category prediction
-        cat_idx = self.cat_model.predict(features)[0]
-        category = self.cat_encoder.inverse_transform([cat_idx])[0]
-
-        # Category confidence
-        if hasattr(self.cat_model, "predict_proba"):
-            cat_proba = self.cat_model.predict_proba(features)[0]
-            cat_confidence = float(max(cat_proba))
+        return self.predict_batch([email_text])[0]
+
+    def predict_batch(self, texts: list) -> list:
+        """Classify many emails at once with one vectorize/predict pass per model.
+
+        Returns one result dict per input text, in the same shape as predict().
+        """
+        texts = list(texts)
+        if not texts:
+            return []
+
+        metrics = self.metrics
+        if metrics is not None:
+            start = time.perf_counter()
+        cleaned = [clean_text(text) for text in texts]
+        if metrics is not None:
+            metrics.lap("clean", start, len(texts), sum(map(len, texts)))
+        if self.cache is None:
+            return self._predict_cleaned(cleaned)
+
+        if metrics is not None:
+            start = time.perf_counter()
+        keys = [PredictionCache.make_key(text, self.model_version) for text in cleaned]
+        results = self.cache.get_many(keys)
+        if metrics is not None:
+            metrics.lap("cache", start, len(keys))
+
+        # Evaluate each distinct missing text once
+        missing = {}
+        for key, text, result in zip(keys, cleaned, results):
+            if result is None:
+                missing.setdefault(key, text)
+        if missing:
+            fresh = dict(zip(missing, self._predict_cleaned(list(missing.values()))))
+            self.cache.put_many(fresh.items())
+            results = [
+                result if result is not None else dict(fresh[key])
+                for key, result in zip(keys, results)
+            ]
+        return results
+
+    def _predict_cleaned(self, cleaned: list) -> list:
+        """Run the models over already-cleaned texts."""
+        metrics = self.metrics
+        if metrics is not None:
+            start = time.perf_counter()
+        features = self.tfidf.transform(cleaned)
+        if metrics is not None:
+            start = metrics.lap("transform", start, len(cleaned), sum(map(len, cleaned)))
+
+        if self.cascade:
+            categories, cat_confidences = self._decode_cascade(features)
+            if metrics is not None:
+                start = time.perf_counter()
         else:
-            cat_confidence = 0.85  # Fallback
-
-        # Urgency prediction
-        urg_idx = self.urg_model.predict(features)[0]
-        urgency = self.urg_encoder.inverse_transform([urg_idx])[0]
-
-        # Urgency confidence
-        if hasattr(self.urg_model, "predict_proba"):
-            urg_proba = self.urg_model.predict_proba(features)[0]
-            urg_confidence = float(max(urg_proba))
+            categories, cat_confidences = self._decode(
+                self.cat_model, features, self._cat_labels
+            )
+            if metrics is not None:
+                start = metrics.lap("category", start, len(cleaned))
+        if self.urg_scorer is not None and len(cleaned) == 1:
+            proba = self.urg_scorer.predict_proba(cleaned)
+            idx = proba.argmax(axis=1)
+            urgencies, urg_confidences = self._urg_labels[idx], proba[np.arange(len(idx)), idx]
         else:
-            urg_confidence = 0.85
-
-        # Overall confidence = average of both
-        confidence = round((cat_confidence + urg_confidence) / 2, 4)
-
-        return {
-            "category": category,
-            "urgency": urgency,
-            "confidence": confidence,
-            "cat_confidence": round(cat_confidence, 4),
-            "urg_confidence": round(urg_confidence, 4),
-        }
+            urgencies, urg_confidences = self._decode(
+                self.urg_model, features, self._urg_labels
+            )
+        if metrics is not None:
+            metrics.lap("urgency", start, len(cleaned))
+
+        results = []
+        for category, urgency, cat_conf, urg_conf in zip(
+            categories, urgencies, cat_confidences, urg_confidences
+        ):
+            cat_conf = float(cat_conf)
+            urg_conf = float(urg_conf)
+            results.append({
+                "category": str(category),
+                "urgency": str(urgency),
+                # Overall confidence = average of both
+                "confidence": round((cat_conf + urg_conf) / 2, 4),
+                "cat_confidence": round(cat_conf, 4),
+                "urg_confidence": round(urg_conf, 4),
+            })
+        return results
+
+    def _decode_cascade(self, features):
+        """Linear model first; XGBoost only for rows below the threshold."""
+        metrics = self.metrics
+        if metrics is not None:
+            start = time.perf_counter()
+        categories, confidences = self._decode(
+            self.cat_fast_model, features, self._cat_fast_labels
+        )
+        if metrics is not None:
+            start = metrics.lap("category_fast", start, len(categories))
+        unsure = np.flatnonzero(confidences < self.cascade_threshold)
+        if len(unsure):
+            categories = categories.astype(object)
+            confidences = confidences.astype(np.float64)
+            categories[unsure], confidences[unsure] = self._decode(
+                self.cat_model, features[unsure], self._cat_labels
+            )
+            if metrics is not None:
+                metrics.lap("category", start, len(unsure))
+        self.cascade_stats["fast"] += len(categories) - len(unsure)
+        self.cascade_stats["escalated"] += len(unsure)
+        return categories, confidences
+
+    @staticmethod
+    def _decode(model, features, labels):
+        """Return (labels, confidences) arrays for a feature matrix."""
+        if hasattr(model, "predict_proba"):
+            proba = model.predict_proba(features)
+            idx = proba.argmax(axis=1)
+            return labels[idx], proba[np.arange(len(idx)), idx]
+
+        # Fallback for models without probabilities
+        pred = np.asarray(model.predict(features))
+        idx = np.searchsorted(model.classes_, pred)
+        return labels[idx], np.full(len(idx), 0.85)
 
 
 # ─── Auto-routing Map ───────────────────────────────────────────────────────
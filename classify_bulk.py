@@ -0,0 +1,325 @@
+"""
+classify_bulk.py — Bulk Email Classification
+Streams a CSV, JSONL or mbox export of emails through the classifier in
+fixed-size chunks and writes results as it goes, so memory stays flat for
+any input size.
+
+Usage:
+    python classify_bulk.py --input emails.csv --output results.csv
+    python classify_bulk.py --input emails.jsonl --output results.jsonl --workers 4
+    python classify_bulk.py --input inbox.mbox --output results.csv --id-col subject
+
+The email text column is auto-detected (email_text, text, body, ...) unless
+given with --text-col; mbox messages become sender/subject/date/body records.
+When a subject column is present, the models see "Subject: …" + body, the
+same text the Streamlit app classifies (email_text()).
+Output format (CSV or JSONL) follows the output file extension.
+"""
+import argparse
+import csv
+import email
+import email.policy
+import json
+import os
+import sys
+import time
+from collections import deque
+
+from prepare_custom_dataset import detect_columns
+
+RESULT_FIELDS = ["category", "urgency", "confidence", "cat_confidence", "urg_confidence"]
+FORMATS = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl", ".mbox": "mbox"}
+SENDER_COLUMNS = ["sender", "from", "email_from", "from_address"]
+SUBJECT_COLUMNS = ["subject", "title", "email_subject"]
+
+# Email bodies can be far longer than the csv module's default field limit
+csv.field_size_limit(min(sys.maxsize, 2**31 - 1))
+
+
+def detect_format(path, override=None):
+    """Return 'csv', 'jsonl' or 'mbox' for a path (or the explicit override)."""
+    if override:
+        return override
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in FORMATS:
+        raise ValueError(f"Unsupported format: {ext}. Use .csv, .jsonl, .mbox or pass --format")
+    return FORMATS[ext]
+
+
+def iter_records(f, fmt):
+    """Yield one dict per email from an open CSV, JSONL or mbox text file.
+
+    Malformed input raises ValueError naming the offending line.
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(f)
+        try:
+            yield from reader
+        except csv.Error as e:
+            raise ValueError(f"Malformed CSV near line {reader.line_num + 1}: {e}") from e
+    elif fmt == "mbox":
+        yield from iter_mbox(f)
+    else:
+        for line_num, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Invalid JSON on line {line_num}: {e.msg}") from e
+            if not isinstance(record, dict):
+                raise ValueError(f"Line {line_num} is not a JSON object")
+            yield record
+
+
+def find_column(headers, candidates):
+    """The header matching the first candidate name (case-insensitive), or None."""
+    lower = {h.lower().strip(): h for h in headers if h}
+    return next((lower[c] for c in candidates if c in lower), None)
+
+
+def email_text(body, subject=""):
+    """The text the models classify: the subject line, as in the training emails, then the body."""
+    return f"Subject: {subject}\n\n{body}" if subject else body
+
+
+def record_text(record, text_col, subject_col=None):
+    subject = str(record.get(subject_col) or "") if subject_col else ""
+    return email_text(str(record.get(text_col) or ""), subject)
+
+
+def iter_mbox(f):
+    """Yield {sender, subject, date, body} per message of an mbox text stream."""
+    lines = None
+    for line in f:
+        if line.startswith("From "):
+            if lines:
+                yield parse_message(lines)
+            lines = []
+        elif lines is not None:
+            # mboxrd: body lines starting with "From " were escaped as ">From "
+            lines.append(line[1:] if line.startswith(">") and line.lstrip(">").startswith("From ") else line)
+    if lines:
+        yield parse_message(lines)
+
+
+def parse_message(lines):
+    """Parse one RFC 822 message; the body is the plain-text part (or HTML)."""
+    msg = email.message_from_string("".join(lines), policy=email.policy.default)
+    part = msg.get_body(preferencelist=("plain", "html"))
+    body = ""
+    if part is not None:
+        try:
+            body = part.get_content()
+        except (LookupError, UnicodeError):
+            # Unknown or wrong charset declaration
+            body = (part.get_payload(decode=True) or b"").decode("utf-8", errors="replace")
+    return {
+        "sender": str(msg["from"] or ""),
+        "subject": str(msg["subject"] or ""),
+        "date": str(msg["date"] or ""),
+        "body": body.strip(),
+    }
+
+
+def iter_chunks(records, chunk_size):
+    """Group an iterator of records into lists of at most chunk_size."""
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class ResultWriter:
+    """Incrementally writes classification results as CSV or JSONL."""
+
+    def __init__(self, f, fmt, fieldnames):
+        self.f = f
+        self.fmt = fmt
+        if fmt == "csv":
+            self.writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction="ignore")
+            self.writer.writeheader()
+
+    def write(self, rows):
+        if self.fmt == "csv":
+            self.writer.writerows(rows)
+        else:
+            self.f.writelines(json.dumps(row, ensure_ascii=False) + "\n" for row in rows)
+        self.f.flush()
+
+
+# ─── Worker Process State ────────────────────────────────────────────────────
+_classifier = None
+
+
+def _init_worker(single_threaded=False, cache_size=0, cache_db=None, bundle=None, cascade=False):
+    """Load the models once per process."""
+    global _classifier
+    from classifier import EmailClassifier
+    from prediction_cache import PredictionCache
+    cache = PredictionCache(cache_size, cache_db) if cache_size > 0 else None
+    _classifier = EmailClassifier(cache=cache, bundle_path=bundle, cascade=cascade)
+    if single_threaded and hasattr(_classifier.cat_model, "set_params"):
+        # Parallelism comes from the pool; avoid oversubscribing cores
+        _classifier.cat_model.set_params(n_jobs=1)
+
+
+def _classify_texts(texts):
+    return _classifier.predict_batch(texts)
+
+
+def classify_stream(chunks, text_col, workers=1, cache_size=0, cache_db=None, bundle=None, cascade=False,
+                    subject_col=None):
+    """Yield (chunk, results) pairs in input order.
+
+    Each record is classified as record_text(record, text_col, subject_col).
+
+    With workers > 1, chunks are classified in a process pool while keeping
+    at most two chunks per worker in flight, so memory stays bounded.
+    Loading from a model bundle lets the workers share one memory-mapped copy
+    of the model weights.
+    """
+    if workers <= 1:
+        if _classifier is None:
+            _init_worker(False, cache_size, cache_db, bundle, cascade)
+        for chunk in chunks:
+            yield chunk, _classify_texts([record_text(r, text_col, subject_col) for r in chunk])
+        return
+
+    import multiprocessing
+    with multiprocessing.Pool(workers, initializer=_init_worker, initargs=(True, cache_size, cache_db, bundle, cascade)) as pool:
+        pending = deque()
+        for chunk in chunks:
+            texts = [record_text(r, text_col, subject_col) for r in chunk]
+            pending.append((chunk, pool.apply_async(_classify_texts, (texts,))))
+            if len(pending) >= workers * 2:
+                done_chunk, result = pending.popleft()
+                yield done_chunk, result.get()
+        while pending:
+            done_chunk, result = pending.popleft()
+            yield done_chunk, result.get()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Classify a large CSV/JSONL/mbox file of emails")
+    parser.add_argument("--input", "-i", required=True, help="Input file (.csv, .jsonl or .mbox)")
+    parser.add_argument("--output", "-o", required=True, help="Output file (.csv or .jsonl)")
+    parser.add_argument("--text-col", help="Name of the email text column (auto-detected if not specified)")
+    parser.add_argument("--subject-col",
+                        help="Subject column classified as 'Subject: …' before the text "
+                             "(auto-detected if not specified; pass '' to ignore subjects)")
+    parser.add_argument("--id-col", help="Column to copy into the output to identify each email")
+    parser.add_argument("--format", choices=["csv", "jsonl", "mbox"], help="Input format (default: from extension)")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Emails per batch (default: 1000)")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes (default: 1)")
+    parser.add_argument("--bundle", help="Load models from a single-file bundle (see model_bundle.py)")
+    parser.add_argument("--cascade", action="store_true",
+                        help="Linear category model first, XGBoost only for low-confidence emails")
+    parser.add_argument("--cache-size", type=int, default=0,
+                        help="In-memory prediction cache entries per process (default: off)")
+    parser.add_argument("--cache-db", help="SQLite file for a persistent prediction cache (needs --cache-size)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.input):
+        print(f"❌ File not found: {args.input}")
+        sys.exit(1)
+    if args.chunk_size < 1:
+        print("❌ --chunk-size must be at least 1")
+        sys.exit(1)
+    if args.bundle and not os.path.exists(args.bundle):
+        print(f"❌ Model bundle not found: {args.bundle}")
+        print("   Export one with: python model_bundle.py --export")
+        sys.exit(1)
+
+    try:
+        in_fmt = detect_format(args.input, args.format)
+        out_fmt = detect_format(args.output)
+        if out_fmt == "mbox":
+            raise ValueError("Results can only be written as .csv or .jsonl")
+        # Load the models once here: a missing model must stop the run with a
+        # message, not fail (and be respawned) in every pool worker
+        if args.workers <= 1:
+            _init_worker(False, args.cache_size, args.cache_db, args.bundle, args.cascade)
+        else:
+            _init_worker(False, 0, None, args.bundle, args.cascade)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    except FileNotFoundError as e:
+        print(f"❌ {e}")
+        if "train_model.py" not in str(e):
+            print("   Retrain with train_model.py to create the missing model files.")
+        sys.exit(1)
+
+    try:
+        with open(args.input, "r", encoding="utf-8", errors="replace", newline="") as fin:
+            records = iter_records(fin, in_fmt)
+
+            # Peek at the first record to resolve the text column
+            first = next(records, None)
+            if first is None:
+                print(f"❌ No emails found in {args.input}")
+                sys.exit(1)
+            text_col = args.text_col or detect_columns(list(first.keys()))[0]
+            if not text_col or text_col not in first:
+                print(f"❌ Could not find the email text column. Available columns: {list(first.keys())}")
+                print(f"   Specify it with: --text-col 'column_name'")
+                sys.exit(1)
+            subject_col = args.subject_col
+            if subject_col is None:
+                subject_col = find_column(list(first.keys()), SUBJECT_COLUMNS)
+            if subject_col == text_col:
+                subject_col = None
+
+            def all_records():
+                yield first
+                yield from records
+
+            fieldnames = ["row"] + ([args.id_col] if args.id_col else []) + RESULT_FIELDS
+            columns = f"'{subject_col}' + '{text_col}'" if subject_col else f"'{text_col}'"
+            print(f"📂 Classifying {columns} from {args.input} "
+                  f"(chunk size {args.chunk_size}, {args.workers} worker(s))")
+
+            start = time.perf_counter()
+            total = 0
+            with open(args.output, "w", encoding="utf-8", newline="") as fout:
+                writer = ResultWriter(fout, out_fmt, fieldnames)
+                chunks = iter_chunks(all_records(), args.chunk_size)
+                stream = classify_stream(
+                    chunks, text_col, args.workers, args.cache_size, args.cache_db, args.bundle, args.cascade,
+                    subject_col,
+                )
+                for chunk, results in stream:
+                    rows = []
+                    for record, result in zip(chunk, results):
+                        row = {"row": total}
+                        if args.id_col:
+                            row[args.id_col] = record.get(args.id_col)
+                        row.update(result)
+                        rows.append(row)
+                        total += 1
+                    writer.write(rows)
+
+                    elapsed = time.perf_counter() - start
+                    print(f"   ⏳ {total:,} emails ({total / elapsed:,.0f}/s)", flush=True)
+    except ValueError as e:
+        # Malformed input; results up to the bad record are already written
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    elapsed = time.perf_counter() - start
+    print(f"\n✅ Classified {total:,} emails in {elapsed:.1f}s → {args.output}")
+    if args.workers <= 1 and _classifier.cache is not None:
+        print(f"   Cache: {_classifier.cache.stats()}")
+    if args.workers <= 1 and args.cascade:
+        stats = _classifier.cascade_stats
+        print(f"   Cascade: {stats['escalated']:,} of {stats['fast'] + stats['escalated']:,} emails escalated to XGBoost")
+
+
+if __name__ == "__main__":
+    main()
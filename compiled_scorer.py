@@ -0,0 +1,214 @@
+"""
+compiled_scorer.py — Compiled Sparse-Dot Scorer for the Urgency Model
+Folds the TF-IDF idf weights into the logistic regression coefficients so a
+cleaned email is scored with a token lookup, a small dot product and a
+softmax — no sklearn transform/predict_proba machinery per call.
+
+For a document with term counts c_j (tf_j = 1 + ln c_j when sublinear):
+
+    x_j      = tf_j · idf_j / ‖tf · idf‖
+    score_k  = Σ_j x_j · W_kj + b_k
+             = (Σ_j tf_j · T_jk) / ‖tf · idf‖ + b_k      with T_jk = idf_j · W_kj
+
+so the table T (terms × classes) plus the idf column for the norm is all
+that is needed. Works for vocabulary and hashed TF-IDF, and multinomial,
+one-vs-rest or binary linear models.
+
+Export file (.npz, no pickles):
+    table      — float64 (n_terms, n_classes) folded weights
+    idf        — float64 (n_terms,) for the document norm
+    intercept  — float64 (n_classes,)
+    classes    — model class ids
+    vocabulary — newline-joined UTF-8 terms (empty for hashed features)
+    meta       — JSON settings (analyzer, norm, link function)
+
+Usage:
+    python compiled_scorer.py --export     # models/*.pkl → models/urgency_scorer.npz
+    python compiled_scorer.py --verify     # parity + latency vs. sklearn
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from model_bundle import BundleVectorizer, _describe_vectorizer
+
+SCORER_NAME = "urgency_scorer.npz"
+INT32_MIN = -2 ** 31
+
+
+def compile_scorer(tfidf, model):
+    """Build a CompiledScorer from a fitted vectorizer and linear model."""
+    segments = {}
+    meta = _describe_vectorizer(tfidf, segments)
+    idf = segments["idf"]
+    coef = np.asarray(model.coef_, dtype=np.float64)
+    meta["link"] = (
+        "binary" if coef.shape[0] == 1
+        else "ovr" if type(model).__name__ == "SGDClassifier" or getattr(model, "multi_class", "auto") == "ovr"
+        else "softmax"
+    )
+    return CompiledScorer(
+        meta,
+        table=np.ascontiguousarray((coef * idf).T),
+        idf=idf,
+        intercept=np.asarray(model.intercept_, dtype=np.float64),
+        classes=np.asarray(model.classes_),
+        vocabulary=segments.get("vocabulary", np.zeros(0, dtype=np.uint8)),
+    )
+
+
+def load_scorer(path):
+    with np.load(path, allow_pickle=False) as f:
+        meta = json.loads(bytes(f["meta"]).decode("utf-8"))
+        return CompiledScorer(meta, f["table"], f["idf"], f["intercept"], f["classes"], f["vocabulary"])
+
+
+class CompiledScorer:
+    """predict_proba over cleaned texts from a folded per-term weight table."""
+
+    def __init__(self, meta, table, idf, intercept, classes, vocabulary):
+        self.meta = meta
+        self.table = table
+        self.idf = idf
+        self.intercept = intercept
+        self.classes_ = classes
+        self.vocabulary = vocabulary
+        self.link = meta["link"]
+        self.sublinear_tf = meta["sublinear_tf"]
+        self.norm = meta["norm"]
+        # Reuse the bundle analyzer (tokenizer + n-grams, same as sklearn)
+        self._analyzer = BundleVectorizer(meta, idf, vocabulary)
+        self.n_features = meta["n_features"]
+        if meta["type"] == "hashing":
+            from sklearn.utils import murmurhash3_32
+            self._hash = murmurhash3_32
+            self._lookup = self._hashed_index
+        else:
+            self._lookup = self._analyzer.vocabulary_.get
+
+    def _hashed_index(self, term):
+        # Same index as sklearn's HashingVectorizer (alternate_sign=False)
+        h = self._hash(term, seed=0)
+        if h == INT32_MIN:
+            return (2 ** 31 - 1 - (self.n_features - 1)) % self.n_features
+        return abs(h) % self.n_features
+
+    def scores(self, doc):
+        """Raw linear scores for one cleaned text."""
+        counts = {}
+        lookup = self._lookup
+        for term in self._analyzer._analyze(doc):
+            j = lookup(term)
+            if j is not None:
+                counts[j] = counts.get(j, 0) + 1
+        if not counts:
+            return self.intercept.copy()
+
+        ids = np.fromiter(counts, dtype=np.int64, count=len(counts))
+        tf = np.fromiter(counts.values(), dtype=np.float64, count=len(counts))
+        if self.sublinear_tf:
+            tf = np.log(tf) + 1.0
+        if self.norm == "l2":
+            weighted = tf * self.idf[ids]
+            norm = np.sqrt(weighted @ weighted)
+        elif self.norm == "l1":
+            norm = np.abs(tf * self.idf[ids]).sum()
+        else:
+            norm = 1.0
+        return (tf @ self.table[ids]) / (norm or 1.0) + self.intercept
+
+    def score(self, doc):
+        """Class probabilities for one cleaned text."""
+        s = self.scores(doc)
+        if self.link == "binary":
+            p = 1.0 / (1.0 + np.exp(-s[0]))
+            return np.array([1.0 - p, p])
+        if self.link == "ovr":
+            p = 1.0 / (1.0 + np.exp(-s))
+            return p / p.sum()
+        s = np.exp(s - s.max())
+        return s / s.sum()
+
+    def predict_proba(self, docs):
+        return np.array([self.score(doc) for doc in docs]).reshape(len(docs), len(self.classes_))
+
+    def predict(self, docs):
+        return self.classes_[self.predict_proba(docs).argmax(axis=1)]
+
+    def save(self, path):
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(
+            tmp_path,
+            table=self.table, idf=self.idf, intercept=self.intercept, classes=self.classes_,
+            vocabulary=np.asarray(self.vocabulary, dtype=np.uint8),
+            meta=np.frombuffer(json.dumps(self.meta).encode("utf-8"), dtype=np.uint8),
+        )
+        os.replace(tmp_path, path)
+
+
+# ─── CLI ─────────────────────────────────────────────────────────────────────
+def _median_ms(fn, docs):
+    timings = []
+    for doc in docs:
+        start = time.perf_counter()
+        fn(doc)
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings)) * 1000
+
+
+def main():
+    import joblib
+    from classifier import MODEL_DIR
+
+    parser = argparse.ArgumentParser(description="Export or verify the compiled urgency scorer")
+    parser.add_argument("--export", action="store_true", help="Compile the urgency model from the .pkl models")
+    parser.add_argument("--verify", action="store_true", help="Compare scorer probabilities and latency with sklearn")
+    parser.add_argument("--model-dir", default=MODEL_DIR, help="Directory with the .pkl models")
+    parser.add_argument("--scorer", help=f"Scorer path (default: <model-dir>/{SCORER_NAME})")
+    parser.add_argument("--samples", type=int, default=2000, help="Generated emails for --verify (default: 2000)")
+    parser.add_argument("--tolerance", type=float, default=1e-9, help="Max allowed probability difference")
+    args = parser.parse_args()
+
+    if not (args.export or args.verify):
+        parser.print_help()
+        return
+
+    scorer_path = args.scorer or os.path.join(args.model_dir, SCORER_NAME)
+    tfidf = joblib.load(os.path.join(args.model_dir, "tfidf_vectorizer.pkl"))
+    urg_model = joblib.load(os.path.join(args.model_dir, "urgency_model.pkl"))
+
+    if args.export:
+        compile_scorer(tfidf, urg_model).save(scorer_path)
+        print(f"✅ Scorer written → {scorer_path} ({os.path.getsize(scorer_path) / 1e6:.2f} MB)")
+
+    if args.verify:
+        from text_processing import build_corpus, clean_text
+
+        scorer = load_scorer(scorer_path)
+        cleaned = [clean_text(text) for text in build_corpus(args.samples)]
+        ref = urg_model.predict_proba(tfidf.transform(cleaned))
+        new = scorer.predict_proba(cleaned)
+        diff = float(np.abs(ref - new).max())
+        agree = float((ref.argmax(axis=1) == new.argmax(axis=1)).mean())
+
+        sample = cleaned[:500]
+        sklearn_ms = _median_ms(lambda doc: urg_model.predict_proba(tfidf.transform([doc])), sample)
+        scorer_ms = _median_ms(scorer.score, sample)
+
+        print(f"🔍 Verifying compiled scorer over {len(cleaned)} emails")
+        print(f"   Max probability difference: {diff:.2e} (tolerance {args.tolerance:.0e})")
+        print(f"   Label agreement: {agree:.2%}")
+        print(f"⏱ Single-email latency (median): sklearn {sklearn_ms:.3f} ms | "
+              f"scorer {scorer_ms:.3f} ms ({sklearn_ms / scorer_ms:.1f}x)")
+        if diff > args.tolerance or agree < 1.0:
+            print("❌ Scorer does not match sklearn")
+            sys.exit(1)
+        print("✅ Scorer matches sklearn")
+
+
+if __name__ == "__main__":
+    main()
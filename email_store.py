@@ -0,0 +1,587 @@
+"""
+email_store.py — Stores for Classified Emails
+Two interchangeable backends behind the Dashboard, with the same API
+(append / extend, kpis, category_counts, urgency_counts, categories, query):
+
+    EmailStore        — in-process columnar store: category and urgency are
+                        dictionary-encoded into small integer arrays, ids and
+                        confidences live in append-only NumPy arrays, text
+                        fields in plain lists. KPI and chart counts are kept
+                        up to date as emails are added, and an inverted
+                        token index (TokenIndex) serves search.
+    SQLiteEmailStore  — persistent and shared between sessions: one SQLite
+                        file in WAL mode, indexed on category, urgency, team,
+                        timestamp and confidence, plus an FTS5 table for
+                        search. Filters, sorting, paging and KPI counts run
+                        as SQL.
+
+Search covers the subject, full body and sender. Every word of the query
+must match the start of a word in the email ("refun char" finds "refund …
+charged"), and sort="relevance" ranks matches by BM25 (urgency order when
+nothing is searched).
+
+open_store() picks the backend from EMAIL_CLASSIFIER_STORE ("sqlite", the
+default, or "memory") and the database path from EMAIL_CLASSIFIER_DB
+(default: data/classified_emails.db).
+
+Usage:
+    store = open_store()
+    store.extend(records)                        # dicts as built by app.py; ids are assigned
+    store.kpis()                                 # {"total": ..., "High": ..., "avg_confidence": ...}
+    page, total = store.query(categories=["spam"], search="refund",
+                              sort="confidence", descending=True, offset=50, limit=25)
+"""
+import math
+import os
+import re
+import sqlite3
+import threading
+from bisect import bisect_left
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+URGENCY_LEVELS = ("High", "Medium", "Low")
+TEXT_COLUMNS = ("sender", "subject", "content", "full_content", "team", "timestamp")
+COLUMNS = ("id",) + TEXT_COLUMNS[:4] + ("category", "urgency", "confidence") + TEXT_COLUMNS[4:]
+SORT_COLUMNS = ("relevance", "urgency", "id", "confidence", "category")
+# Words as FTS5's unicode61 tokenizer sees them: runs of letters and digits
+WORD = re.compile(r"[^\W_]+")
+
+STORE_BACKEND = os.environ.get("EMAIL_CLASSIFIER_STORE", "sqlite")
+DB_PATH = os.environ.get(
+    "EMAIL_CLASSIFIER_DB",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "classified_emails.db"),
+)
+
+
+def search_terms(text) -> list:
+    """Lower-cased words of a search query or document."""
+    return WORD.findall(text.lower()) if text else []
+
+
+def open_store(backend: str = None, db_path: str = None):
+    """EmailStore or SQLiteEmailStore, per argument or environment."""
+    backend = backend or STORE_BACKEND
+    if backend == "memory":
+        return EmailStore()
+    if backend == "sqlite":
+        return SQLiteEmailStore(db_path or DB_PATH)
+    raise ValueError(f"Unknown email store '{backend}'. Use 'sqlite' or 'memory'")
+
+
+class _Column:
+    """Append-only NumPy array with amortized doubling."""
+
+    def __init__(self, dtype, capacity=1024):
+        self._data = np.empty(capacity, dtype=dtype)
+        self.size = 0
+
+    def extend(self, values):
+        end = self.size + len(values)
+        if end > len(self._data):
+            grown = np.empty(max(end, 2 * len(self._data)), dtype=self._data.dtype)
+            grown[:self.size] = self._data[:self.size]
+            self._data = grown
+        self._data[self.size:end] = values
+        self.size = end
+
+    @property
+    def values(self):
+        return self._data[:self.size]
+
+
+class _Levels:
+    """Dictionary encoding: label ↔ small integer code, plus a count per code."""
+
+    def __init__(self, levels=()):
+        self.labels = []
+        self.codes = {}
+        self.counts = []
+        for label in levels:
+            self.encode(label)
+
+    def encode(self, label):
+        code = self.codes.get(label)
+        if code is None:
+            code = self.codes[label] = len(self.labels)
+            self.labels.append(label)
+            self.counts.append(0)
+        return code
+
+    def lookup(self, labels):
+        """Codes for the known labels among `labels`."""
+        return [self.codes[label] for label in labels if label in self.codes]
+
+
+class TokenIndex:
+    """In-process inverted index with prefix matching and BM25 ranking.
+
+    Documents are numbered 0, 1, 2, ... in the order they are added. Each
+    term keeps append-only arrays of the documents it occurs in and its
+    count there, so adding documents never rewrites existing postings.
+    """
+
+    def __init__(self, k1=1.2, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings = {}             # term → (doc ids, term frequencies)
+        self._lengths = _Column(np.float32)
+        self._length_sum = 0
+        self._terms = []                # sorted vocabulary, for prefix lookups
+        self._new_terms = []            # terms added since the last sort
+
+    def __len__(self):
+        return self._lengths.size
+
+    def add(self, texts):
+        """Index texts as the next documents."""
+        start = len(self)
+        batch = {}
+        lengths = []
+        for doc, text in enumerate(texts, start):
+            terms = search_terms(text)
+            lengths.append(len(terms))
+            for term, tf in Counter(terms).items():
+                entry = batch.get(term)
+                if entry is None:
+                    entry = batch[term] = ([], [])
+                entry[0].append(doc)
+                entry[1].append(tf)
+        # One array append per distinct term per batch
+        for term, (docs, tfs) in batch.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = (_Column(np.int32, 4), _Column(np.float32, 4))
+                self._new_terms.append(term)
+            postings[0].extend(docs)
+            postings[1].extend(tfs)
+        self._lengths.extend(lengths)
+        self._length_sum += sum(lengths)
+
+    def _expand(self, prefix):
+        """Vocabulary terms starting with prefix."""
+        if self._new_terms:
+            # Sorting two sorted runs is a linear merge for timsort
+            self._terms += sorted(self._new_terms)
+            self._terms.sort()
+            self._new_terms = []
+        i = bisect_left(self._terms, prefix)
+        while i < len(self._terms) and self._terms[i].startswith(prefix):
+            yield self._terms[i]
+            i += 1
+
+    def search(self, query):
+        """(doc ids, BM25 scores) of documents matching every query word by prefix.
+
+        Doc ids come back sorted; a query without words matches nothing.
+        """
+        empty = np.zeros(0, dtype=np.int32), np.zeros(0)
+        words = search_terms(query)
+        if not words or not len(self):
+            return empty
+        n_docs = len(self)
+        lengths = self._lengths.values
+        length_norm = self.k1 * (1 - self.b + self.b * lengths / (self._length_sum / n_docs or 1))
+
+        docs, scores = None, None
+        for word in dict.fromkeys(words):
+            parts = []
+            for term in self._expand(word):
+                term_docs, tfs = (column.values for column in self._postings[term])
+                idf = math.log(1 + (n_docs - len(term_docs) + 0.5) / (len(term_docs) + 0.5))
+                parts.append((term_docs, idf * tfs * (self.k1 + 1) / (tfs + length_norm[term_docs])))
+            if not parts:
+                return empty
+            if len(parts) == 1:
+                word_docs, word_scores = parts[0]
+            else:
+                # A document can match several expansions of one prefix
+                word_docs, inverse = np.unique(np.concatenate([d for d, _ in parts]), return_inverse=True)
+                word_scores = np.bincount(inverse, weights=np.concatenate([s for _, s in parts]))
+            if docs is None:
+                docs, scores = word_docs, word_scores.astype(np.float64)
+            else:
+                docs, left, right = np.intersect1d(docs, word_docs, assume_unique=True, return_indices=True)
+                scores = scores[left] + word_scores[right]
+            if not len(docs):
+                return empty
+        return docs, scores
+
+
+class EmailStore:
+    """Columnar, incrementally aggregated store of classified emails."""
+
+    def __init__(self):
+        self._ids = _Column(np.int64)
+        self._confidence = _Column(np.float64)
+        self._category = _Column(np.int32)
+        self._urgency = _Column(np.int8)
+        self._categories = _Levels()
+        # Codes follow URGENCY_LEVELS, so sorting by code puts High first
+        self._urgencies = _Levels(URGENCY_LEVELS)
+        self._text = {name: [] for name in TEXT_COLUMNS}
+        self._confidence_sum = 0.0
+        self._index = TokenIndex()
+
+    def __len__(self):
+        return self._ids.size
+
+    # ─── Writes ──────────────────────────────────────────────────────────
+    def append(self, record: dict):
+        self.extend([record])
+
+    def extend(self, records):
+        """Add record dicts (sender, subject, content, ..., timestamp).
+
+        Records without an "id" are numbered after the existing ones.
+        """
+        records = list(records)
+        if not records:
+            return
+        first_id = len(self) + 1
+        categories = [self._categories.encode(r["category"]) for r in records]
+        urgencies = [self._urgencies.encode(r["urgency"]) for r in records]
+        confidences = [float(r["confidence"]) for r in records]
+        for code in categories:
+            self._categories.counts[code] += 1
+        for code in urgencies:
+            self._urgencies.counts[code] += 1
+        self._confidence_sum += sum(confidences)
+
+        for name, column in self._text.items():
+            column.extend(r[name] for r in records)
+        self._category.extend(categories)
+        self._urgency.extend(urgencies)
+        self._confidence.extend(confidences)
+        self._ids.extend([r.get("id") or first_id + i for i, r in enumerate(records)])
+        self._index.add(f"{r['subject']} {r['full_content']} {r['sender']}" for r in records)
+
+    # ─── Aggregates (O(1) in the number of emails) ───────────────────────
+    def kpis(self) -> dict:
+        """Total, per-urgency counts and average confidence."""
+        total = len(self)
+        kpis = {"total": total, "avg_confidence": self._confidence_sum / total if total else 0.0}
+        kpis.update(zip(self._urgencies.labels, self._urgencies.counts))
+        return kpis
+
+    def category_counts(self) -> dict:
+        """{category: count}, most frequent first (like value_counts)."""
+        pairs = [(label, n) for label, n in zip(self._categories.labels, self._categories.counts) if n]
+        return dict(sorted(pairs, key=lambda pair: -pair[1]))
+
+    def urgency_counts(self) -> dict:
+        """{urgency: count} in High, Medium, Low order (zeros included)."""
+        return dict(zip(self._urgencies.labels, self._urgencies.counts))
+
+    def categories(self) -> list:
+        """Categories present, in first-seen order."""
+        return [label for label, n in zip(self._categories.labels, self._categories.counts) if n]
+
+    # ─── Queries ─────────────────────────────────────────────────────────
+    def select(self, categories=None, urgencies=None, search=None,
+               sort="urgency", descending=False, teams=None) -> np.ndarray:
+        """Row positions matching the filters, ordered by a SORT_COLUMNS column.
+
+        categories / urgencies / teams are lists of labels (None = no filter);
+        search is matched against subject, full body and sender through the
+        token index (a query without words is ignored). The default order is
+        High urgency first. Ties keep arrival order, and descending sorts
+        reverse it.
+        """
+        mask = np.ones(len(self), dtype=bool)
+        if categories is not None:
+            mask &= np.isin(self._category.values, self._categories.lookup(categories))
+        if urgencies is not None:
+            mask &= np.isin(self._urgency.values, self._urgencies.lookup(urgencies))
+        relevance = None
+        if search_terms(search):
+            hits, scores = self._index.search(search)
+            relevance = np.zeros(len(self))
+            relevance[hits] = scores
+            found = np.zeros(len(self), dtype=bool)
+            found[hits] = True
+            mask &= found
+        rows = np.flatnonzero(mask)
+        if teams is not None:
+            teams = set(teams)
+            team = self._text["team"]
+            rows = rows[[team[i] in teams for i in rows]]
+
+        if sort == "relevance" and relevance is not None:
+            key = -relevance  # best match first
+        else:
+            key = self._sort_key("urgency" if sort == "relevance" else sort)
+        rows = rows[np.argsort(key[rows], kind="stable")]
+        return rows[::-1] if descending else rows
+
+    def query(self, categories=None, urgencies=None, search=None, sort="urgency",
+              descending=False, offset=0, limit=None, columns=COLUMNS, teams=None):
+        """(DataFrame of one page of matches, total number of matches)."""
+        rows = self.select(categories, urgencies, search, sort, descending, teams)
+        end = None if limit is None else offset + limit
+        return self.frame(rows[offset:end], columns), len(rows)
+
+    def _sort_key(self, sort):
+        if sort == "urgency":
+            return self._urgency.values.astype(np.int32)
+        if sort == "id":
+            return self._ids.values
+        if sort == "confidence":
+            return self._confidence.values
+        if sort == "category":
+            # Alphabetical rank of each category code
+            ranks = np.argsort(np.argsort(self._categories.labels, kind="stable"))
+            return ranks[self._category.values]
+        raise ValueError(f"Unknown sort column '{sort}'. Use one of {SORT_COLUMNS}")
+
+    def frame(self, rows=None, columns=COLUMNS) -> pd.DataFrame:
+        """DataFrame of the given row positions (all rows when None)."""
+        if rows is None:
+            rows = np.arange(len(self))
+        data = {}
+        for name in columns:
+            if name == "id":
+                data[name] = self._ids.values[rows]
+            elif name == "confidence":
+                data[name] = self._confidence.values[rows]
+            elif name == "category":
+                data[name] = pd.Categorical.from_codes(self._category.values[rows], self._categories.labels)
+            elif name == "urgency":
+                data[name] = pd.Categorical.from_codes(self._urgency.values[rows], self._urgencies.labels)
+            else:
+                column = self._text[name]
+                data[name] = [column[i] for i in rows]
+        return pd.DataFrame(data, columns=list(columns))
+
+
+# ─── SQLite Backend ─────────────────────────────────────────────────────────
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS emails (
+    id           INTEGER PRIMARY KEY,
+    sender       TEXT NOT NULL,
+    subject      TEXT NOT NULL,
+    content      TEXT NOT NULL,
+    full_content TEXT NOT NULL,
+    category     TEXT NOT NULL,
+    urgency      TEXT NOT NULL,
+    urgency_rank INTEGER NOT NULL,
+    confidence   REAL NOT NULL,
+    team         TEXT NOT NULL,
+    timestamp    TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_emails_category ON emails (category);
+CREATE INDEX IF NOT EXISTS idx_emails_urgency ON emails (urgency);
+CREATE INDEX IF NOT EXISTS idx_emails_urgency_rank ON emails (urgency_rank);
+CREATE INDEX IF NOT EXISTS idx_emails_team ON emails (team);
+CREATE INDEX IF NOT EXISTS idx_emails_timestamp ON emails (timestamp);
+CREATE INDEX IF NOT EXISTS idx_emails_confidence ON emails (confidence);
+
+-- Running counts per (category, urgency), kept current by triggers, so KPI
+-- cards, charts and unsearched match counts never scan the emails table
+CREATE TABLE IF NOT EXISTS email_stats (
+    category       TEXT NOT NULL,
+    urgency        TEXT NOT NULL,
+    urgency_rank   INTEGER NOT NULL,
+    n              INTEGER NOT NULL,
+    confidence_sum REAL NOT NULL,
+    first_id       INTEGER NOT NULL,
+    PRIMARY KEY (category, urgency)
+);
+CREATE TRIGGER IF NOT EXISTS emails_stats_insert AFTER INSERT ON emails BEGIN
+    INSERT INTO email_stats VALUES (NEW.category, NEW.urgency, NEW.urgency_rank, 1, NEW.confidence, NEW.id)
+    ON CONFLICT (category, urgency) DO UPDATE
+    SET n = n + 1, confidence_sum = confidence_sum + excluded.confidence_sum;
+END;
+CREATE TRIGGER IF NOT EXISTS emails_stats_delete AFTER DELETE ON emails BEGIN
+    UPDATE email_stats SET n = n - 1, confidence_sum = confidence_sum - OLD.confidence
+    WHERE category = OLD.category AND urgency = OLD.urgency;
+END;
+
+-- Full-text index over subject, full body and sender (external content:
+-- the text is stored once, in emails), kept in sync by triggers
+CREATE VIRTUAL TABLE IF NOT EXISTS emails_fts USING fts5(
+    subject, full_content, sender,
+    content='emails', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 0', prefix='2 3'
+);
+CREATE TRIGGER IF NOT EXISTS emails_fts_insert AFTER INSERT ON emails BEGIN
+    INSERT INTO emails_fts (rowid, subject, full_content, sender)
+    VALUES (NEW.id, NEW.subject, NEW.full_content, NEW.sender);
+END;
+CREATE TRIGGER IF NOT EXISTS emails_fts_delete AFTER DELETE ON emails BEGIN
+    INSERT INTO emails_fts (emails_fts, rowid, subject, full_content, sender)
+    VALUES ('delete', OLD.id, OLD.subject, OLD.full_content, OLD.sender);
+END;
+"""
+# When at least this share of all emails matches the filters, a page is read
+# by walking the sort index and checking the filters on the way; below it, the
+# filter indexes find the matches and SQLite sorts just those
+DENSE_MATCH_SHARE = 0.05
+# Index entries end with the rowid (= id), so "ORDER BY <key>, id" walks an index
+SQL_ORDER = {
+    "relevance": "rank {d}, id {d}",   # bm25(): lower is better
+    "urgency": "urgency_rank {d}, id {d}",
+    "id": "id {d}",
+    "confidence": "confidence {d}, id {d}",
+    "category": "category {d}, id {d}",
+}
+
+
+class SQLiteEmailStore:
+    """Persistent email store; every query is pushed down to SQLite."""
+
+    def __init__(self, db_path: str = DB_PATH):
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.db_path = db_path
+        # One connection shared by Streamlit's script threads, serialized by a lock
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            has_fts = self._db.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'emails_fts'"
+            ).fetchone()
+            self._db.executescript(SCHEMA)
+            if not has_fts:
+                # Database from before full-text search: index existing emails
+                self._db.execute("INSERT INTO emails_fts (emails_fts) VALUES ('rebuild')")
+            self._db.commit()
+
+    def __len__(self):
+        return self._scalar("SELECT COUNT(*) FROM emails")
+
+    def _scalar(self, sql, params=()):
+        with self._lock:
+            return self._db.execute(sql, params).fetchone()[0]
+
+    def _rows(self, sql, params=()):
+        with self._lock:
+            return self._db.execute(sql, params).fetchall()
+
+    # ─── Writes ──────────────────────────────────────────────────────────
+    def append(self, record: dict):
+        self.extend([record])
+
+    def extend(self, records):
+        """Insert record dicts in one transaction; ids are assigned by SQLite."""
+        rows = [
+            (r.get("id"), r["sender"], r["subject"], r["content"], r["full_content"],
+             r["category"], r["urgency"], _urgency_rank(r["urgency"]), float(r["confidence"]),
+             r["team"], r["timestamp"])
+            for r in records
+        ]
+        if not rows:
+            return
+        with self._lock, self._db:
+            self._db.executemany("INSERT INTO emails VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def clear(self):
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM emails")
+            self._db.execute("DELETE FROM email_stats")
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    # ─── Aggregates (from email_stats, O(categories × urgencies)) ────────
+    def kpis(self) -> dict:
+        """Total, per-urgency counts and average confidence."""
+        total, confidence_sum = self._rows("SELECT SUM(n), SUM(confidence_sum) FROM email_stats")[0]
+        kpis = {"total": total or 0, "avg_confidence": confidence_sum / total if total else 0.0}
+        kpis.update(self.urgency_counts())
+        return kpis
+
+    def category_counts(self) -> dict:
+        """{category: count}, most frequent first (like value_counts)."""
+        return dict(self._rows(
+            "SELECT category, SUM(n) AS total FROM email_stats GROUP BY category "
+            "HAVING total > 0 ORDER BY total DESC, MIN(first_id)"
+        ))
+
+    def urgency_counts(self) -> dict:
+        """{urgency: count} in High, Medium, Low order (zeros included)."""
+        counts = dict.fromkeys(URGENCY_LEVELS, 0)
+        counts.update(self._rows(
+            "SELECT urgency, SUM(n) AS total FROM email_stats GROUP BY urgency "
+            "HAVING total > 0 ORDER BY MIN(urgency_rank), MIN(first_id)"
+        ))
+        return counts
+
+    def categories(self) -> list:
+        """Categories present, in first-seen order."""
+        return [c for c, in self._rows(
+            "SELECT category FROM email_stats GROUP BY category HAVING SUM(n) > 0 ORDER BY MIN(first_id)"
+        )]
+
+    # ─── Queries ─────────────────────────────────────────────────────────
+    def _where(self, categories, urgencies, teams, match=None, use_indexes=True):
+        clauses, params = [], []
+        if match is not None:
+            clauses.append("id IN (SELECT rowid FROM emails_fts WHERE emails_fts MATCH ?)")
+            params.append(match)
+        # A unary + keeps SQLite from using a column's index for the filter
+        prefix = "" if use_indexes else "+"
+        for column, values in (("category", categories), ("urgency", urgencies), ("team", teams)):
+            if values is not None:
+                values = list(values)
+                clauses.append(f"{prefix}{column} IN ({','.join('?' * len(values))})")
+                params += values
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def query(self, categories=None, urgencies=None, search=None, sort="urgency",
+              descending=False, offset=0, limit=None, columns=COLUMNS, teams=None):
+        """(DataFrame of one page of matches, total number of matches)."""
+        if sort not in SQL_ORDER:
+            raise ValueError(f"Unknown sort column '{sort}'. Use one of {SORT_COLUMNS}")
+        unknown = set(columns) - set(COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown columns {sorted(unknown)}. Use {COLUMNS}")
+        words = search_terms(search)
+        if sort == "relevance" and not words:
+            sort = "urgency"
+        order = SQL_ORDER[sort].format(d="DESC" if descending else "ASC")
+        select = ", ".join(f"emails.{c}" for c in columns)
+
+        if words:
+            # Every word as a quoted prefix term: "refun"* "char"*
+            match = " ".join(f'"{word}"*' for word in words)
+            if categories is None and urgencies is None and teams is None:
+                total = self._scalar("SELECT COUNT(*) FROM emails_fts WHERE emails_fts MATCH ?", [match])
+            else:
+                where, params = self._where(categories, urgencies, teams, match)
+                total = self._scalar(f"SELECT COUNT(*) FROM emails{where}", params)
+            if sort == "relevance":
+                # Matches drive the join (CROSS JOIN fixes the loop order) so
+                # bm25() is computed once per hit; filters are checked per hit
+                source = ("(SELECT rowid AS hit, bm25(emails_fts) AS rank FROM emails_fts "
+                          "WHERE emails_fts MATCH ?) CROSS JOIN emails ON emails.id = hit")
+                where, params = self._where(categories, urgencies, teams)
+                params = [match] + params
+            else:
+                source = "emails"
+                where, params = self._where(categories, urgencies, teams, match)
+        else:
+            source = "emails"
+            where, params = self._where(categories, urgencies, teams)
+            if teams is not None:
+                total = self._scalar(f"SELECT COUNT(*) FROM emails{where}", params)
+            else:
+                # Category/urgency filters only: count from the running totals
+                total = self._scalar(f"SELECT COALESCE(SUM(n), 0) FROM email_stats{where}", params)
+            if total >= DENSE_MATCH_SHARE * self._scalar("SELECT COALESCE(SUM(n), 0) FROM email_stats"):
+                where, params = self._where(categories, urgencies, teams, use_indexes=False)
+
+        rows = self._rows(
+            f"SELECT {select} FROM {source}{where} ORDER BY {order} LIMIT ? OFFSET ?",
+            params + [-1 if limit is None else limit, offset],
+        )
+        return pd.DataFrame(rows, columns=list(columns)), total
+
+
+def _urgency_rank(urgency):
+    return URGENCY_LEVELS.index(urgency) if urgency in URGENCY_LEVELS else len(URGENCY_LEVELS)
@@ -0,0 +1,162 @@
+"""
+feature_benchmark.py — Vocabulary TF-IDF vs. Hashed TF-IDF
+Compares the two train_model.py feature modes on fit peak memory, fit time,
+serialized size, load time and memory, transform throughput and accuracy.
+
+Accuracy uses Logistic Regression for both targets so every mode is
+compared with the same, fast model. The XGBoost column times a fixed
+number of category rounds (--xgb-rounds) on each feature matrix: the hist
+method's cost grows with the column count, which is what limits the hash
+space when train_model.py trains XGBoost.
+
+Usage:
+    python feature_benchmark.py                          # data/cleaned_emails.csv
+    python feature_benchmark.py --n-features 16384 --n-features 65536 --xgb-rounds 20
+    python feature_benchmark.py --generate 20000         # synthetic corpus instead
+"""
+import argparse
+import io
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+import joblib
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score
+from sklearn.model_selection import train_test_split
+
+from train_model import HAS_XGBOOST, HASHING_FEATURES, build_category_xgb, build_vectorizer, load_data
+
+
+def _generated_corpus(count, seed=42):
+    from generate_dataset import CATEGORIES, URGENCY_RULES, generate_email
+    from text_processing import clean_text
+
+    rng = random.Random(seed)
+    texts, categories, urgencies = [], [], []
+    names = list(CATEGORIES)
+    for i in range(count):
+        category = names[i % len(names)]
+        weights = URGENCY_RULES[category]
+        urgency = rng.choices(list(weights), weights=list(weights.values()))[0]
+        texts.append(clean_text(generate_email(category, urgency, rng)))
+        categories.append(category)
+        urgencies.append(urgency)
+    return texts, categories, urgencies
+
+
+def measure(mode, n_features, train_texts, test_texts, labels, xgb_rounds=0, n_jobs=1):
+    """Return a dict of metrics for one vectorizer configuration.
+
+    xgb_fit_s (None when xgb_rounds is 0 or XGBoost is missing) is the
+    time to fit xgb_rounds rounds of the train_model.py category model.
+    """
+    vectorizer = build_vectorizer(mode, n_features)
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    X_train = vectorizer.fit_transform(train_texts)
+    fit_seconds = time.perf_counter() - start
+    _, fit_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    buf = io.BytesIO()
+    joblib.dump(vectorizer, buf)
+    size = buf.tell()
+
+    load_seconds = float("inf")
+    for _ in range(5):
+        buf.seek(0)
+        start = time.perf_counter()
+        joblib.load(buf)
+        load_seconds = min(load_seconds, time.perf_counter() - start)
+    buf.seek(0)
+    tracemalloc.start()
+    loaded = joblib.load(buf)
+    loaded_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del loaded
+
+    start = time.perf_counter()
+    X_test = vectorizer.transform(test_texts)
+    transform_rate = len(test_texts) / (time.perf_counter() - start)
+
+    result = {
+        "mode": mode if mode == "tfidf" else f"hashing/{n_features}",
+        "columns": X_train.shape[1],
+        "fit_s": fit_seconds,
+        "fit_peak_mb": fit_peak / 1e6,
+        "size_mb": size / 1e6,
+        "load_ms": load_seconds * 1000,
+        "loaded_mb": loaded_bytes / 1e6,
+        "docs_per_s": transform_rate,
+    }
+    for name, (y_train, y_test) in labels.items():
+        model = LogisticRegression(max_iter=1000, random_state=42, C=10)
+        model.fit(X_train, y_train)
+        result[f"{name}_acc"] = accuracy_score(y_test, model.predict(X_test))
+
+    result["xgb_fit_s"] = None
+    if xgb_rounds and HAS_XGBOOST:
+        from sklearn.preprocessing import LabelEncoder
+
+        model = build_category_xgb(argparse.Namespace(n_jobs=n_jobs), xgb_rounds)
+        y_train = LabelEncoder().fit_transform(labels["category"][0])
+        start = time.perf_counter()
+        model.fit(X_train, y_train)
+        result["xgb_fit_s"] = time.perf_counter() - start
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare vocabulary and hashed TF-IDF features")
+    parser.add_argument("--input", default=os.path.join("data", "cleaned_emails.csv"),
+                        help="Cleaned CSV (default: data/cleaned_emails.csv)")
+    parser.add_argument("--generate", type=int, help="Benchmark on N generated emails instead of --input")
+    parser.add_argument("--n-features", type=int, action="append",
+                        help=f"Hash space size(s) to test (default: {HASHING_FEATURES})")
+    parser.add_argument("--limit", type=int, help="Use at most this many rows of --input")
+    parser.add_argument("--xgb-rounds", type=int, default=20,
+                        help="XGBoost category rounds to time per mode (default: 20, 0 skips)")
+    parser.add_argument("--n-jobs", type=int, default=os.cpu_count() or 1,
+                        help="XGBoost threads (default: all cores)")
+    args = parser.parse_args()
+
+    if args.generate:
+        texts, categories, urgencies = _generated_corpus(args.generate)
+    elif os.path.exists(args.input):
+        texts, categories, urgencies = load_data(args.input)
+    else:
+        print(f"❌ {args.input} not found. Run preprocess.py first or pass --generate N.")
+        sys.exit(1)
+    if args.limit:
+        texts, categories, urgencies = texts[:args.limit], categories[:args.limit], urgencies[:args.limit]
+
+    (train_texts, test_texts, yc_train, yc_test, yu_train, yu_test) = train_test_split(
+        texts, categories, urgencies, test_size=0.2, random_state=42, stratify=categories
+    )
+    labels = {"category": (yc_train, yc_test), "urgency": (yu_train, yu_test)}
+    print(f"📂 {len(train_texts)} train / {len(test_texts)} test emails\n")
+
+    configs = [("tfidf", None)] + [("hashing", n) for n in (args.n_features or [HASHING_FEATURES])]
+    rows = [measure(mode, n, train_texts, test_texts, labels, args.xgb_rounds, args.n_jobs) for mode, n in configs]
+
+    header = (f"{'mode':<16}{'columns':>9}{'fit s':>8}{'fit peak MB':>13}{'size MB':>9}"
+              f"{'load ms':>9}{'loaded MB':>11}{'docs/s':>10}{'cat acc':>9}{'urg acc':>9}{'xgb fit s':>11}")
+    print(header)
+    print("-" * len(header))
+    for r in rows:
+        print(f"{r['mode']:<16}{r['columns']:>9}{r['fit_s']:>8.2f}{r['fit_peak_mb']:>13.1f}"
+              f"{r['size_mb']:>9.2f}{r['load_ms']:>9.1f}{r['loaded_mb']:>11.2f}"
+              f"{r['docs_per_s']:>10,.0f}{r['category_acc']:>9.4f}{r['urgency_acc']:>9.4f}"
+              f"{'n/a' if r['xgb_fit_s'] is None else format(r['xgb_fit_s'], '.2f'):>11}")
+    if args.xgb_rounds and HAS_XGBOOST:
+        print(f"\nxgb fit s: {args.xgb_rounds} rounds of the XGBoost category model "
+              f"({args.n_jobs} thread{'s' if args.n_jobs != 1 else ''}); a full train_model.py run "
+              f"uses up to --max-rounds")
+
+
+if __name__ == "__main__":
+    main()
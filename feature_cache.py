@@ -0,0 +1,82 @@
+"""
+feature_cache.py — Fingerprinted Feature-Matrix Cache
+Persists the fitted vectorizer, label encoders and the train/test sparse
+matrices of a train_model.py run, keyed by a fingerprint of everything
+that produced them:
+
+    - the bytes of the cleaned CSV
+    - the vectorizer class and parameters
+    - the train/test split settings
+    - the scikit-learn version
+
+Runs that only change model hyperparameters reuse the cached features
+instead of refitting TF-IDF. Each entry is a directory:
+
+    <cache_dir>/<fingerprint>/
+        state.pkl    vectorizer, encoders, label arrays (joblib)
+        train.npz    X_train (compressed sparse)
+        test.npz     X_test  (compressed sparse)
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import joblib
+import scipy.sparse as sp
+import sklearn
+
+FEATURE_CACHE_DIR = os.path.join("data", "feature_cache")
+
+
+def file_digest(path, block_size=1 << 20):
+    """sha256 of a file, read in blocks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def fingerprint(data_path, vectorizer, split):
+    """Key for the features of (cleaned data, unfitted vectorizer, split settings)."""
+    spec = {
+        "data": file_digest(data_path),
+        "vectorizer": type(vectorizer).__name__,
+        "params": vectorizer.get_params(deep=True),
+        "split": split,
+        "sklearn": sklearn.__version__,
+    }
+    blob = json.dumps(spec, sort_keys=True, default=repr)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()[:16]
+
+
+def load_features(cache_dir, key):
+    """Return the cached entry as a dict, or None on a miss."""
+    entry = os.path.join(cache_dir, key)
+    try:
+        state = joblib.load(os.path.join(entry, "state.pkl"))
+        state["X_train"] = sp.load_npz(os.path.join(entry, "train.npz"))
+        state["X_test"] = sp.load_npz(os.path.join(entry, "test.npz"))
+    except (OSError, EOFError, ValueError):
+        return None
+    return state
+
+
+def save_features(cache_dir, key, X_train, X_test, **state):
+    """Write an entry atomically; state holds the vectorizer, encoders and labels."""
+    os.makedirs(cache_dir, exist_ok=True)
+    entry = os.path.join(cache_dir, key)
+    tmp = tempfile.mkdtemp(prefix=f".{key}-", dir=cache_dir)
+    try:
+        sp.save_npz(os.path.join(tmp, "train.npz"), sp.csr_matrix(X_train), compressed=True)
+        sp.save_npz(os.path.join(tmp, "test.npz"), sp.csr_matrix(X_test), compressed=True)
+        joblib.dump(state, os.path.join(tmp, "state.pkl"))
+        if os.path.isdir(entry):
+            shutil.rmtree(entry)
+        os.replace(tmp, entry)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    return entry
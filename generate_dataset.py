@@ -1,10 +1,27 @@
 """
 generate_dataset.py — Synthetic Email Dataset Generator
 Generates 3,000+ labeled emails across 6 categories × 3 urgency levels.
+
+With --count it switches to a scalable mode: emails are drawn from a
+category/urgency mix, split into shards and written by a process pool,
+one CSV per shard. Every shard has its own generator seeded from --seed
+and the shard number, so the output depends only on --seed, --count,
+--shards and the mix — never on --workers.
+
+Usage:
+    python generate_dataset.py                     # data/raw_emails.csv (~3,300 emails)
+    python generate_dataset.py --count 5000000 --seed 42 --workers 8
+    python generate_dataset.py --count 100000 --shards 4 --output-dir data/synthetic \
+        --category-mix "Billing Issue=3,Complaint=1" --urgency-mix "High=1,Medium=2,Low=2"
 """
+import argparse
 import csv
+import math
 import os
 import random
+import re
+import time
+from collections import Counter
 
 # ─── Configuration ───────────────────────────────────────────────────────────
 CATEGORIES = {
@@ -152,59 +169,59 @@ URGENCY_RULES = {
     "General Inquiry": {"High": 0.05, "Medium": 0.35, "Low": 0.6},
 }
 
-# Filler values for template placeholders
+# Filler values for template placeholders; each takes the random generator
 FILLERS = {
-    "order": lambda: str(random.randint(100000, 999999)),
-    "amount": lambda: str(random.randint(10, 500)),
-    "wrong_amount": lambda: str(random.randint(100, 999)),
-    "plan_cost": lambda: str(random.choice([9, 19, 29, 49, 99])),
-    "days": lambda: str(random.randint(1, 30)),
-    "months": lambda: str(random.randint(1, 24)),
-    "years": lambda: str(random.randint(1, 10)),
-    "hours": lambda: str(random.randint(1, 8)),
-    "minutes": lambda: str(random.randint(5, 60)),
-    "seconds": lambda: str(random.randint(10, 120)),
-    "attempts": lambda: str(random.randint(2, 10)),
-    "times": lambda: str(random.randint(3, 15)),
-    "count": lambda: str(random.randint(100, 10000)),
-    "size": lambda: str(random.choice([5, 10, 25, 50, 100])),
-    "discount": lambda: str(random.choice([10, 15, 20, 25, 30, 50])),
-    "code": lambda: random.choice(["SAVE20", "WELCOME10", "LOYAL50", "NEWYEAR", "FLASH25"]),
-    "month": lambda: random.choice(["January", "February", "March", "April", "May", "June"]),
-    "feature": lambda: random.choice(["reports", "analytics", "notifications", "calendar", "search", "export", "import", "dashboard", "settings"]),
-    "error": lambda: f"ERR-{random.randint(100,999)}",
-    "error_msg": lambda: random.choice(["Something went wrong", "Unexpected error", "Connection timeout", "Invalid request", "Server error 500"]),
-    "action": lambda: random.choice(["save my work", "generate a report", "send notifications", "sync data", "upload files", "export data"]),
-    "button": lambda: random.choice(["Save", "Submit", "Export", "Delete", "Refresh", "Upload"]),
-    "expected": lambda: random.choice(["it should save", "it should redirect", "a confirmation popup", "data refresh"]),
-    "service": lambda: random.choice(["Slack", "Google Drive", "Salesforce", "Jira", "Trello", "Zapier", "HubSpot"]),
-    "date": lambda: f"Feb {random.randint(1,28)}",
-    "device1": lambda: random.choice(["desktop", "laptop", "phone"]),
-    "device2": lambda: random.choice(["tablet", "phone", "laptop"]),
-    "status_code": lambda: str(random.choice([400, 401, 403, 404, 500, 502, 503])),
-    "endpoint": lambda: random.choice(["users", "data", "reports", "settings", "export"]),
-    "format": lambda: random.choice(["CSV", "PDF", "Excel", "JSON"]),
-    "platform": lambda: random.choice(["iOS", "Android"]),
-    "version": lambda: f"{random.randint(1,5)}.{random.randint(0,9)}.{random.randint(0,9)}",
-    "old_email": lambda: f"old_{random.randint(1,999)}@email.com",
-    "new_email": lambda: f"new_{random.randint(1,999)}@email.com",
-    "old_name": lambda: random.choice(["john_doe", "user123", "myname"]),
-    "new_name": lambda: random.choice(["john.doe.pro", "real_name", "updated_user"]),
-    "location": lambda: random.choice(["Russia", "China", "Brazil", "Nigeria", "unknown IP"]),
-    "provider": lambda: random.choice(["Google", "Microsoft", "Okta", "Auth0"]),
-    "section": lambda: random.choice(["admin", "billing", "analytics", "settings"]),
-    "name": lambda: random.choice(["Alex", "Jordan", "Sam", "Chris", "Pat"]),
-    "claim": lambda: random.choice(["99.9% uptime", "fastest in class", "unlimited storage", "24/7 support"]),
-    "competitor": lambda: random.choice(["Zendesk", "Freshdesk", "Intercom", "HelpScout"]),
-    "plan": lambda: random.choice(["Pro", "Business", "Enterprise", "Premium"]),
-    "current_plan": lambda: random.choice(["Free", "Basic", "Starter"]),
-    "plan1": lambda: random.choice(["Pro", "Business"]),
-    "plan2": lambda: random.choice(["Enterprise", "Premium"]),
-    "type": lambda: random.choice(["non-profit", "educational", "startup", "government"]),
-    "topic": lambda: random.choice(["automation", "reporting", "API usage", "best practices"]),
-    "element": lambda: random.choice(["dashboards", "templates", "workflows", "notifications"]),
-    "action1": lambda: random.choice(["copy", "paste", "search"]),
-    "action2": lambda: random.choice(["navigate", "filter", "sort"]),
+    "order": lambda rng: str(rng.randint(100000, 999999)),
+    "amount": lambda rng: str(rng.randint(10, 500)),
+    "wrong_amount": lambda rng: str(rng.randint(100, 999)),
+    "plan_cost": lambda rng: str(rng.choice([9, 19, 29, 49, 99])),
+    "days": lambda rng: str(rng.randint(1, 30)),
+    "months": lambda rng: str(rng.randint(1, 24)),
+    "years": lambda rng: str(rng.randint(1, 10)),
+    "hours": lambda rng: str(rng.randint(1, 8)),
+    "minutes": lambda rng: str(rng.randint(5, 60)),
+    "seconds": lambda rng: str(rng.randint(10, 120)),
+    "attempts": lambda rng: str(rng.randint(2, 10)),
+    "times": lambda rng: str(rng.randint(3, 15)),
+    "count": lambda rng: str(rng.randint(100, 10000)),
+    "size": lambda rng: str(rng.choice([5, 10, 25, 50, 100])),
+    "discount": lambda rng: str(rng.choice([10, 15, 20, 25, 30, 50])),
+    "code": lambda rng: rng.choice(["SAVE20", "WELCOME10", "LOYAL50", "NEWYEAR", "FLASH25"]),
+    "month": lambda rng: rng.choice(["January", "February", "March", "April", "May", "June"]),
+    "feature": lambda rng: rng.choice(["reports", "analytics", "notifications", "calendar", "search", "export", "import", "dashboard", "settings"]),
+    "error": lambda rng: f"ERR-{rng.randint(100,999)}",
+    "error_msg": lambda rng: rng.choice(["Something went wrong", "Unexpected error", "Connection timeout", "Invalid request", "Server error 500"]),
+    "action": lambda rng: rng.choice(["save my work", "generate a report", "send notifications", "sync data", "upload files", "export data"]),
+    "button": lambda rng: rng.choice(["Save", "Submit", "Export", "Delete", "Refresh", "Upload"]),
+    "expected": lambda rng: rng.choice(["it should save", "it should redirect", "a confirmation popup", "data refresh"]),
+    "service": lambda rng: rng.choice(["Slack", "Google Drive", "Salesforce", "Jira", "Trello", "Zapier", "HubSpot"]),
+    "date": lambda rng: f"Feb {rng.randint(1,28)}",
+    "device1": lambda rng: rng.choice(["desktop", "laptop", "phone"]),
+    "device2": lambda rng: rng.choice(["tablet", "phone", "laptop"]),
+    "status_code": lambda rng: str(rng.choice([400, 401, 403, 404, 500, 502, 503])),
+    "endpoint": lambda rng: rng.choice(["users", "data", "reports", "settings", "export"]),
+    "format": lambda rng: rng.choice(["CSV", "PDF", "Excel", "JSON"]),
+    "platform": lambda rng: rng.choice(["iOS", "Android"]),
+    "version": lambda rng: f"{rng.randint(1,5)}.{rng.randint(0,9)}.{rng.randint(0,9)}",
+    "old_email": lambda rng: f"old_{rng.randint(1,999)}@email.com",
+    "new_email": lambda rng: f"new_{rng.randint(1,999)}@email.com",
+    "old_name": lambda rng: rng.choice(["john_doe", "user123", "myname"]),
+    "new_name": lambda rng: rng.choice(["john.doe.pro", "real_name", "updated_user"]),
+    "location": lambda rng: rng.choice(["Russia", "China", "Brazil", "Nigeria", "unknown IP"]),
+    "provider": lambda rng: rng.choice(["Google", "Microsoft", "Okta", "Auth0"]),
+    "section": lambda rng: rng.choice(["admin", "billing", "analytics", "settings"]),
+    "name": lambda rng: rng.choice(["Alex", "Jordan", "Sam", "Chris", "Pat"]),
+    "claim": lambda rng: rng.choice(["99.9% uptime", "fastest in class", "unlimited storage", "24/7 support"]),
+    "competitor": lambda rng: rng.choice(["Zendesk", "Freshdesk", "Intercom", "HelpScout"]),
+    "plan": lambda rng: rng.choice(["Pro", "Business", "Enterprise", "Premium"]),
+    "current_plan": lambda rng: rng.choice(["Free", "Basic", "Starter"]),
+    "plan1": lambda rng: rng.choice(["Pro", "Business"]),
+    "plan2": lambda rng: rng.choice(["Enterprise", "Premium"]),
+    "type": lambda rng: rng.choice(["non-profit", "educational", "startup", "government"]),
+    "topic": lambda rng: rng.choice(["automation", "reporting", "API usage", "best practices"]),
+    "element": lambda rng: rng.choice(["dashboards", "templates", "workflows", "notifications"]),
+    "action1": lambda rng: rng.choice(["copy", "paste", "search"]),
+    "action2": lambda rng: rng.choice(["navigate", "filter", "sort"]),
 }
 
 # Tone modifiers for augmentation
@@ -263,33 +280,181 @@ SIGN_OFFS = [
 ]
 
 
-def fill_template(template: str) -> str:
+PLACEHOLDER = re.compile(r'\{(\w+)\}')
+
+# Scalable mode
+SHARD_SIZE = 250_000        # default emails per output shard
+WRITE_BATCH = 10_000        # rows buffered per csv writerows call
+FIELDNAMES = ["email_text", "category", "urgency"]
+
+
+def fill_template(template: str, rng=random) -> str:
     """Replace {placeholder} tokens with random filler values."""
-    import re
     def replacer(match):
         key = match.group(1)
         if key in FILLERS:
-            return FILLERS[key]()
+            return FILLERS[key](rng)
         return match.group(0)
-    return re.sub(r'\{(\w+)\}', replacer, template)
+    return PLACEHOLDER.sub(replacer, template)
 
 
-def generate_email(category: str, urgency: str) -> str:
-    """Generate a single synthetic email."""
+def generate_email(category: str, urgency: str, rng=random) -> str:
+    """Generate a single synthetic email.
+
+    rng is any random.Random; the default module generator keeps
+    random.seed() based callers reproducible.
+    """
     cat_data = CATEGORIES[category]
-    subject = random.choice(cat_data["subjects"])
-    body = fill_template(random.choice(cat_data["bodies"]))
+    subject = rng.choice(cat_data["subjects"])
+    body = fill_template(rng.choice(cat_data["bodies"]), rng)
 
-    prefix = random.choice(URGENCY_PREFIXES[urgency])
-    suffix = random.choice(URGENCY_SUFFIXES[urgency])
-    greeting = random.choice(GREETINGS)
-    sign_off = random.choice(SIGN_OFFS)
+    prefix = rng.choice(URGENCY_PREFIXES[urgency])
+    suffix = rng.choice(URGENCY_SUFFIXES[urgency])
+    greeting = rng.choice(GREETINGS)
+    sign_off = rng.choice(SIGN_OFFS)
 
     email = f"{greeting}{prefix}Subject: {subject}\n\n{body}{suffix}{sign_off}"
     return email
 
 
+# ─── Scalable Sharded Generation ────────────────────────────────────────────
+def parse_mix(spec: str, names) -> dict:
+    """'Name=weight,Name=weight' → {name: weight}; unknown names and bad weights are an error."""
+    mix = {}
+    for part in spec.split(","):
+        name, sep, weight = part.rpartition("=")
+        name = name.strip()
+        if not sep or name not in names:
+            raise ValueError(f"Bad mix entry '{part.strip()}'. Use Name=weight with Name in {list(names)}")
+        try:
+            mix[name] = float(weight)
+        except ValueError:
+            mix[name] = math.nan
+        if not math.isfinite(mix[name]) or mix[name] < 0:
+            raise ValueError(f"Bad mix weight '{part.strip()}'. Weights must be finite, non-negative numbers")
+    if not any(w > 0 for w in mix.values()):
+        raise ValueError(f"Mix '{spec}' has no positive weight")
+    return mix
+
+
+def shard_sizes(count: int, shards: int) -> list:
+    """Split count into shards that differ by at most one email."""
+    return [count // shards + (i < count % shards) for i in range(shards)]
+
+
+def shard_path(output_dir: str, shard: int, shards: int) -> str:
+    return os.path.join(output_dir, f"raw_emails-{shard:05d}-of-{shards:05d}.csv")
+
+
+def generate_shard(job) -> tuple:
+    """Write one shard to its CSV; returns (path, category counts, urgency counts)."""
+    path, shard, size, seed, category_mix, urgency_mix = job
+    # Seeding with a string is stable across runs and Python versions
+    rng = random.Random(f"{seed}:{shard}")
+
+    categories = list(category_mix or CATEGORIES)
+    cat_weights = None if category_mix is None else list(category_mix.values())
+    urgency_choices = {}
+    for category in categories:
+        weights = urgency_mix or URGENCY_RULES[category]
+        urgency_choices[category] = (list(weights), list(weights.values()))
+
+    cat_counts, urg_counts = Counter(), Counter()
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(FIELDNAMES)
+        done = 0
+        while done < size:
+            n = min(WRITE_BATCH, size - done)
+            rows = []
+            for category in rng.choices(categories, weights=cat_weights, k=n):
+                names, weights = urgency_choices[category]
+                urgency = rng.choices(names, weights=weights)[0]
+                rows.append((generate_email(category, urgency, rng), category, urgency))
+                cat_counts[category] += 1
+                urg_counts[urgency] += 1
+            writer.writerows(rows)
+            done += n
+    os.replace(tmp_path, path)
+    return path, cat_counts, urg_counts
+
+
+def generate_sharded(count, output_dir, shards=None, workers=1, seed=42,
+                     category_mix=None, urgency_mix=None):
+    """Generate count emails into shard CSVs under output_dir; returns the counters."""
+    shards = shards or max(1, -(-count // SHARD_SIZE))
+    os.makedirs(output_dir, exist_ok=True)
+    jobs = [
+        (shard_path(output_dir, i, shards), i, size, seed, category_mix, urgency_mix)
+        for i, size in enumerate(shard_sizes(count, shards))
+    ]
+    workers = max(1, min(workers, shards))
+    print(f"🚀 Generating {count:,} emails in {shards} shard(s) with {workers} worker(s) (seed {seed})...")
+
+    cat_counts, urg_counts = Counter(), Counter()
+    start = time.perf_counter()
+
+    def collect(results):
+        for done, (path, cats, urgs) in enumerate(results, 1):
+            cat_counts.update(cats)
+            urg_counts.update(urgs)
+            print(f"   [{done}/{shards}] {path} ({sum(cats.values()):,} emails)")
+
+    if workers == 1:
+        collect(map(generate_shard, jobs))
+    else:
+        import multiprocessing
+        with multiprocessing.Pool(workers) as pool:
+            collect(pool.imap_unordered(generate_shard, jobs))
+
+    elapsed = time.perf_counter() - start
+    print(f"✅ Generated {count:,} emails → {output_dir} in {elapsed:.1f}s ({count / elapsed:,.0f} emails/s)")
+    return cat_counts, urg_counts
+
+
+def print_distribution(cat_counts, urg_counts):
+    print("\n📊 Category Distribution:")
+    for c, n in sorted(cat_counts.items()):
+        print(f"   {c}: {n}")
+    print("\n📊 Urgency Distribution:")
+    for u, n in sorted(urg_counts.items()):
+        print(f"   {u}: {n}")
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic labeled email dataset")
+    parser.add_argument("--count", type=int,
+                        help="Emails to generate in sharded mode (default: the classic ~3,300 email dataset)")
+    parser.add_argument("--seed", type=int, help="Random seed (sharded mode default: 42)")
+    parser.add_argument("--shards", type=int,
+                        help=f"Output files (default: one per {SHARD_SIZE:,} emails)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Processes writing shards (default: all cores)")
+    parser.add_argument("--output-dir", default=os.path.join("data", "synthetic"),
+                        help="Shard directory (default: data/synthetic)")
+    parser.add_argument("--category-mix", help='Category weights, e.g. "Billing Issue=3,Complaint=1" '
+                                               "(default: uniform over all categories)")
+    parser.add_argument("--urgency-mix", help='Urgency weights, e.g. "High=1,Medium=2,Low=2" '
+                                              "(default: per-category URGENCY_RULES)")
+    args = parser.parse_args()
+
+    if args.count is not None:
+        try:
+            category_mix = parse_mix(args.category_mix, CATEGORIES) if args.category_mix else None
+            urgency_mix = parse_mix(args.urgency_mix, URGENCY_PREFIXES) if args.urgency_mix else None
+        except ValueError as e:
+            parser.error(str(e))
+        cat_counts, urg_counts = generate_sharded(
+            args.count, args.output_dir, args.shards, args.workers,
+            42 if args.seed is None else args.seed, category_mix, urgency_mix,
+        )
+        print_distribution(cat_counts, urg_counts)
+        return
+
+    if args.seed is not None:
+        random.seed(args.seed)
+
     os.makedirs("data", exist_ok=True)
     output_path = os.path.join("data", "raw_emails.csv")
 
@@ -311,21 +476,12 @@ def main():
     random.shuffle(emails)
 
     with open(output_path, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=["email_text", "category", "urgency"])
+        writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
         writer.writeheader()
         writer.writerows(emails)
 
     print(f"✅ Generated {len(emails)} emails → {output_path}")
-    # Print distribution
-    from collections import Counter
-    cat_counts = Counter(e["category"] for e in emails)
-    urg_counts = Counter(e["urgency"] for e in emails)
-    print("\n📊 Category Distribution:")
-    for c, n in sorted(cat_counts.items()):
-        print(f"   {c}: {n}")
-    print("\n📊 Urgency Distribution:")
-    for u, n in sorted(urg_counts.items()):
-        print(f"   {u}: {n}")
+    print_distribution(Counter(e["category"] for e in emails), Counter(e["urgency"] for e in emails))
 
 
 if __name__ == "__main__":
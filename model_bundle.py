@@ -0,0 +1,578 @@
+"""
+model_bundle.py — Single-File Model Bundle
+Packs the vectorizer, both models and both label encoders into one file
+that loads by memory-mapping it read-only, so worker processes share the
+same pages instead of each unpickling a private copy.
+
+File layout:
+    magic (8 bytes) | header length (uint64) | JSON header | 64-byte aligned segments
+
+Segments:
+    vocabulary  — newline-joined UTF-8 terms in feature-index order
+                  (absent for hashed features)
+    idf         — idf weights
+    *_coef      — linear model coefficients (classes × features)
+    *_coef_scale — per-class scales of int8 coefficients
+    *_intercept — linear model intercepts
+    *_booster   — XGBoost booster in its native UBJSON format
+
+Reduced precision (--precision float16|int8) stores the linear weights as
+float16, or int8 with a float64 scale per class (*_coef_scale), and idf as
+float32 unless an XGBoost model reads the features. XGBoost trees are
+float32 in every precision.
+
+Usage:
+    python model_bundle.py --export            # models/*.pkl → models/model_bundle.emb
+    python model_bundle.py --verify            # compare bundle vs. pickles
+    python model_bundle.py --export --precision int8 --bundle models/model_bundle.int8.emb
+    python model_bundle.py --precision-report  # size / load / accuracy per precision
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import struct
+import sys
+import time
+
+import numpy as np
+import scipy.sparse as sp
+
+MAGIC = b"EMCLSB01"
+ALIGN = 64
+PRECISIONS = ("float64", "float16", "int8")
+BUNDLE_NAME = "model_bundle.emb"
+
+
+# ─── Export ──────────────────────────────────────────────────────────────────
+def _describe_vectorizer(tfidf, segments, precision="float64"):
+    idf_dtype = np.float64 if precision == "float64" else np.float32
+    if hasattr(tfidf, "steps"):
+        # make_pipeline(HashingVectorizer, TfidfTransformer) from --features hashing
+        hasher, transformer = tfidf[0], tfidf[-1]
+        segments["idf"] = np.asarray(transformer.idf_, dtype=idf_dtype)
+        return {
+            "type": "hashing",
+            "n_features": hasher.n_features,
+            "lowercase": hasher.lowercase,
+            "token_pattern": hasher.token_pattern,
+            "ngram_range": list(hasher.ngram_range),
+            "sublinear_tf": transformer.sublinear_tf,
+            "norm": transformer.norm,
+        }
+
+    terms = tfidf.get_feature_names_out()
+    if any("\n" in term for term in terms):
+        raise ValueError("Vocabulary terms must not contain newlines")
+    segments["vocabulary"] = np.frombuffer("\n".join(terms).encode("utf-8"), dtype=np.uint8)
+    segments["idf"] = np.asarray(tfidf.idf_, dtype=idf_dtype)
+    return {
+        "type": "vocabulary",
+        "n_features": len(terms),
+        "lowercase": tfidf.lowercase,
+        "token_pattern": tfidf.token_pattern,
+        "ngram_range": list(tfidf.ngram_range),
+        "sublinear_tf": tfidf.sublinear_tf,
+        "norm": tfidf.norm,
+    }
+
+
+def _quantize(coef, precision):
+    """(weights, per-class scales or None) for a coefficient matrix."""
+    coef = np.asarray(coef, dtype=np.float64)
+    if precision == "float16":
+        return coef.astype(np.float16), None
+    if precision == "int8":
+        scale = np.abs(coef).max(axis=1) / 127.0
+        scale[scale == 0] = 1.0
+        q = np.clip(np.rint(coef / scale[:, None]), -127, 127).astype(np.int8)
+        return q, scale.astype(np.float64)
+    return np.ascontiguousarray(coef), None
+
+
+def _describe_model(name, model, segments, precision="float64"):
+    if hasattr(model, "get_booster"):
+        # Trees are stored as float32 by XGBoost already, whatever the precision
+        raw = model.get_booster().save_raw("ubj")
+        segments[f"{name}_booster"] = np.frombuffer(bytes(raw), dtype=np.uint8)
+        return {"type": "xgboost", "classes": [int(c) for c in model.classes_]}
+    if hasattr(model, "coef_"):
+        coef, scale = _quantize(model.coef_, precision)
+        segments[f"{name}_coef"] = np.ascontiguousarray(coef)
+        if scale is not None:
+            segments[f"{name}_coef_scale"] = scale
+        segments[f"{name}_intercept"] = np.ascontiguousarray(model.intercept_, dtype=np.float64)
+        return {
+            "type": "linear",
+            "classes": [int(c) for c in model.classes_],
+            # SGDClassifier(loss="log_loss") is always one-vs-rest
+            "ovr": (type(model).__name__ == "SGDClassifier"
+                    or getattr(model, "multi_class", "auto") == "ovr"),
+        }
+    raise TypeError(f"Unsupported model type for bundling: {type(model).__name__}")
+
+
+def export_bundle(tfidf, cat_model, urg_model, cat_encoder, urg_encoder, path,
+                  cat_fast_model=None, cascade=None, precision="float64"):
+    """Write all five model artifacts into a single bundle file.
+
+    cat_fast_model and cascade (the cascade.json settings) are optional and
+    add the linear first stage used by EmailClassifier(cascade=True).
+    precision (see PRECISIONS) shrinks the linear weights and idf.
+    """
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown precision '{precision}'. Use one of {PRECISIONS}")
+    # Tree splits compare features exactly against float32 cut points, so
+    # rounding idf can flip XGBoost decisions; keep it exact for trees
+    has_trees = any(hasattr(m, "get_booster") for m in (cat_model, urg_model, cat_fast_model))
+    segments = {}
+    header = {
+        "format": 1,
+        "precision": precision,
+        "vectorizer": _describe_vectorizer(tfidf, segments, "float64" if has_trees else precision),
+        "category_model": _describe_model("category", cat_model, segments, precision),
+        "urgency_model": _describe_model("urgency", urg_model, segments, precision),
+        "category_labels": [str(c) for c in cat_encoder.classes_],
+        "urgency_labels": [str(c) for c in urg_encoder.classes_],
+    }
+    if cat_fast_model is not None:
+        header["category_fast_model"] = _describe_model("category_fast", cat_fast_model, segments, precision)
+        header["cascade"] = cascade
+
+    version = hashlib.sha256()
+    for name, arr in segments.items():
+        version.update(name.encode("utf-8"))
+        version.update(arr.tobytes())
+    header["model_version"] = version.hexdigest()[:16]
+
+    # Offsets depend on the header length, so lay out twice until stable
+    header["segments"] = {}
+    while True:
+        header_bytes = json.dumps(header, sort_keys=True).encode("utf-8")
+        offset = _align(len(MAGIC) + 8 + len(header_bytes))
+        layout = {}
+        for name, arr in segments.items():
+            layout[name] = {"offset": offset, "dtype": arr.dtype.str, "shape": list(arr.shape)}
+            offset = _align(offset + arr.nbytes)
+        if layout == header["segments"]:
+            break
+        header["segments"] = layout
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", len(header_bytes)))
+        f.write(header_bytes)
+        for name, arr in segments.items():
+            f.seek(layout[name]["offset"])
+            f.write(arr.tobytes())
+    os.replace(tmp_path, path)
+    return header["model_version"]
+
+
+def _align(n):
+    return (n + ALIGN - 1) // ALIGN * ALIGN
+
+
+# ─── Runtime Components ──────────────────────────────────────────────────────
+class BundleVectorizer:
+    """TF-IDF transform over a memory-mapped vocabulary (or hashing) and idf.
+
+    Mirrors sklearn's TfidfVectorizer.transform for the word analyzer, and
+    HashingVectorizer + TfidfTransformer for hashed features.
+    """
+
+    def __init__(self, meta, idf, vocabulary=None):
+        self.lowercase = meta["lowercase"]
+        self.token_re = re.compile(meta["token_pattern"])
+        self.min_n, self.max_n = meta["ngram_range"]
+        self.sublinear_tf = meta["sublinear_tf"]
+        self.norm = meta["norm"]
+        self.idf_ = idf
+        self.hasher = None
+        self.vocabulary_ = None
+        if meta.get("type") == "hashing":
+            from sklearn.feature_extraction.text import HashingVectorizer
+            self.hasher = HashingVectorizer(
+                n_features=meta["n_features"], ngram_range=tuple(meta["ngram_range"]),
+                lowercase=self.lowercase, token_pattern=meta["token_pattern"],
+                alternate_sign=False, norm=None,
+            )
+        else:
+            terms = bytes(vocabulary).decode("utf-8").split("\n") if len(vocabulary) else []
+            self.vocabulary_ = {term: i for i, term in enumerate(terms)}
+
+    def _analyze(self, doc):
+        if self.lowercase:
+            doc = doc.lower()
+        tokens = self.token_re.findall(doc)
+        if self.max_n == 1:
+            return tokens
+        terms = list(tokens) if self.min_n == 1 else []
+        for n in range(max(self.min_n, 2), min(self.max_n, len(tokens)) + 1):
+            terms.extend(" ".join(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+        return terms
+
+    def _count(self, docs):
+        """Term counts as CSR arrays (indptr, indices, data)."""
+        if self.hasher is not None:
+            X = self.hasher.transform(docs)
+            X.sort_indices()
+            return X.indptr.astype(np.int64), X.indices, X.data.astype(np.float64)
+
+        vocab = self.vocabulary_
+        indptr = [0]
+        indices = []
+        counts = []
+        for doc in docs:
+            row = {}
+            for term in self._analyze(doc):
+                j = vocab.get(term)
+                if j is not None:
+                    row[j] = row.get(j, 0) + 1
+            cols = sorted(row)
+            indices.extend(cols)
+            counts.extend(row[j] for j in cols)
+            indptr.append(len(indices))
+        return (
+            np.asarray(indptr, dtype=np.int64),
+            np.asarray(indices, dtype=np.int32),
+            np.asarray(counts, dtype=np.float64),
+        )
+
+    def transform(self, docs):
+        indptr, indices, data = self._count(docs)
+        if self.sublinear_tf:
+            np.log(data, out=data)
+            data += 1
+        data *= self.idf_[indices]
+
+        n_rows = len(indptr) - 1
+        if self.norm in ("l1", "l2") and data.size:
+            row_ids = np.repeat(np.arange(n_rows), np.diff(indptr))
+            if self.norm == "l2":
+                norms = np.sqrt(np.bincount(row_ids, weights=data * data, minlength=n_rows))
+            else:
+                norms = np.bincount(row_ids, weights=np.abs(data), minlength=n_rows)
+            norms[norms == 0] = 1.0
+            data /= norms[row_ids]
+
+        return sp.csr_matrix((data, indices, indptr), shape=(n_rows, len(self.idf_)))
+
+
+class BundleLinearModel:
+    """predict_proba for a (multinomial or one-vs-rest) logistic regression."""
+
+    def __init__(self, meta, coef, intercept, scale=None):
+        self.classes_ = np.asarray(meta["classes"])
+        self.ovr = meta.get("ovr", False)
+        self.coef_ = coef
+        self.intercept_ = intercept
+        self.scale = scale
+
+    def _scores(self, X):
+        if self.coef_.dtype == np.float64:
+            return np.asarray(X @ self.coef_.T, dtype=np.float64)
+        # Reduced precision: widen only the columns the batch touches instead
+        # of materializing a float64 copy of the whole weight matrix
+        X = sp.csr_matrix(X)
+        cols, inverse = np.unique(X.indices, return_inverse=True)
+        weights = self.coef_[:, cols].astype(np.float64)
+        if self.scale is not None:
+            weights *= self.scale[:, None]
+        X_small = sp.csr_matrix((X.data, inverse.ravel(), X.indptr), shape=(X.shape[0], len(cols)))
+        return np.asarray(X_small @ weights.T, dtype=np.float64)
+
+    def predict_proba(self, X):
+        scores = self._scores(X) + self.intercept_
+        if scores.shape[1] == 1:
+            p = 1.0 / (1.0 + np.exp(-scores[:, 0]))
+            return np.column_stack([1.0 - p, p])
+        if self.ovr:
+            p = 1.0 / (1.0 + np.exp(-scores))
+            return p / p.sum(axis=1, keepdims=True)
+        scores -= scores.max(axis=1, keepdims=True)
+        np.exp(scores, out=scores)
+        scores /= scores.sum(axis=1, keepdims=True)
+        return scores
+
+    def predict(self, X):
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+
+class BundleXGBModel:
+    """predict_proba for an XGBoost booster loaded from its native format."""
+
+    def __init__(self, meta, raw):
+        import xgboost as xgb
+        self.classes_ = np.asarray(meta["classes"])
+        self.booster = xgb.Booster()
+        self.booster.load_model(bytearray(raw))
+        # Early-stopped models keep their extra rounds; predict with the best
+        # ones only, like XGBClassifier.predict_proba does
+        best = self.booster.attr("best_iteration")
+        self.iteration_range = (0, int(best) + 1) if best is not None else (0, 0)
+
+    def set_params(self, n_jobs=None, **_):
+        if n_jobs is not None:
+            self.booster.set_param("nthread", n_jobs)
+        return self
+
+    def predict_proba(self, X):
+        proba = self.booster.inplace_predict(X, iteration_range=self.iteration_range)
+        if proba.ndim == 1:  # binary:logistic
+            proba = np.column_stack([1.0 - proba, proba])
+        return proba
+
+    def predict(self, X):
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+
+class BundleEncoder:
+    """Minimal LabelEncoder stand-in backed by the stored class names."""
+
+    def __init__(self, labels):
+        self.classes_ = np.asarray(labels)
+
+    def inverse_transform(self, y):
+        return self.classes_[np.asarray(y, dtype=np.int64)]
+
+    def transform(self, labels):
+        lookup = {label: i for i, label in enumerate(self.classes_)}
+        return np.asarray([lookup[label] for label in labels])
+
+
+class ModelBundle:
+    """A loaded, memory-mapped bundle exposing the five model components
+    (plus the optional cascade first stage)."""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a model bundle")
+            (header_len,) = struct.unpack("<Q", f.read(8))
+            self.header = json.loads(f.read(header_len).decode("utf-8"))
+
+        self.path = path
+        self._buf = np.memmap(path, dtype=np.uint8, mode="r")
+        self.model_version = self.header["model_version"]
+
+        vocabulary = self._segment("vocabulary") if "vocabulary" in self.header["segments"] else None
+        self.tfidf = BundleVectorizer(self.header["vectorizer"], self._segment("idf"), vocabulary)
+        self.cat_model = self._model("category")
+        self.urg_model = self._model("urgency")
+        self.cat_encoder = BundleEncoder(self.header["category_labels"])
+        self.urg_encoder = BundleEncoder(self.header["urgency_labels"])
+        self.cascade = self.header.get("cascade")
+        self.cat_fast_model = self._model("category_fast") if self.cascade else None
+
+    def _segment(self, name):
+        info = self.header["segments"][name]
+        dtype = np.dtype(info["dtype"])
+        count = int(np.prod(info["shape"], dtype=np.int64))
+        start = info["offset"]
+        view = self._buf[start:start + count * dtype.itemsize].view(dtype)
+        return view.reshape(info["shape"])
+
+    def _model(self, name):
+        meta = self.header[f"{name}_model"]
+        if meta["type"] == "xgboost":
+            return BundleXGBModel(meta, self._segment(f"{name}_booster"))
+        scale = self._segment(f"{name}_coef_scale") if f"{name}_coef_scale" in self.header["segments"] else None
+        return BundleLinearModel(meta, self._segment(f"{name}_coef"), self._segment(f"{name}_intercept"), scale)
+
+
+def load_bundle(path):
+    return ModelBundle(path)
+
+
+# ─── CLI ─────────────────────────────────────────────────────────────────────
+def _load_pickles(model_dir):
+    import joblib
+    names = ["tfidf_vectorizer", "category_model", "urgency_model", "category_encoder", "urgency_encoder"]
+    return [joblib.load(os.path.join(model_dir, f"{name}.pkl")) for name in names]
+
+
+def _load_cascade(model_dir):
+    """(category_fast_model, cascade settings), or (None, None) if not trained."""
+    import joblib
+    fast_path = os.path.join(model_dir, "category_fast_model.pkl")
+    config_path = os.path.join(model_dir, "cascade.json")
+    if not (os.path.exists(fast_path) and os.path.exists(config_path)):
+        return None, None
+    with open(config_path, "r", encoding="utf-8") as f:
+        return joblib.load(fast_path), json.load(f)
+
+
+def _weight_bytes(bundle):
+    """Bytes of idf + linear weights (the part precision changes)."""
+    return sum(
+        bundle._segment(name).nbytes for name in bundle.header["segments"]
+        if name == "idf" or name.endswith(("_coef", "_coef_scale", "_intercept"))
+    )
+
+
+def compare_bundle(model_dir, bundle_path, samples):
+    """Compare a bundle's features and probabilities with the .pkl models.
+
+    Returns {"precision", "samples", "pickle_ms", "bundle_ms", "feature_diff",
+    "models": {name: (max proba diff, label agreement)}}; the cascade model
+    is included when both sides have one.
+    """
+    from text_processing import build_corpus, clean_text
+
+    start = time.perf_counter()
+    tfidf, cat_model, urg_model, _, _ = _load_pickles(model_dir)
+    pickle_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    bundle = load_bundle(bundle_path)
+    bundle_ms = (time.perf_counter() - start) * 1000
+
+    cleaned = [clean_text(text) for text in build_corpus(samples)]
+    X_ref = tfidf.transform(cleaned)
+    X_new = bundle.tfidf.transform(cleaned)
+
+    pairs = [("category", cat_model, bundle.cat_model), ("urgency", urg_model, bundle.urg_model)]
+    fast_model, _ = _load_cascade(model_dir)
+    if fast_model is not None and bundle.cat_fast_model is not None:
+        pairs.append(("cascade", fast_model, bundle.cat_fast_model))
+    models = {}
+    for name, ref_model, new_model in pairs:
+        ref = ref_model.predict_proba(X_ref)
+        new = new_model.predict_proba(X_new)
+        models[name] = (float(np.abs(ref - new).max()), float((ref.argmax(axis=1) == new.argmax(axis=1)).mean()))
+    return {
+        "precision": bundle.header.get("precision", "float64"),
+        "samples": len(cleaned),
+        "pickle_ms": pickle_ms,
+        "bundle_ms": bundle_ms,
+        "feature_diff": float(abs(X_ref - X_new).max()) if X_ref.nnz else 0.0,
+        "models": models,
+    }
+
+
+def precision_report(model_dir, data_path, samples):
+    """Size, load time and accuracy delta of each precision vs. float64."""
+    import tempfile
+    from text_processing import build_corpus, clean_text
+
+    artifacts = _load_pickles(model_dir)
+    fast_model, cascade = _load_cascade(model_dir)
+    if os.path.exists(data_path):
+        import csv
+        with open(data_path, "r", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+        texts = [row["email_text"] for row in rows]
+        labels = {"category": [row["category"] for row in rows], "urgency": [row["urgency"] for row in rows]}
+        source = f"{len(texts)} labeled emails from {data_path}"
+    else:
+        texts = [clean_text(text) for text in build_corpus(samples)]
+        labels = None
+        source = f"{len(texts)} generated emails (no labels: agreement only)"
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for precision in PRECISIONS:
+            path = os.path.join(tmp, f"{precision}.emb")
+            export_bundle(*artifacts, path, fast_model, cascade, precision)
+            start = time.perf_counter()
+            bundle = load_bundle(path)
+            load_ms = (time.perf_counter() - start) * 1000
+            X = bundle.tfidf.transform(texts)
+            result = {"size_mb": os.path.getsize(path) / 1e6, "weights_mb": _weight_bytes(bundle) / 1e6,
+                      "load_ms": load_ms}
+            for name, model, encoder in [("category", bundle.cat_model, bundle.cat_encoder),
+                                         ("urgency", bundle.urg_model, bundle.urg_encoder)]:
+                proba = model.predict_proba(X)
+                result[f"{name}_proba"] = proba
+                if labels is not None:
+                    predicted = encoder.inverse_transform(model.classes_[proba.argmax(axis=1)])
+                    result[f"{name}_acc"] = float(np.mean(predicted == np.asarray(labels[name])))
+            results[precision] = result
+            del bundle, X  # release the memory map before the temp dir goes away
+
+    base = results["float64"]
+    print(f"🔍 Precision report over {source}\n")
+    header = (f"{'precision':<10}{'file MB':>9}{'weights MB':>12}{'load ms':>9}"
+              f"{'cat agree':>11}{'urg agree':>11}{'max Δp':>10}")
+    if labels is not None:
+        header += f"{'cat acc':>9}{'Δ':>8}{'urg acc':>9}{'Δ':>8}"
+    print(header)
+    print("-" * len(header))
+    for precision, r in results.items():
+        agree = {
+            name: float((r[f"{name}_proba"].argmax(axis=1) == base[f"{name}_proba"].argmax(axis=1)).mean())
+            for name in ("category", "urgency")
+        }
+        max_diff = max(float(np.abs(r[f"{n}_proba"] - base[f"{n}_proba"]).max()) for n in ("category", "urgency"))
+        line = (f"{precision:<10}{r['size_mb']:>9.2f}{r['weights_mb']:>12.3f}{r['load_ms']:>9.1f}"
+                f"{agree['category']:>11.2%}{agree['urgency']:>11.2%}{max_diff:>10.1e}")
+        if labels is not None:
+            line += (f"{r['category_acc']:>9.4f}{r['category_acc'] - base['category_acc']:>+8.4f}"
+                     f"{r['urgency_acc']:>9.4f}{r['urgency_acc'] - base['urgency_acc']:>+8.4f}")
+        print(line)
+    print("\nXGBoost trees are float32 in every precision; only linear weights (and idf, "
+          "when no XGBoost model reads the features) shrink.")
+
+
+def main():
+    from classifier import MODEL_DIR
+
+    parser = argparse.ArgumentParser(description="Export or verify the single-file model bundle")
+    parser.add_argument("--export", action="store_true", help="Build the bundle from the .pkl models")
+    parser.add_argument("--verify", action="store_true", help="Compare bundle predictions with the .pkl models")
+    parser.add_argument("--model-dir", default=MODEL_DIR, help="Directory with the .pkl models")
+    parser.add_argument("--bundle", help=f"Bundle path (default: <model-dir>/{BUNDLE_NAME})")
+    parser.add_argument("--samples", type=int, default=2000, help="Generated emails for --verify (default: 2000)")
+    parser.add_argument("--precision", choices=PRECISIONS, default="float64",
+                        help="Linear weight / idf precision for --export (default: float64)")
+    parser.add_argument("--min-agreement", type=float, default=0.99,
+                        help="Label agreement a reduced-precision bundle needs to pass --verify (default: 0.99)")
+    parser.add_argument("--precision-report", action="store_true",
+                        help="Compare size, load time and accuracy of every precision")
+    parser.add_argument("--data", default=os.path.join("data", "cleaned_emails.csv"),
+                        help="Labeled cleaned CSV for --precision-report accuracy (default: data/cleaned_emails.csv)")
+    args = parser.parse_args()
+
+    if not (args.export or args.verify or args.precision_report):
+        parser.print_help()
+        return
+
+    bundle_path = args.bundle or os.path.join(args.model_dir, BUNDLE_NAME)
+
+    if args.export:
+        fast_model, cascade = _load_cascade(args.model_dir)
+        version = export_bundle(*_load_pickles(args.model_dir), bundle_path, fast_model, cascade, args.precision)
+        size_mb = os.path.getsize(bundle_path) / 1e6
+        print(f"✅ Bundle written → {bundle_path} ({size_mb:.2f} MB, {args.precision}, version {version})")
+
+    if args.precision_report:
+        precision_report(args.model_dir, args.data, args.samples)
+
+    if args.verify:
+        report = compare_bundle(args.model_dir, bundle_path, args.samples)
+        precision = report["precision"]
+        reduced = precision != "float64"
+        ok = report["feature_diff"] < (1e-5 if reduced else 1e-9)
+        print(f"🔍 Verifying {precision} bundle over {report['samples']} emails")
+        print(f"   Load time: pickles {report['pickle_ms']:.0f} ms | bundle {report['bundle_ms']:.0f} ms")
+        print(f"   Max feature difference: {report['feature_diff']:.2e}")
+        for name, (proba_diff, agree) in report["models"].items():
+            if reduced:
+                ok = ok and agree >= args.min_agreement
+            else:
+                ok = ok and proba_diff < 1e-5 and agree == 1.0
+            print(f"   {name:<9} max proba diff {proba_diff:.2e} | label agreement {agree:.2%}")
+
+        if not ok:
+            print("❌ Bundle does not match the pickled models")
+            sys.exit(1)
+        if reduced:
+            print(f"✅ {precision} bundle agrees with the pickled models (≥ {args.min_agreement:.0%} labels)")
+        else:
+            print("✅ Bundle matches the pickled models")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+prediction_cache.py — Content-Hash Prediction Cache
+Caches classification results keyed by a hash of the cleaned text and the
+model version, so repeated newsletters, notifications and spam skip model
+evaluation entirely.
+
+Two tiers:
+    memory — bounded LRU (always on)
+    disk   — optional SQLite file that survives restarts
+
+Usage:
+    cache = PredictionCache(max_entries=50_000, db_path="data/predictions.db")
+    clf = EmailClassifier(cache=cache)
+    clf.predict_batch(texts)
+    print(cache.stats())
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+
+
+class PredictionCache:
+    """Two-tier (LRU memory + optional SQLite) cache of prediction dicts."""
+
+    def __init__(self, max_entries=10_000, db_path=None):
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.max_entries = max_entries
+        self.db_path = db_path
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS predictions (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+            )
+            self._db.commit()
+
+    @staticmethod
+    def make_key(cleaned_text: str, model_version: str) -> str:
+        """Cache key for a cleaned email under a given model version."""
+        h = hashlib.sha256(model_version.encode("utf-8"))
+        h.update(b"\0")
+        h.update(cleaned_text.encode("utf-8"))
+        return h.hexdigest()
+
+    def get_many(self, keys):
+        """Return cached values for keys, with None for misses."""
+        with self._lock:
+            results = [None] * len(keys)
+            disk_lookup = []
+            for i, key in enumerate(keys):
+                value = self._memory.get(key)
+                if value is not None:
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    results[i] = dict(value)
+                else:
+                    disk_lookup.append(i)
+
+            if disk_lookup and self._db is not None:
+                wanted = list({keys[i] for i in disk_lookup})
+                found = {}
+                # Stay under SQLite's bound-parameter limit
+                for start in range(0, len(wanted), 500):
+                    part = wanted[start:start + 500]
+                    rows = self._db.execute(
+                        f"SELECT key, value FROM predictions WHERE key IN ({','.join('?' * len(part))})",
+                        part,
+                    ).fetchall()
+                    found.update((key, json.loads(value)) for key, value in rows)
+                for key, value in found.items():
+                    self._remember(key, value)
+                still_missing = []
+                for i in disk_lookup:
+                    value = found.get(keys[i])
+                    if value is not None:
+                        self.disk_hits += 1
+                        results[i] = dict(value)
+                    else:
+                        still_missing.append(i)
+                disk_lookup = still_missing
+
+            self.misses += len(disk_lookup)
+            return results
+
+    def get(self, key):
+        return self.get_many([key])[0]
+
+    def put_many(self, items):
+        """Store (key, value) pairs in both tiers."""
+        items = [(key, dict(value)) for key, value in items]
+        with self._lock:
+            for key, value in items:
+                self._remember(key, value)
+            if self._db is not None and items:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO predictions (key, value) VALUES (?, ?)",
+                    [(key, json.dumps(value)) for key, value in items],
+                )
+                self._db.commit()
+
+    def put(self, key, value):
+        self.put_many([(key, value)])
+
+    def _remember(self, key, value):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        """Hit/miss/eviction counters and tier sizes."""
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            stats = {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "max_entries": self.max_entries,
+            }
+            if self._db is not None:
+                stats["disk_entries"] = self._db.execute("SELECT COUNT(*) FROM predictions").fetchone()[0]
+            return stats
+
+    def clear(self):
+        """Drop every cached entry (both tiers); counters are kept."""
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM predictions")
+                self._db.commit()
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
@@ -1,76 +1,122 @@
 """
 preprocess.py — Text Cleaning Pipeline
 Cleans raw emails: removes HTML, lowercases, removes stopwords, lemmatizes.
+
+Rows are read and written in chunks, so memory stays flat for any input
+size. With --workers N the chunks are cleaned in a process pool and
+written back in input order.
+
+Usage:
+    python preprocess.py
+    python preprocess.py --workers 4 --chunk-size 5000
 """
+import argparse
 import csv
 import os
-import re
-import string
-
-import nltk
-from nltk.corpus import stopwords
-from nltk.stem import WordNetLemmatizer
-
-# Download NLTK data (safe to call multiple times)
-for resource in ["stopwords", "wordnet", "punkt_tab"]:
-    nltk.download(resource, quiet=True)
-
-STOP_WORDS = set(stopwords.words("english"))
-LEMMATIZER = WordNetLemmatizer()
-
-
-def clean_text(text: str) -> str:
-    """Full cleaning pipeline for a single email text."""
-    # Remove HTML tags
-    text = re.sub(r"<[^>]+>", " ", text)
-    # Remove URLs
-    text = re.sub(r"https?://\S+|www\.\S+", " ", text)
-    # Remove email addresses
-    text = re.sub(r"\S+@\S+\.\S+", " ", text)
-    # Remove special characters and digits (keep letters and spaces)
-    text = re.sub(r"[^a-zA-Z\s]", " ", text)
-    # Lowercase
-    text = text.lower()
-    # Tokenize
-    tokens = text.split()
-    # Remove stopwords and lemmatize
-    tokens = [
-        LEMMATIZER.lemmatize(word)
-        for word in tokens
-        if word not in STOP_WORDS and len(word) > 2
-    ]
-    return " ".join(tokens)
+import sys
+import time
+from collections import deque
+
+from text_processing import clean_text
+
+FIELDS = ["email_text", "category", "urgency"]
+
+# Email bodies can be far longer than the csv module's default field limit
+csv.field_size_limit(min(sys.maxsize, 2**31 - 1))
+
+
+def iter_chunks(reader, chunk_size):
+    """Yield lists of (email_text, category, urgency) tuples."""
+    chunk = []
+    for row in reader:
+        chunk.append((row["email_text"], row["category"], row["urgency"]))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def clean_chunk(chunk):
+    """Clean one chunk; rows whose text cleans to nothing are dropped."""
+    cleaned = []
+    for text, category, urgency in chunk:
+        cleaned_text = clean_text(text)
+        if cleaned_text.strip():  # Skip empty results
+            cleaned.append({"email_text": cleaned_text, "category": category, "urgency": urgency})
+    return len(chunk), cleaned
+
+
+def clean_stream(chunks, workers=1):
+    """Yield (rows_read, cleaned_rows) per chunk, in input order.
+
+    With workers > 1, at most two chunks per worker are in flight, so
+    memory stays bounded however far the readers get ahead of the writer.
+    """
+    if workers <= 1:
+        for chunk in chunks:
+            yield clean_chunk(chunk)
+        return
+
+    import multiprocessing
+    with multiprocessing.Pool(workers) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.apply_async(clean_chunk, (chunk,)))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().get()
+        while pending:
+            yield pending.popleft().get()
 
 
 def main():
-    input_path = os.path.join("data", "raw_emails.csv")
-    output_path = os.path.join("data", "cleaned_emails.csv")
+    parser = argparse.ArgumentParser(description="Clean raw emails for training")
+    parser.add_argument("--input", default=os.path.join("data", "raw_emails.csv"),
+                        help="Raw CSV (default: data/raw_emails.csv)")
+    parser.add_argument("--output", default=os.path.join("data", "cleaned_emails.csv"),
+                        help="Cleaned CSV (default: data/cleaned_emails.csv)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help=f"Worker processes (default: 1, this machine has {os.cpu_count()} cores)")
+    parser.add_argument("--chunk-size", type=int, default=2000, help="Emails per chunk (default: 2000)")
+    args = parser.parse_args()
 
-    if not os.path.exists(input_path):
-        print(f"❌ {input_path} not found. Run generate_dataset.py first.")
+    if not os.path.exists(args.input):
+        print(f"❌ {args.input} not found. Run generate_dataset.py first.")
         return
+    if args.chunk_size < 1:
+        print("❌ --chunk-size must be at least 1")
+        sys.exit(1)
 
-    cleaned = []
-    with open(input_path, "r", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            cleaned_text = clean_text(row["email_text"])
-            if cleaned_text.strip():  # Skip empty results
-                cleaned.append({
-                    "email_text": cleaned_text,
-                    "category": row["category"],
-                    "urgency": row["urgency"],
-                })
-
-    with open(output_path, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=["email_text", "category", "urgency"])
+    print(f"📂 Cleaning {args.input} (chunk size {args.chunk_size}, {args.workers} worker(s))")
+    start = time.perf_counter()
+    read = written = 0
+    size_mb = os.path.getsize(args.input) / 1e6
+    sample = []
+
+    with open(args.input, "r", encoding="utf-8", newline="") as fin, \
+            open(args.output, "w", newline="", encoding="utf-8") as fout:
+        writer = csv.DictWriter(fout, fieldnames=FIELDS)
         writer.writeheader()
-        writer.writerows(cleaned)
+        chunks = iter_chunks(csv.DictReader(fin), args.chunk_size)
+        for n_read, cleaned in clean_stream(chunks, args.workers):
+            writer.writerows(cleaned)
+            read += n_read
+            written += len(cleaned)
+            sample.extend(cleaned[:3 - len(sample)])
+
+            elapsed = time.perf_counter() - start
+            done_mb = fin.buffer.tell() / 1e6  # text-mode tell() is unavailable mid-iteration
+            print(f"   ⏳ {read:,} emails ({read / elapsed:,.0f}/s, "
+                  f"{done_mb:.1f}/{size_mb:.1f} MB read)", flush=True)
 
-    print(f"✅ Cleaned {len(cleaned)} emails → {output_path}")
+    elapsed = time.perf_counter() - start
+    print(f"✅ Cleaned {written} emails → {args.output}")
+    print(f"⏱ {read:,} emails in {elapsed:.1f}s ({read / max(elapsed, 1e-9):,.0f} emails/s)")
+    if read > written:
+        print(f"   Skipped {read - written} emails with no text left after cleaning")
     # Show sample
     print("\n📝 Sample cleaned text:")
-    for item in cleaned[:3]:
+    for item in sample:
         print(f"   [{item['category']} | {item['urgency']}] {item['email_text'][:80]}...")
 
 
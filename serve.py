@@ -0,0 +1,336 @@
+"""
+serve.py — Local HTTP Inference Service
+Lightweight asyncio HTTP/1.1 server around EmailClassifier (standard library
+only). Concurrent requests are queued into micro-batches and classified with
+one predict_batch call, bounded by a max batch size and a max wait time.
+
+Endpoints:
+    POST /classify   {"text": "..."}          → {"category": ..., "urgency": ..., ...}
+                     {"texts": ["...", ...]}  → {"results": [...]}
+    GET  /health     → {"status": "ok", "model_version": ...}
+    GET  /stats      → batching (and cache) counters, per-stage timings with --stage-metrics
+
+Usage:
+    python serve.py --port 8000 --max-batch-size 64 --max-wait-ms 5
+    curl -s localhost:8000/classify -d '{"text": "I was charged twice"}'
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+MAX_BODY_BYTES = 10 * 1024 * 1024
+REASONS = {
+    200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+    411: "Length Required", 413: "Payload Too Large", 500: "Internal Server Error",
+}
+
+log = logging.getLogger("serve")
+
+
+class MicroBatcher:
+    """Collects texts from concurrent callers into batches for predict_batch.
+
+    A batch is dispatched as soon as it holds max_batch_size texts, or
+    max_wait_ms after its first text arrived, whichever comes first. Model
+    calls run one at a time on a worker thread, off the event loop. If a
+    model call fails, every caller waiting on that batch gets the exception.
+    """
+
+    def __init__(self, predict_batch, max_batch_size=64, max_wait_ms=5.0):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        self.predict_batch = predict_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = None
+        self._task = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="predict")
+
+        self.batches = 0
+        self.failed_batches = 0
+        self.texts = 0
+        self.largest_batch = 0
+        self.model_seconds = 0.0
+
+    def start(self):
+        self._queue = asyncio.Queue()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        # Texts still queued will never be batched now
+        while self._queue is not None and not self._queue.empty():
+            _fail([self._queue.get_nowait()], RuntimeError("server is shutting down"))
+        self._executor.shutdown(wait=True)
+
+    async def classify(self, texts):
+        """Queue texts and wait for their results (same order).
+
+        Raises the model's exception if any of the texts' batches failed.
+        """
+        loop = asyncio.get_running_loop()
+        futures = []
+        for text in texts:
+            future = loop.create_future()
+            self._queue.put_nowait((text, future))
+            futures.append(future)
+        # Collect every outcome so no failed future goes unretrieved
+        results = await asyncio.gather(*futures, return_exceptions=True)
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        return results
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            batch = [(text, future) for text, future in batch if not future.done()]
+            if not batch:
+                continue
+
+            start = time.perf_counter()
+            try:
+                results = await loop.run_in_executor(
+                    self._executor, self.predict_batch, [text for text, _ in batch]
+                )
+                if len(results) != len(batch):
+                    raise RuntimeError(f"predict_batch returned {len(results)} results for {len(batch)} texts")
+            except asyncio.CancelledError:
+                _fail(batch, RuntimeError("server is shutting down"))
+                raise
+            except Exception as e:
+                self.failed_batches += 1
+                _fail(batch, e)
+                continue
+            finally:
+                self.model_seconds += time.perf_counter() - start
+
+            self.batches += 1
+            self.texts += len(batch)
+            self.largest_batch = max(self.largest_batch, len(batch))
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "failed_batches": self.failed_batches,
+            "texts": self.texts,
+            "avg_batch_size": round(self.texts / self.batches, 2) if self.batches else 0.0,
+            "largest_batch": self.largest_batch,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "model_seconds": round(self.model_seconds, 4),
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+        }
+
+
+def _fail(batch, exc):
+    """Set exc on every still-pending future of (text, future) pairs."""
+    for _, future in batch:
+        if not future.done():
+            future.set_exception(exc)
+
+
+class InferenceServer:
+    """Minimal HTTP/1.1 front end (keep-alive, Content-Length bodies)."""
+
+    def __init__(self, classifier, batcher):
+        self.classifier = classifier
+        self.batcher = batcher
+        self.requests = 0
+        self.errors = 0
+        self.started = time.time()
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    await self._respond(writer, 400, {"error": "malformed request line"}, False)
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                connection = headers.get("connection", "").lower()
+                keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+
+                if "chunked" in headers.get("transfer-encoding", "").lower():
+                    await self._respond(writer, 411, {"error": "send a Content-Length body"}, False)
+                    break
+                try:
+                    length = int(headers.get("content-length") or 0)
+                except ValueError:
+                    await self._respond(writer, 400, {"error": "invalid Content-Length"}, False)
+                    break
+                if length > MAX_BODY_BYTES:
+                    await self._respond(writer, 413, {"error": "request body too large"}, False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                path = target.split("?", 1)[0]
+                try:
+                    status, payload = await self.dispatch(method, path, body)
+                except Exception as e:
+                    # Model, cache or bundle failures: answer instead of dropping the socket
+                    log.exception("%s %s failed", method, path)
+                    self.errors += 1
+                    status, payload = 500, {"error": f"internal server error: {type(e).__name__}"}
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def dispatch(self, method, path, body):
+        self.requests += 1
+        if path == "/classify":
+            if method != "POST":
+                return 405, {"error": "use POST"}
+            return await self._classify(body)
+        if path == "/health":
+            return 200, {"status": "ok", "model_version": self.classifier.model_version}
+        if path == "/stats":
+            stats = {
+                "requests": self.requests,
+                "errors": self.errors,
+                "uptime_seconds": round(time.time() - self.started, 1),
+                "batching": self.batcher.stats(),
+            }
+            if self.classifier.cache is not None:
+                stats["cache"] = self.classifier.cache.stats()
+            if self.classifier.cascade:
+                stats["cascade"] = dict(self.classifier.cascade_stats, threshold=self.classifier.cascade_threshold)
+            if self.classifier.metrics is not None:
+                stats["stages"] = self.classifier.metrics.snapshot()
+            return 200, stats
+        return 404, {"error": f"no route for {path}"}
+
+    async def _classify(self, body):
+        try:
+            payload = json.loads(body or b"{}")
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            return 400, {"error": "body must be JSON"}
+        if not isinstance(payload, dict):
+            return 400, {"error": "body must be a JSON object"}
+
+        if isinstance(payload.get("text"), str):
+            results = await self.batcher.classify([payload["text"]])
+            return 200, results[0]
+        texts = payload.get("texts")
+        if isinstance(texts, list) and all(isinstance(t, str) for t in texts):
+            return 200, {"results": await self.batcher.classify(texts)}
+        return 400, {"error": 'expected {"text": str} or {"texts": [str, ...]}'}
+
+    @staticmethod
+    async def _respond(writer, status, payload, keep_alive):
+        body = json.dumps(payload).encode("utf-8")
+        head = (
+            f"HTTP/1.1 {status} {REASONS.get(status, 'Error')}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+
+async def serve(classifier, host, port, max_batch_size, max_wait_ms):
+    batcher = MicroBatcher(classifier.predict_batch, max_batch_size, max_wait_ms)
+    batcher.start()
+    server = InferenceServer(classifier, batcher)
+    listener = await asyncio.start_server(server.handle_connection, host, port)
+    print(f"🚀 Serving on http://{host}:{port} "
+          f"(max batch {max_batch_size}, max wait {max_wait_ms} ms)")
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        await batcher.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local HTTP inference service with micro-batching")
+    parser.add_argument("--host", default="127.0.0.1", help="Bind address (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8000, help="Port (default: 8000)")
+    parser.add_argument("--max-batch-size", type=int, default=64, help="Max texts per model call (default: 64)")
+    parser.add_argument("--max-wait-ms", type=float, default=5.0,
+                        help="Max time a text waits for its batch to fill (default: 5)")
+    parser.add_argument("--bundle", help="Load models from a single-file bundle (see model_bundle.py)")
+    parser.add_argument("--cascade", action="store_true",
+                        help="Linear category model first, XGBoost only for low-confidence emails")
+    parser.add_argument("--compiled", action="store_true",
+                        help="Score single-email batches' urgency with the compiled scorer (compiled_scorer.py)")
+    parser.add_argument("--stage-metrics", action="store_true",
+                        help="Time each prediction stage and report it under /stats")
+    parser.add_argument("--cache-size", type=int, default=0, help="In-memory prediction cache entries (default: off)")
+    parser.add_argument("--cache-db", help="SQLite file for a persistent prediction cache (needs --cache-size)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    from classifier import EmailClassifier
+    from prediction_cache import PredictionCache
+    from stage_metrics import StageMetrics
+
+    if args.bundle and not os.path.exists(args.bundle):
+        print(f"❌ Model bundle not found: {args.bundle}")
+        print("   Export one with: python model_bundle.py --export")
+        sys.exit(1)
+    cache = PredictionCache(args.cache_size, args.cache_db) if args.cache_size > 0 else None
+    try:
+        classifier = EmailClassifier(cache=cache, bundle_path=args.bundle, cascade=args.cascade,
+                                     metrics=StageMetrics() if args.stage_metrics else None,
+                                     compiled=args.compiled)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"❌ {e}")
+        if isinstance(e, FileNotFoundError) and "train_model.py" not in str(e):
+            print("   Retrain with train_model.py to create the missing model files.")
+        sys.exit(1)
+    # Load the lemmatizer data now rather than on the first request
+    classifier.predict("warm up")
+
+    try:
+        asyncio.run(serve(classifier, args.host, args.port, args.max_batch_size, args.max_wait_ms))
+    except KeyboardInterrupt:
+        print("\n👋 Server stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+startup_timings.py — Cold-Start Timing Report
+Measures, in a fresh process, how long it takes to import the classifier,
+load the models and serve the first (and a warm) prediction.
+
+Usage:
+    python startup_timings.py
+    python startup_timings.py --bundle models/model_bundle.emb --json
+    EMAIL_CLASSIFIER_OFFLINE=1 python startup_timings.py
+"""
+import argparse
+import json
+import sys
+import time
+
+SAMPLE_EMAIL = (
+    "Subject: Payment failed\n\nI was charged twice for my last order. "
+    "Please issue a refund immediately."
+)
+
+
+def measure(bundle=None):
+    """Return {phase: seconds} for one cold start in this process."""
+    timings = {}
+
+    start = time.perf_counter()
+    import text_processing  # noqa: F401
+    timings["import_text_processing"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    from classifier import EmailClassifier
+    timings["import_classifier"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    clf = EmailClassifier(bundle_path=bundle)
+    timings["load_models"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    clf.predict(SAMPLE_EMAIL)
+    timings["first_prediction"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    clf.predict(SAMPLE_EMAIL)
+    timings["warm_prediction"] = time.perf_counter() - start
+
+    timings["total_cold_start"] = sum(
+        timings[k] for k in ("import_text_processing", "import_classifier", "load_models", "first_prediction")
+    )
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report import and first-prediction timings")
+    parser.add_argument("--bundle", help="Load models from a single-file bundle")
+    parser.add_argument("--json", action="store_true", help="Print the timings as JSON")
+    args = parser.parse_args()
+
+    if "classifier" in sys.modules:
+        print("⚠ classifier already imported; import timings will be meaningless")
+
+    timings = measure(args.bundle)
+
+    if args.json:
+        print(json.dumps({k: round(v, 6) for k, v in timings.items()}, indent=2))
+        return
+
+    print("⏱ Cold-start timings")
+    for phase, seconds in timings.items():
+        print(f"   {phase:<24} {seconds * 1000:>10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+"""
+sweep.py — Parallel Hyperparameter Sweep
+Grid or random search over vectorizer and model settings. Features are
+built once per vectorizer config (and reused from the feature cache of
+train_model.py), then every model config for them is trained in a
+process pool. Results are ranked by accuracy per target; ★ marks the
+accuracy/latency Pareto front.
+
+Spec (JSON; every value is a list of candidates):
+    {
+      "search": "grid",                  # or "random" (with "n_iter", "seed")
+      "vectorizer": {"features": ["tfidf"], "max_features": [2000, 5000],
+                     "ngram_range": [[1, 1], [1, 2]]},
+      "models": [
+        {"target": "category", "model": "xgboost", "max_depth": [4, 6], "n_estimators": [100, 200]},
+        {"target": "category", "model": "logreg", "C": [1, 10]},
+        {"target": "urgency",  "model": "logreg", "C": [1, 10]}
+      ]
+    }
+"features" is "tfidf" (vocabulary capped by "max_features") or "hashing"
+(sized by "n_features"; a "max_features" value is used as n_features).
+
+Usage:
+    python sweep.py                                  # built-in spec above
+    python sweep.py --spec sweep.json --workers 4 --output sweep_results.csv
+    python sweep.py --search random --n-iter 8
+"""
+import argparse
+import csv
+import io
+import itertools
+import json
+import os
+import sys
+import time
+
+import joblib
+import numpy as np
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score
+from sklearn.model_selection import ParameterGrid, ParameterSampler
+
+from feature_cache import FEATURE_CACHE_DIR
+from train_model import HAS_XGBOOST, build_vectorizer, load_data, vectorize
+
+DEFAULT_SPEC = {
+    "search": "grid",
+    "n_iter": 10,
+    "seed": 42,
+    "vectorizer": {"features": ["tfidf"], "max_features": [2000, 5000], "ngram_range": [[1, 1], [1, 2]]},
+    "models": [
+        {"target": "category", "model": "xgboost", "max_depth": [4, 6], "n_estimators": [100, 200]},
+        {"target": "category", "model": "logreg", "C": [1, 10]},
+        {"target": "urgency", "model": "logreg", "C": [1, 10]},
+    ],
+}
+LATENCY_SAMPLES = 200
+TARGETS = {"category": ("yc_train", "yc_test"), "urgency": ("yu_train", "yu_test")}
+
+
+# ─── Spec Expansion ─────────────────────────────────────────────────────────
+def expand(grid, search, n_iter, seed):
+    """List of param dicts: the full grid, or up to n_iter random draws from it."""
+    grid = {k: v if isinstance(v, list) else [v] for k, v in grid.items()}
+    if search == "random":
+        size = len(ParameterGrid(grid))
+        return list(ParameterSampler(grid, n_iter=min(n_iter, size), random_state=seed))
+    return list(ParameterGrid(grid))
+
+
+def vectorizer_configs(spec, search, n_iter, seed):
+    """build_vectorizer kwargs per config. Hashing has no vocabulary to cap,
+    so a max_features value is its n_features; giving both is an error."""
+    configs = []
+    for params in expand(spec["vectorizer"], search, n_iter, seed):
+        if params.get("features", "tfidf") == "hashing":
+            if "max_features" in params:
+                if "n_features" in params:
+                    raise ValueError("Hashing vectorizers take n_features or max_features, not both")
+                params["n_features"] = params.pop("max_features")
+        elif "n_features" in params:
+            raise ValueError("n_features only applies to \"features\": \"hashing\"; use max_features")
+        configs.append(params)
+    return configs
+
+
+def model_configs(spec, search, n_iter, seed):
+    configs = []
+    for entry in spec["models"]:
+        entry = dict(entry)
+        target, model = entry.pop("target"), entry.pop("model")
+        if target not in TARGETS:
+            raise ValueError(f"Unknown target '{target}'. Use one of {sorted(TARGETS)}")
+        if model == "xgboost" and not HAS_XGBOOST:
+            print("⚠ XGBoost not installed, skipping xgboost configs")
+            continue
+        configs += [(target, model, params) for params in expand(entry, search, n_iter, seed)]
+    return configs
+
+
+def describe(params):
+    """Compact 'key=value' label for a param dict."""
+    return " ".join(f"{k}={json.dumps(v)}" for k, v in sorted(params.items())) or "defaults"
+
+
+def build_model(model, params, n_jobs):
+    if model == "xgboost":
+        from xgboost import XGBClassifier
+        settings = {"n_estimators": 200, "max_depth": 6, "learning_rate": 0.1}
+        settings.update(params)
+        return XGBClassifier(tree_method="hist", n_jobs=n_jobs, eval_metric="mlogloss",
+                             random_state=42, verbosity=0, **settings)
+    if model == "logreg":
+        settings = {"C": 10, "max_iter": 1000}
+        settings.update(params)
+        return LogisticRegression(random_state=42, **settings)
+    raise ValueError(f"Unknown model '{model}'. Use xgboost or logreg")
+
+
+# ─── Workers ────────────────────────────────────────────────────────────────
+_features = None
+
+
+def _init_worker(features):
+    global _features
+    _features = features
+
+
+def pickled_size(obj):
+    buf = io.BytesIO()
+    joblib.dump(obj, buf)
+    return buf.tell()
+
+
+def evaluate(job):
+    """Train one model config on the shared features and measure it."""
+    target, model_name, params, n_jobs = job
+    train_key, test_key = TARGETS[target]
+    X_train, X_test = _features["X_train"], _features["X_test"]
+
+    model = build_model(model_name, params, n_jobs)
+    start = time.perf_counter()
+    model.fit(X_train, _features[train_key])
+    train_s = time.perf_counter() - start
+    accuracy = accuracy_score(_features[test_key], model.predict(X_test))
+
+    # Single-email latency, as EmailClassifier.predict sees it
+    timings = []
+    for i in range(min(LATENCY_SAMPLES, X_test.shape[0])):
+        row = X_test[i]
+        start = time.perf_counter()
+        model.predict_proba(row)
+        timings.append(time.perf_counter() - start)
+
+    return {
+        "target": target,
+        "model": model_name,
+        "params": describe(params),
+        "accuracy": accuracy,
+        "train_s": train_s,
+        "model_ms": float(np.median(timings)) * 1000,
+        "model_kb": pickled_size(model) / 1024,
+    }
+
+
+def vectorizer_latency_ms(vectorizer, texts):
+    timings = []
+    for text in texts:
+        start = time.perf_counter()
+        vectorizer.transform([text])
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings)) * 1000
+
+
+def run_jobs(features, jobs, workers):
+    if workers <= 1:
+        _init_worker(features)
+        return [evaluate(job) for job in jobs]
+    import multiprocessing
+    with multiprocessing.Pool(workers, initializer=_init_worker, initargs=(features,)) as pool:
+        return pool.map(evaluate, jobs, chunksize=1)
+
+
+# ─── Ranking & Output ───────────────────────────────────────────────────────
+def rank(rows):
+    """Sort by target, then accuracy (desc) and latency; flag the Pareto front."""
+    rows.sort(key=lambda r: (r["target"], -r["accuracy"], r["latency_ms"]))
+    for target, group in itertools.groupby(rows, key=lambda r: r["target"]):
+        best_latency = float("inf")
+        for i, row in enumerate(group, 1):
+            row["rank"] = i
+            # Rows come by falling accuracy: a row is on the front when it
+            # is faster than every more accurate one
+            row["pareto"] = row["latency_ms"] < best_latency
+            best_latency = min(best_latency, row["latency_ms"])
+    return rows
+
+
+def print_table(rows):
+    header = (f"{'#':>3} {'':1} {'target':<9}{'vectorizer':<52}{'model':<9}{'params':<34}"
+              f"{'acc':>8}{'train s':>9}{'lat ms':>8}{'size KB':>10}")
+    print(header)
+    print("-" * len(header))
+    for r in rows:
+        print(f"{r['rank']:>3} {'★' if r['pareto'] else ' '} {r['target']:<9}{r['vectorizer'][:51]:<52}"
+              f"{r['model']:<9}{r['params'][:33]:<34}{r['accuracy']:>8.4f}{r['train_s']:>9.2f}"
+              f"{r['latency_ms']:>8.3f}{r['size_kb']:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel hyperparameter sweep")
+    parser.add_argument("--spec", help="JSON sweep spec (default: built-in spec, see module docstring)")
+    parser.add_argument("--input", default=os.path.join("data", "cleaned_emails.csv"),
+                        help="Cleaned CSV (default: data/cleaned_emails.csv)")
+    parser.add_argument("--search", choices=["grid", "random"], help="Override the spec's search type")
+    parser.add_argument("--n-iter", type=int, help="Random draws per grid for --search random")
+    parser.add_argument("--seed", type=int, help="Random search seed")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Model configs trained in parallel (default: all cores)")
+    parser.add_argument("--feature-cache-dir", default=FEATURE_CACHE_DIR,
+                        help=f"Feature cache shared with train_model.py (default: {FEATURE_CACHE_DIR})")
+    parser.add_argument("--output", default="sweep_results.csv", help="Ranked results CSV (default: sweep_results.csv)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.input):
+        print(f"❌ {args.input} not found. Run preprocess.py first.")
+        sys.exit(1)
+
+    spec = dict(DEFAULT_SPEC)
+    if args.spec:
+        with open(args.spec, "r", encoding="utf-8") as f:
+            spec.update(json.load(f))
+    search = args.search or spec.get("search", "grid")
+    n_iter = args.n_iter or spec.get("n_iter", 10)
+    seed = args.seed if args.seed is not None else spec.get("seed", 42)
+
+    try:
+        vec_configs = vectorizer_configs(spec, search, n_iter, seed)
+        configs = model_configs(spec, search, n_iter, seed)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    workers = max(1, min(args.workers, len(configs)))
+    # Split the cores between the workers so XGBoost doesn't oversubscribe
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    print(f"🔍 {search} search: {len(vec_configs)} vectorizer config(s) × {len(configs)} model config(s), "
+          f"{workers} worker(s)")
+
+    texts = load_data(args.input)[0][:LATENCY_SAMPLES]
+    rows = []
+    start = time.perf_counter()
+    for vec_params in vec_configs:
+        label = describe(vec_params)
+        features = vectorize(args.input, build_vectorizer(**vec_params), args.feature_cache_dir)
+        vec_ms = vectorizer_latency_ms(features["tfidf"], texts)
+        vec_kb = pickled_size(features["tfidf"]) / 1024
+
+        print(f"\n🚀 {label}: training {len(configs)} model config(s)...")
+        results = run_jobs(features, [(t, m, p, threads) for t, m, p in configs], workers)
+        for result in results:
+            result.update(
+                vectorizer=label,
+                vectorize_ms=vec_ms,
+                latency_ms=vec_ms + result["model_ms"],
+                size_kb=vec_kb + result["model_kb"],
+            )
+            print(f"   {result['target']:<9}{result['model']:<9}{result['params']:<34}"
+                  f"acc {result['accuracy']:.4f}  {result['train_s']:.2f}s")
+        rows += results
+
+    rows = rank(rows)
+    print(f"\n📊 Ranked results ({len(rows)} runs in {time.perf_counter() - start:.1f}s, "
+          f"latency = single-email vectorize + predict_proba, median)\n")
+    print_table(rows)
+
+    fields = ["rank", "pareto", "target", "vectorizer", "model", "params", "accuracy",
+              "train_s", "latency_ms", "vectorize_ms", "model_ms", "size_kb", "model_kb"]
+    with open(args.output, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        writer.writerows({k: r[k] for k in fields} for r in rows)
+    print(f"\n✅ Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
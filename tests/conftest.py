@@ -0,0 +1,22 @@
+"""
+conftest.py — Shared pytest setup
+The project is a set of top-level scripts, not a package; put the repo root
+on sys.path so tests import them the way the scripts import each other.
+Modules that clean text opt into the `wordnet` fixture, which skips them
+when the NLTK data is not installed.
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope="session")
+def wordnet():
+    import text_processing
+    try:
+        text_processing.get_lemmatizer()
+    except LookupError:
+        pytest.skip("NLTK WordNet data is not installed")
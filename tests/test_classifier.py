@@ -0,0 +1,38 @@
+"""
+test_classifier.py — EmailClassifier Serving Paths
+The compiled urgency scorer must give the same single-email results as the
+sklearn path, and must refuse a scorer compiled from other models.
+"""
+import shutil
+
+import pytest
+
+from classifier import EmailClassifier, MODEL_DIR
+from compiled_scorer import SCORER_NAME, load_scorer
+from model_bundle import BUNDLE_NAME
+from text_processing import build_corpus
+
+pytestmark = pytest.mark.usefixtures("wordnet")
+
+
+def test_compiled_single_email_matches_sklearn():
+    reference = EmailClassifier()
+    compiled = EmailClassifier(compiled=True)
+    assert compiled.urg_scorer is not None
+    for text in build_corpus(200, seed=3):
+        assert compiled.predict(text) == reference.predict(text)
+
+
+def test_compiled_rejects_stale_scorer(tmp_path):
+    shutil.copy(f"{MODEL_DIR}/{BUNDLE_NAME}", tmp_path / BUNDLE_NAME)
+    scorer = load_scorer(f"{MODEL_DIR}/{SCORER_NAME}")
+    scorer.intercept = scorer.intercept + 1.0
+    scorer.save(str(tmp_path / SCORER_NAME))
+    with pytest.raises(ValueError, match="different urgency model"):
+        EmailClassifier(bundle_path=str(tmp_path / BUNDLE_NAME), compiled=True)
+
+
+def test_compiled_requires_scorer(tmp_path):
+    shutil.copy(f"{MODEL_DIR}/{BUNDLE_NAME}", tmp_path / BUNDLE_NAME)
+    with pytest.raises(FileNotFoundError):
+        EmailClassifier(bundle_path=str(tmp_path / BUNDLE_NAME), compiled=True)
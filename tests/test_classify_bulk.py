@@ -0,0 +1,63 @@
+"""
+test_classify_bulk.py — Bulk Input Parsing
+Malformed CSV / JSONL input must surface as ValueError (which the CLI and
+the Streamlit upload report), and every entry point must build the same
+text for the models from a record.
+"""
+import csv
+import io
+
+import pytest
+
+from classify_bulk import SUBJECT_COLUMNS, email_text, find_column, iter_records, record_text
+
+MBOX = """From alice@example.com Mon Jan  1 00:00:00 2024
+From: alice@example.com
+Subject: Refund request
+
+I was charged twice.
+
+From bob@example.com Mon Jan  1 00:00:00 2024
+From: bob@example.com
+
+>From the start the app keeps crashing.
+"""
+
+
+def _records(text, fmt):
+    return list(iter_records(io.StringIO(text, newline=""), fmt))
+
+
+def test_jsonl_non_object_line():
+    with pytest.raises(ValueError, match="Line 2 is not a JSON object"):
+        _records('{"text": "hi"}\n["not", "an", "object"]\n', "jsonl")
+
+
+def test_jsonl_invalid_json():
+    with pytest.raises(ValueError, match="Invalid JSON on line 1"):
+        _records('{"text": \n', "jsonl")
+
+
+def test_malformed_csv():
+    limit = csv.field_size_limit()
+    try:
+        csv.field_size_limit(10)
+        with pytest.raises(ValueError, match="Malformed CSV near line 2"):
+            _records("text\n" + "x" * 50 + "\n", "csv")
+    finally:
+        csv.field_size_limit(limit)
+
+
+def test_mbox_text_includes_subject():
+    records = _records(MBOX, "mbox")
+    subject_col = find_column(list(records[0]), SUBJECT_COLUMNS)
+    assert subject_col == "subject"
+    assert [record_text(r, "body", subject_col) for r in records] == [
+        "Subject: Refund request\n\nI was charged twice.",
+        "From the start the app keeps crashing.",
+    ]
+
+
+def test_email_text():
+    assert email_text("body", "") == "body"
+    assert email_text("body", "Hi") == "Subject: Hi\n\nbody"
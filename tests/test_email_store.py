@@ -0,0 +1,408 @@
+"""
+test_email_store.py — Dashboard Email Stores
+EmailStore must filter, sort and page exactly like a plain Python reference
+for every Dashboard sort option, and keep its KPI and chart counts current
+as emails arrive. SQLiteEmailStore must return the same pages and totals
+on either side of DENSE_MATCH_SHARE, and its trigger-kept email_stats must
+stay equal to counts over the emails table through inserts and deletes.
+
+Search must match the same emails in both backends (every query word as a
+word prefix, FTS5 unicode61 word rules), also in a database created before
+emails_fts existed. BM25 ranking differs between TokenIndex and FTS5, so
+relevance order is pinned per backend rather than compared.
+"""
+import ast
+import os
+
+import pytest
+
+import email_store
+from email_store import URGENCY_LEVELS, EmailStore, SQLiteEmailStore
+
+CATEGORIES = ["Billing Issue", "Account Access", "Technical Support", "Feedback", "spam"]
+WORDS = ["refund", "invoice", "charged", "password", "login", "crash", "upload", "thanks", "offer", "urgent"]
+# Every combination of the Dashboard filters the tests run
+FILTERS = [
+    {},
+    {"categories": ["Billing Issue"]},
+    {"categories": ["Legal"]},                      # one email: a sparse match
+    {"categories": ["Feedback", "spam"], "urgencies": ["Low"]},
+    {"urgencies": ["High", "Medium"]},
+    {"teams": ["Finance"]},
+    {"categories": ["Account Access"], "urgencies": ["Low"], "teams": ["IT Support"]},
+    {"categories": ["Unknown"]},                    # nothing matches
+    {"categories": []},
+]
+TEAMS = {"Billing Issue": "Finance", "Account Access": "IT Support", "Technical Support": "IT Support"}
+
+
+def _sort_options():
+    """app.SORT_OPTIONS, read from the source (importing app runs the Streamlit page)."""
+    path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and [t.id for t in node.targets] == ["SORT_OPTIONS"]:
+            return ast.literal_eval(node.value)
+    raise AssertionError("SORT_OPTIONS not found in app.py")
+
+
+SORT_OPTIONS = _sort_options()
+
+
+def make_records(n=60):
+    """Deterministic emails with repeated confidences (to exercise ties) and one 'Legal' email."""
+    records = []
+    for i in range(n):
+        category = "Legal" if i == 17 else CATEGORIES[(i * 7) % len(CATEGORIES)]
+        words = [WORDS[(i * k) % len(WORDS)] for k in (1, 3, 4)]
+        records.append({
+            "sender": f"user{i % 9}@example.com",
+            "subject": f"{words[0].title()} question {i}",
+            "content": " ".join(words),
+            "full_content": " ".join(words + ["please", "help"]),
+            "category": category,
+            "urgency": URGENCY_LEVELS[(i * 5) % 3],
+            "confidence": 0.5 + (i * 3 % 5) / 10,
+            "team": TEAMS.get(category, "Customer Success"),
+            "timestamp": f"2026-10-01 09:{i:02d}:00",
+        })
+    return records
+
+
+def reference_ids(records, categories=None, urgencies=None, teams=None, sort="urgency", descending=False):
+    """Expected ids: filter the records, then sort by (key, id) like the stores do."""
+    def key(pair):
+        email_id, r = pair
+        if sort in ("urgency", "relevance"):
+            return URGENCY_LEVELS.index(r["urgency"]), email_id
+        if sort == "id":
+            return (email_id,)
+        return r[sort], email_id
+
+    matches = [
+        (email_id, r) for email_id, r in enumerate(records, 1)
+        if (categories is None or r["category"] in categories)
+        and (urgencies is None or r["urgency"] in urgencies)
+        and (teams is None or r["team"] in teams)
+    ]
+    return [email_id for email_id, _ in sorted(matches, key=key, reverse=descending)]
+
+
+@pytest.fixture
+def records():
+    return make_records()
+
+
+@pytest.fixture
+def memory_store(records):
+    store = EmailStore()
+    store.extend(records[:25])
+    for record in records[25:]:
+        store.append(record)
+    return store
+
+
+@pytest.fixture
+def sqlite_store(tmp_path, records):
+    store = SQLiteEmailStore(str(tmp_path / "emails.db"))
+    store.extend(records[:25])
+    for record in records[25:]:
+        store.append(record)
+    yield store
+    store.close()
+
+
+def _stats_match_table(store):
+    """email_stats rows equal a GROUP BY over emails (ignoring emptied groups)."""
+    stats = store._rows(
+        "SELECT category, urgency, n, ROUND(confidence_sum, 6) FROM email_stats WHERE n > 0 ORDER BY 1, 2"
+    )
+    table = store._rows(
+        "SELECT category, urgency, COUNT(*), ROUND(SUM(confidence), 6) FROM emails GROUP BY 1, 2 ORDER BY 1, 2"
+    )
+    return stats == table
+
+
+def _email(subject, body, sender="ana@example.com", category="Billing Issue", urgency="Low"):
+    return {"sender": sender, "subject": subject, "content": body, "full_content": body,
+            "category": category, "urgency": urgency, "confidence": 0.9, "team": "Finance",
+            "timestamp": "2026-10-01 09:00:00"}
+
+
+SEARCH_EMAILS = [
+    _email("Refund request", "Please refund the amount I was charged twice", urgency="High"),
+    _email("Invoice", "My invoice shows a charge I do not recognise"),
+    _email("Refund refund refund", "refund now", category="Complaint", urgency="Medium"),
+    _email("Login problem", "Password reset e-mail never arrives", sender="refunds@shop.example"),
+    _email("Überweisung", "Rückerstattung für Bestellung_42 bitte"),
+    _email("Thanks", "Great service, the charger works"),
+]
+# query → ids matched (by subject, body or sender), in id order
+SEARCHES = {
+    "refund": [1, 3, 4],                # 4 through its sender, refunds@...
+    "ref": [1, 3, 4],
+    "refun char": [1],                  # every word must match
+    "charged refund": [1],
+    "REFUND Charged": [1],
+    "char": [1, 2, 6],                  # charged, charge, charger
+    "r": [1, 2, 3, 4, 5],
+    "refund invoice": [],
+    "bestellung_42": [5],               # "_" separates words, like "-" and "@"
+    "42": [5],
+    "überweisung": [5],
+    "uberweisung": [],                  # diacritics are kept
+    "e mail": [4],
+    "email": [],
+    "shop example": [4],
+}
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def search_store(request, tmp_path):
+    if request.param == "memory":
+        store = EmailStore()
+    else:
+        store = SQLiteEmailStore(str(tmp_path / "emails.db"))
+    store.extend(SEARCH_EMAILS)
+    yield request.param, store
+    if request.param == "sqlite":
+        store.close()
+
+
+# ─── EmailStore ─────────────────────────────────────────────────────────────
+@pytest.mark.parametrize("filters", FILTERS)
+@pytest.mark.parametrize("sort_label", list(SORT_OPTIONS))
+def test_memory_filters_and_sorts_match_reference(memory_store, records, filters, sort_label):
+    sort, descending = SORT_OPTIONS[sort_label]
+    page, total = memory_store.query(**filters, sort=sort, descending=descending)
+    expected = reference_ids(records, **filters, sort=sort, descending=descending)
+    assert page["id"].tolist() == expected
+    assert total == len(expected)
+
+
+@pytest.mark.parametrize("offset, limit", [(0, 25), (50, 25), (55, 10), (60, 10), (100, 10), (0, 0)])
+def test_memory_paging(memory_store, records, offset, limit):
+    expected = reference_ids(records)
+    page, total = memory_store.query(offset=offset, limit=limit)
+    assert page["id"].tolist() == expected[offset:offset + limit]
+    assert total == len(records)
+
+
+def test_memory_aggregates_follow_appends(records):
+    store = EmailStore()
+    assert store.kpis() == {"total": 0, "avg_confidence": 0.0, "High": 0, "Medium": 0, "Low": 0}
+    assert store.category_counts() == {} and store.categories() == []
+
+    for count in (1, 10, len(records)):
+        store.extend(records[len(store):count])
+        seen = records[:count]
+        kpis = store.kpis()
+        assert kpis["total"] == count
+        assert kpis["avg_confidence"] == pytest.approx(sum(r["confidence"] for r in seen) / count)
+        assert store.urgency_counts() == {u: sum(r["urgency"] == u for r in seen) for u in URGENCY_LEVELS}
+        first_seen = list(dict.fromkeys(r["category"] for r in seen))
+        assert store.categories() == first_seen
+        counts = store.category_counts()
+        assert counts == {c: sum(r["category"] == c for r in seen) for c in first_seen}
+        assert list(counts.values()) == sorted(counts.values(), reverse=True)
+
+
+def test_memory_frame_keeps_labels(memory_store, records):
+    page, _ = memory_store.query(sort="id", limit=3, columns=("id", "category", "urgency", "subject"))
+    assert list(page.columns) == ["id", "category", "urgency", "subject"]
+    assert page.to_dict("records") == [
+        {"id": i, "category": r["category"], "urgency": r["urgency"], "subject": r["subject"]}
+        for i, r in enumerate(records[:3], 1)
+    ]
+
+
+def test_memory_rejects_unknown_sort(memory_store):
+    with pytest.raises(ValueError, match="Unknown sort column"):
+        memory_store.query(sort="sender")
+
+
+# ─── SQLiteEmailStore ───────────────────────────────────────────────────────
+@pytest.mark.parametrize("filters", FILTERS)
+@pytest.mark.parametrize("sort_label", list(SORT_OPTIONS))
+def test_sqlite_matches_memory(memory_store, sqlite_store, filters, sort_label):
+    sort, descending = SORT_OPTIONS[sort_label]
+    expected, expected_total = memory_store.query(**filters, sort=sort, descending=descending)
+    page, total = sqlite_store.query(**filters, sort=sort, descending=descending)
+    assert page.to_dict("records") == expected.to_dict("records")
+    assert total == expected_total
+
+
+@pytest.mark.parametrize("filters", [{}, {"categories": ["Billing Issue"]}, {"categories": ["Unknown"]}])
+@pytest.mark.parametrize("offset, limit", [(0, 25), (50, 25), (55, 10), (60, 10), (100, 10), (0, 0)])
+def test_sqlite_paging_matches_memory(memory_store, sqlite_store, filters, offset, limit):
+    for sort, descending in SORT_OPTIONS.values():
+        expected, expected_total = memory_store.query(**filters, sort=sort, descending=descending,
+                                                      offset=offset, limit=limit)
+        page, total = sqlite_store.query(**filters, sort=sort, descending=descending,
+                                         offset=offset, limit=limit)
+        assert page["id"].tolist() == expected["id"].tolist()
+        assert total == expected_total
+
+
+@pytest.mark.parametrize("share, dense", [(0.0, True), (2.0, False)])
+def test_sqlite_dense_and_sparse_plans_agree(monkeypatch, memory_store, sqlite_store, share, dense):
+    monkeypatch.setattr(email_store, "DENSE_MATCH_SHARE", share)
+    statements = []
+    sqlite_store._db.set_trace_callback(statements.append)
+    for filters in FILTERS[1:]:
+        for sort, descending in SORT_OPTIONS.values():
+            expected, expected_total = memory_store.query(**filters, sort=sort, descending=descending, limit=10)
+            page, total = sqlite_store.query(**filters, sort=sort, descending=descending, limit=10)
+            assert page["id"].tolist() == expected["id"].tolist()
+            assert total == expected_total
+    sqlite_store._db.set_trace_callback(None)
+    # The dense plan skips the filter indexes with a unary +
+    pages = [sql for sql in statements if "LIMIT" in sql]
+    assert pages and all(("+category" in sql or "+urgency" in sql or "+team" in sql) == dense
+                         for sql in pages if " IN (" in sql)
+
+
+def test_sqlite_default_threshold_uses_both_plans(sqlite_store):
+    statements = []
+    sqlite_store._db.set_trace_callback(statements.append)
+    sqlite_store.query(categories=["Legal"])            # 1 of 60 emails
+    sqlite_store.query(categories=["Billing Issue"])    # 12 of 60
+    sqlite_store._db.set_trace_callback(None)
+    sparse, dense = [sql for sql in statements if "LIMIT" in sql]
+    assert "+category" not in sparse and "+category" in dense
+
+
+def test_sqlite_stats_follow_inserts_and_deletes(records, memory_store, sqlite_store):
+    assert sqlite_store.kpis() == pytest.approx(memory_store.kpis())
+    for method in ("category_counts", "urgency_counts", "categories"):
+        assert getattr(sqlite_store, method)() == getattr(memory_store, method)()
+    assert _stats_match_table(sqlite_store)
+
+    # The delete trigger: remove every Billing Issue email and one Legal email
+    with sqlite_store._db:
+        sqlite_store._db.execute("DELETE FROM emails WHERE category IN ('Billing Issue', 'Legal')")
+    assert _stats_match_table(sqlite_store)
+    remaining = [r for r in records if r["category"] not in ("Billing Issue", "Legal")]
+    assert sqlite_store.kpis()["total"] == len(remaining) == len(sqlite_store)
+    assert "Billing Issue" not in sqlite_store.category_counts()
+    assert "Legal" not in sqlite_store.categories()
+    assert sqlite_store.query(categories=["Billing Issue"])[1] == 0
+
+    sqlite_store.clear()
+    assert sqlite_store.kpis() == {"total": 0, "avg_confidence": 0.0, "High": 0, "Medium": 0, "Low": 0}
+    assert sqlite_store.category_counts() == {} and sqlite_store.categories() == []
+    assert sqlite_store.query()[1] == 0
+
+    sqlite_store.extend(records[:10])
+    assert _stats_match_table(sqlite_store)
+    assert sqlite_store.kpis()["total"] == 10
+
+
+def test_sqlite_store_persists(tmp_path, records):
+    path = str(tmp_path / "emails.db")
+    store = SQLiteEmailStore(path)
+    store.extend(records)
+    kpis, counts = store.kpis(), store.category_counts()
+    store.close()
+
+    reopened = SQLiteEmailStore(path)
+    assert (reopened.kpis(), reopened.category_counts()) == (kpis, counts)
+    assert reopened.query(sort="id", limit=1)[0]["subject"].tolist() == [records[0]["subject"]]
+    reopened.close()
+
+
+def test_sqlite_rejects_unknown_sort_and_columns(sqlite_store):
+    with pytest.raises(ValueError, match="Unknown sort column"):
+        sqlite_store.query(sort="sender")
+    with pytest.raises(ValueError, match="Unknown columns"):
+        sqlite_store.query(columns=("id", "password"))
+
+
+# ─── Search ─────────────────────────────────────────────────────────────────
+@pytest.mark.parametrize("query", list(SEARCHES))
+def test_search_matches_word_prefixes(search_store, query):
+    _, store = search_store
+    page, total = store.query(search=query, sort="id")
+    assert page["id"].tolist() == SEARCHES[query]
+    assert total == len(SEARCHES[query])
+
+
+@pytest.mark.parametrize("query", ["", "   ", "!!!", None])
+def test_search_without_words_is_ignored(search_store, query):
+    _, store = search_store
+    page, total = store.query(search=query, sort="relevance")
+    # relevance falls back to urgency order
+    assert page["id"].tolist() == [1, 3, 2, 4, 5, 6]
+    assert total == len(SEARCH_EMAILS)
+
+
+def test_relevance_order_per_backend(search_store):
+    backend, store = search_store
+    # TokenIndex scores the whole email as one field; FTS5 scores subject,
+    # body and sender as separate columns, so the sender-only match of email 4
+    # ranks differently
+    expected = {"memory": [3, 4, 1], "sqlite": [3, 1, 4]}[backend]
+    assert store.query(search="refund", sort="relevance")[0]["id"].tolist() == expected
+    assert store.query(search="refund", sort="relevance", descending=True)[0]["id"].tolist() == expected[::-1]
+    assert store.query(search="refund", sort="relevance", offset=1, limit=1)[0]["id"].tolist() == expected[1:2]
+    # With filters, relevance orders what is left
+    page, total = store.query(search="refund", sort="relevance", urgencies=["High", "Medium"])
+    assert (page["id"].tolist(), total) == ([3, 1], 2)
+    assert store.query(search="refund", categories=["Feedback"], sort="relevance")[1] == 0
+
+
+@pytest.mark.parametrize("query", ["refund", "ch", "re pl", "inv", "pass", "zzz"])
+@pytest.mark.parametrize("filters", FILTERS)
+def test_search_sets_match_between_backends(memory_store, sqlite_store, query, filters):
+    expected, expected_total = memory_store.query(**filters, search=query, sort="relevance")
+    page, total = sqlite_store.query(**filters, search=query, sort="relevance")
+    assert sorted(page["id"]) == sorted(expected["id"])
+    assert total == expected_total
+    # Every other order is fully determined, so the pages are identical
+    for sort, descending in list(SORT_OPTIONS.values())[1:]:
+        expected, _ = memory_store.query(**filters, search=query, sort=sort, descending=descending, limit=10)
+        page, _ = sqlite_store.query(**filters, search=query, sort=sort, descending=descending, limit=10)
+        assert page["id"].tolist() == expected["id"].tolist()
+
+
+def test_search_follows_inserts_and_deletes(sqlite_store):
+    assert sqlite_store.query(search="rückerstattung")[1] == 0
+    sqlite_store.extend(SEARCH_EMAILS[4:5])
+    assert sqlite_store.query(search="rückerstattung")[1] == 1
+    with sqlite_store._db:
+        sqlite_store._db.execute("DELETE FROM emails WHERE subject = 'Überweisung'")
+    assert sqlite_store.query(search="rückerstattung")[1] == 0
+    sqlite_store.clear()
+    assert sqlite_store.query(search="refund")[1] == 0
+
+
+def test_search_index_is_rebuilt_for_an_older_database(tmp_path, records):
+    """A database created before emails_fts existed is indexed when opened."""
+    import sqlite3
+
+    path = str(tmp_path / "old.db")
+    db = sqlite3.connect(path)
+    db.executescript(email_store.SCHEMA.split("-- Full-text index")[0])
+    with db:
+        db.executemany(
+            "INSERT INTO emails VALUES (NULL, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [(r["sender"], r["subject"], r["content"], r["full_content"], r["category"], r["urgency"],
+              email_store._urgency_rank(r["urgency"]), r["confidence"], r["team"], r["timestamp"])
+             for r in records],
+        )
+    assert db.execute("SELECT 1 FROM sqlite_master WHERE name = 'emails_fts'").fetchone() is None
+    db.close()
+
+    memory = EmailStore()
+    memory.extend(records)
+    store = SQLiteEmailStore(path)
+    for query in ("refund", "pass", "cr ref"):
+        page, total = store.query(search=query, sort="id")
+        expected, expected_total = memory.query(search=query, sort="id")
+        assert total == expected_total > 0
+        assert page["id"].tolist() == expected["id"].tolist()
+    # Emails added after the upgrade are indexed by the triggers
+    store.append(SEARCH_EMAILS[4])
+    assert store.query(search="überweisung")[1] == 1
+    store.close()
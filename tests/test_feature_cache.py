@@ -0,0 +1,98 @@
+"""
+test_feature_cache.py — Feature Cache Keys and Round Trip
+The fingerprint must change with anything that changes the features (the
+data, the vectorizer parameters, the split) and nothing else, and
+load_features must return exactly what save_features wrote.
+"""
+import numpy as np
+import pytest
+import scipy.sparse as sp
+from sklearn.preprocessing import LabelEncoder
+
+from feature_cache import fingerprint, load_features, save_features
+from train_model import SPLIT, build_vectorizer
+
+
+@pytest.fixture
+def data_path(tmp_path):
+    path = tmp_path / "cleaned_emails.csv"
+    path.write_text("email_text,category,urgency\ninvoice charged twice,Billing Issue,High\n", encoding="utf-8")
+    return path
+
+
+def test_fingerprint_is_stable(data_path, tmp_path):
+    key = fingerprint(str(data_path), build_vectorizer(), SPLIT)
+    assert key == fingerprint(str(data_path), build_vectorizer(), dict(SPLIT))
+
+    # Only the bytes matter, not the file name
+    copy = tmp_path / "copy.csv"
+    copy.write_bytes(data_path.read_bytes())
+    assert key == fingerprint(str(copy), build_vectorizer(), SPLIT)
+
+
+def test_fingerprint_changes_with_data(data_path):
+    before = fingerprint(str(data_path), build_vectorizer(), SPLIT)
+    with open(data_path, "a", encoding="utf-8") as f:
+        f.write("cannot log in,Account Access,High\n")
+    assert fingerprint(str(data_path), build_vectorizer(), SPLIT) != before
+
+
+@pytest.mark.parametrize("params", [
+    {"max_features": 2000},
+    {"ngram_range": (1, 1)},
+    {"features": "hashing"},
+])
+def test_fingerprint_changes_with_vectorizer(data_path, params):
+    assert fingerprint(str(data_path), build_vectorizer(**params), SPLIT) != \
+        fingerprint(str(data_path), build_vectorizer(), SPLIT)
+
+
+def test_fingerprint_changes_with_hashing_width(data_path):
+    assert fingerprint(str(data_path), build_vectorizer("hashing", 2 ** 12), SPLIT) != \
+        fingerprint(str(data_path), build_vectorizer("hashing", 2 ** 14), SPLIT)
+
+
+@pytest.mark.parametrize("split", [
+    {"test_size": 0.25, "random_state": 42},
+    {"test_size": 0.2, "random_state": 7},
+])
+def test_fingerprint_changes_with_split(data_path, split):
+    assert fingerprint(str(data_path), build_vectorizer(), split) != \
+        fingerprint(str(data_path), build_vectorizer(), SPLIT)
+
+
+def test_load_returns_what_save_wrote(tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    rng = np.random.default_rng(0)
+    X_train = sp.random(20, 50, density=0.1, format="csr", random_state=1)
+    X_test = sp.random(5, 50, density=0.1, format="csr", random_state=2)
+    encoder = LabelEncoder().fit(["Billing Issue", "Feedback"])
+    labels = rng.integers(0, 2, size=20)
+    vectorizer = build_vectorizer().fit(["invoice charged twice", "thank you"])
+
+    entry = save_features(cache_dir, "abc", X_train, X_test,
+                          tfidf=vectorizer, cat_encoder=encoder, yc_train=labels)
+    assert sorted(p.name for p in (tmp_path / "cache").iterdir()) == ["abc"]
+    assert entry.endswith("abc")
+
+    cached = load_features(cache_dir, "abc")
+    assert set(cached) == {"X_train", "X_test", "tfidf", "cat_encoder", "yc_train"}
+    assert (cached["X_train"] != X_train).nnz == 0
+    assert (cached["X_test"] != X_test).nnz == 0
+    np.testing.assert_array_equal(cached["yc_train"], labels)
+    assert list(cached["cat_encoder"].classes_) == list(encoder.classes_)
+    assert cached["tfidf"].vocabulary_ == vectorizer.vocabulary_
+
+
+def test_save_replaces_an_entry_and_misses_are_none(tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    assert load_features(cache_dir, "abc") is None
+
+    save_features(cache_dir, "abc", sp.csr_matrix((2, 3)), sp.csr_matrix((1, 3)), version=1)
+    save_features(cache_dir, "abc", sp.csr_matrix((4, 3)), sp.csr_matrix((1, 3)), version=2)
+    cached = load_features(cache_dir, "abc")
+    assert (cached["version"], cached["X_train"].shape) == (2, (4, 3))
+
+    # A damaged entry is a miss, not an error
+    (tmp_path / "cache" / "abc" / "train.npz").write_bytes(b"not a matrix")
+    assert load_features(cache_dir, "abc") is None
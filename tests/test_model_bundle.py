@@ -0,0 +1,77 @@
+"""
+test_model_bundle.py — Bundle vs. Pickled Models
+A float64 bundle must reproduce the .pkl models exactly: same features,
+same probabilities, same labels. float16 / int8 bundles must keep ≥ 99% label
+agreement with smaller weights (the checks behind `model_bundle.py --verify`).
+"""
+import os
+
+import pytest
+
+import model_bundle
+from classifier import MODEL_DIR
+
+SAMPLES = 300
+pytestmark = pytest.mark.usefixtures("wordnet")
+
+
+@pytest.fixture(scope="module")
+def artifacts():
+    return model_bundle._load_pickles(MODEL_DIR)
+
+
+def _export(artifacts, path, precision="float64"):
+    fast_model, cascade = model_bundle._load_cascade(MODEL_DIR)
+    return model_bundle.export_bundle(*artifacts, str(path), fast_model, cascade, precision)
+
+
+def _assert_exact(report):
+    assert report["feature_diff"] < 1e-9
+    for name, (proba_diff, agree) in report["models"].items():
+        assert proba_diff < 1e-5, name
+        assert agree == 1.0, name
+
+
+def test_float64_bundle_matches_pickles(artifacts, tmp_path):
+    path = tmp_path / "bundle.emb"
+    _export(artifacts, path)
+    report = model_bundle.compare_bundle(MODEL_DIR, str(path), SAMPLES)
+    assert report["precision"] == "float64"
+    _assert_exact(report)
+
+
+def test_shipped_bundle_matches_pickles():
+    path = os.path.join(MODEL_DIR, model_bundle.BUNDLE_NAME)
+    if not os.path.exists(path):
+        pytest.skip("no exported bundle in models/")
+    _assert_exact(model_bundle.compare_bundle(MODEL_DIR, path, SAMPLES))
+
+
+def test_export_is_deterministic(artifacts, tmp_path):
+    first = _export(artifacts, tmp_path / "a.emb")
+    second = _export(artifacts, tmp_path / "b.emb")
+    assert first == second
+    assert (tmp_path / "a.emb").read_bytes() == (tmp_path / "b.emb").read_bytes()
+
+
+def test_bundle_labels_round_trip(artifacts, tmp_path):
+    path = tmp_path / "bundle.emb"
+    _export(artifacts, path)
+    bundle = model_bundle.load_bundle(str(path))
+    _, _, _, cat_encoder, urg_encoder = artifacts
+    assert list(bundle.cat_encoder.inverse_transform(range(len(cat_encoder.classes_)))) == list(cat_encoder.classes_)
+    assert list(bundle.urg_encoder.inverse_transform(range(len(urg_encoder.classes_)))) == list(urg_encoder.classes_)
+
+
+@pytest.mark.parametrize("precision", [p for p in model_bundle.PRECISIONS if p != "float64"])
+def test_reduced_precision_bundle_agrees_and_shrinks(artifacts, tmp_path, precision):
+    full, reduced = tmp_path / "float64.emb", tmp_path / f"{precision}.emb"
+    _export(artifacts, full)
+    _export(artifacts, reduced, precision)
+    report = model_bundle.compare_bundle(MODEL_DIR, str(reduced), SAMPLES)
+    assert report["precision"] == precision
+    assert report["feature_diff"] < 1e-5
+    for name, (_, agree) in report["models"].items():
+        assert agree >= 0.99, name
+    assert model_bundle._weight_bytes(model_bundle.load_bundle(str(reduced))) < \
+        model_bundle._weight_bytes(model_bundle.load_bundle(str(full)))
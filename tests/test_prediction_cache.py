@@ -0,0 +1,121 @@
+"""
+test_prediction_cache.py — Prediction Cache Tiers and Counters
+The memory tier evicts least recently used entries first, the SQLite tier
+serves what memory evicted, every lookup lands in exactly one counter, and
+keys made under different model versions never share an entry.
+"""
+import pytest
+
+from prediction_cache import PredictionCache
+
+
+def _value(i):
+    return {"category": f"c{i}", "urgency": "Low"}
+
+
+def test_memory_tier_evicts_least_recently_used():
+    cache = PredictionCache(max_entries=3)
+    for key in "abc":
+        cache.put(key, {"key": key})
+    assert cache.get("a") == {"key": "a"}  # a is now the most recent
+    cache.put("d", {"key": "d"})
+
+    assert cache.get("b") is None
+    assert [cache.get(key) for key in "acd"] == [{"key": key} for key in "acd"]
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["memory_entries"] == 3
+
+
+def test_values_are_copies():
+    cache = PredictionCache()
+    value = _value(1)
+    cache.put("k", value)
+    value["category"] = "changed"
+    cache.get("k")["category"] = "changed again"
+    assert cache.get("k") == _value(1)
+
+
+def test_disk_tier_serves_entries_evicted_from_memory(tmp_path):
+    cache = PredictionCache(max_entries=2, db_path=str(tmp_path / "cache.db"))
+    cache.put_many((f"k{i}", _value(i)) for i in range(4))
+    stats = cache.stats()
+    assert (stats["memory_entries"], stats["disk_entries"], stats["evictions"]) == (2, 4, 2)
+
+    # k0 was evicted from memory: read from SQLite, then promoted back
+    assert cache.get("k0") == _value(0)
+    assert cache.get("k0") == _value(0)
+    stats = cache.stats()
+    assert (stats["hits"], stats["disk_hits"], stats["misses"]) == (1, 1, 0)
+    assert stats["evictions"] == 3
+
+
+def test_disk_tier_survives_reopen(tmp_path):
+    db_path = str(tmp_path / "cache.db")
+    cache = PredictionCache(db_path=db_path)
+    cache.put("k", _value(1))
+    cache.close()
+
+    reopened = PredictionCache(db_path=db_path)
+    assert reopened.get_many(["k", "missing"]) == [_value(1), None]
+    assert (reopened.disk_hits, reopened.misses) == (1, 1)
+
+
+def test_counters_cover_every_lookup(tmp_path):
+    cache = PredictionCache(max_entries=1, db_path=str(tmp_path / "cache.db"))
+    cache.put_many([("a", _value(1)), ("b", _value(2))])  # a only on disk now
+
+    results = cache.get_many(["b", "a", "x", "b", "y"])
+    assert results == [_value(2), _value(1), None, _value(2), None]
+    stats = cache.stats()
+    # Memory is checked for the whole batch before SQLite, so both "b"s hit
+    assert (stats["hits"], stats["disk_hits"], stats["misses"]) == (2, 1, 2)
+    assert stats["hit_rate"] == 0.6
+
+
+def test_clear_keeps_counters():
+    cache = PredictionCache()
+    cache.put("k", _value(1))
+    cache.get("k")
+    cache.clear()
+    assert cache.get("k") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["memory_entries"]) == (1, 1, 0)
+
+
+def test_rejects_empty_memory_tier():
+    with pytest.raises(ValueError):
+        PredictionCache(max_entries=0)
+
+
+def test_keys_are_separated_by_model_version(tmp_path):
+    text = "please reset my password"
+    plain = PredictionCache.make_key(text, "abc123")
+    cascade = PredictionCache.make_key(text, "abc123+cascade0.9")
+    assert plain == PredictionCache.make_key(text, "abc123")
+    assert len({plain, cascade, PredictionCache.make_key(text, "abc124")}) == 3
+    # The separator keeps version and text from running into each other
+    assert PredictionCache.make_key("1 text", "v") != PredictionCache.make_key(" text", "v1")
+
+    cache = PredictionCache(db_path=str(tmp_path / "cache.db"))
+    cache.put(plain, {"category": "Account Access", "cascade": False})
+    assert cache.get(cascade) is None
+    assert cache.get(plain)["cascade"] is False
+
+
+@pytest.mark.usefixtures("wordnet")
+def test_classifier_keys_cache_by_model_version():
+    from classifier import EmailClassifier
+
+    cache = PredictionCache()
+    clf = EmailClassifier(cache=cache)
+    texts = ["My invoice was charged twice", "Cannot log in to my account"]
+    first = clf.predict_batch(texts)
+    assert clf.predict_batch(texts) == first
+    assert (cache.hits, cache.misses) == (2, 2)
+
+    # A cascade classifier appends "+cascade<threshold>" to its version and
+    # must not be served the plain model's results
+    clf.model_version = f"{clf.model_version}+cascade0.9"
+    clf.predict_batch(texts)
+    assert (cache.hits, cache.misses) == (2, 4)
+    assert cache.stats()["memory_entries"] == 4
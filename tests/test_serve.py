@@ -0,0 +1,83 @@
+"""
+test_serve.py — Inference Service Error Handling
+A failing model call must reach every caller of its batch and turn into a
+500 JSON reply, never a dropped connection or a hung request.
+"""
+import asyncio
+import json
+
+import pytest
+
+from serve import InferenceServer, MicroBatcher
+
+
+class FakeClassifier:
+    model_version = "test"
+    cache = None
+    cascade = False
+    metrics = None
+
+    def __init__(self, fail=False):
+        self.fail = fail
+
+    def predict_batch(self, texts):
+        if self.fail:
+            raise OSError("bundle read failed")
+        return [{"category": "other", "text": text} for text in texts]
+
+
+async def _request(port, payload):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    body = json.dumps(payload).encode()
+    writer.write(b"POST /classify HTTP/1.1\r\nConnection: close\r\n"
+                 b"Content-Length: " + str(len(body)).encode() + b"\r\n\r\n" + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, body = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(body)
+
+
+async def _serve(classifier, payloads):
+    batcher = MicroBatcher(classifier.predict_batch, max_batch_size=8, max_wait_ms=20)
+    batcher.start()
+    server = InferenceServer(classifier, batcher)
+    listener = await asyncio.start_server(server.handle_connection, "127.0.0.1", 0)
+    port = listener.sockets[0].getsockname()[1]
+    try:
+        return await asyncio.wait_for(
+            asyncio.gather(*(_request(port, p) for p in payloads)), timeout=10
+        ), server, batcher
+    finally:
+        listener.close()
+        await listener.wait_closed()
+        await batcher.stop()
+
+
+def test_classify_ok():
+    responses, _, _ = asyncio.run(_serve(FakeClassifier(), [{"text": "a"}, {"texts": ["b", "c"]}]))
+    assert responses[0] == (200, {"category": "other", "text": "a"})
+    assert responses[1][0] == 200 and [r["text"] for r in responses[1][1]["results"]] == ["b", "c"]
+
+
+def test_model_failure_answers_500_to_every_waiter():
+    responses, server, batcher = asyncio.run(
+        _serve(FakeClassifier(fail=True), [{"text": "a"}, {"texts": ["b", "c"]}, {"text": "d"}])
+    )
+    assert [status for status, _ in responses] == [500, 500, 500]
+    assert all("OSError" in payload["error"] for _, payload in responses)
+    assert server.errors == 3
+    assert batcher.failed_batches >= 1
+
+
+def test_short_result_list_fails_the_batch():
+    async def run():
+        batcher = MicroBatcher(lambda texts: texts[:1], max_batch_size=8, max_wait_ms=20)
+        batcher.start()
+        try:
+            with pytest.raises(RuntimeError, match="1 results for 2 texts"):
+                await asyncio.wait_for(batcher.classify(["a", "b"]), timeout=5)
+        finally:
+            await batcher.stop()
+
+    asyncio.run(run())
@@ -0,0 +1,105 @@
+"""
+test_stage_metrics.py — Stage Timing Histograms and Sinks
+Percentiles report the upper bound of their bucket (never above the largest
+sample), lap() records the time since its start and chains, snapshot() sums
+items and sizes per stage, and a failing sink is counted instead of raised.
+"""
+import pytest
+
+import stage_metrics
+from stage_metrics import BUCKET_BOUNDS, LatencyHistogram, StageMetrics
+
+MS_1, MS_10, MS_100 = BUCKET_BOUNDS[30], BUCKET_BOUNDS[40], BUCKET_BOUNDS[50]
+
+
+def test_percentiles_on_known_samples():
+    hist = LatencyHistogram()
+    for seconds in [MS_1] * 90 + [MS_10] * 9 + [MS_100]:
+        hist.record(seconds)
+    assert hist.percentile(50) == pytest.approx(0.001)
+    assert hist.percentile(90) == pytest.approx(0.001)
+    assert hist.percentile(95) == pytest.approx(0.01)
+    assert hist.percentile(99) == pytest.approx(0.01)
+    assert hist.percentile(100) == pytest.approx(0.1)
+    assert (hist.count, hist.min, hist.max) == (100, MS_1, MS_100)
+
+
+def test_percentile_is_capped_by_the_largest_sample():
+    hist = LatencyHistogram()
+    hist.record(0.0015)  # bucket bound is ~1.58 ms
+    assert hist.percentile(50) == 0.0015
+
+    hist.record(60.0)  # past the last bound: overflow bucket
+    assert hist.percentile(99) == 60.0
+
+
+def test_empty_histogram():
+    assert LatencyHistogram().percentile(95) == 0.0
+    assert StageMetrics().snapshot() == {}
+
+
+def test_lap_records_elapsed_time_and_chains(monkeypatch):
+    metrics = StageMetrics()
+    clock = iter([10.25, 10.75])
+    monkeypatch.setattr(stage_metrics.time, "perf_counter", lambda: next(clock))
+
+    start = metrics.lap("clean", 10.0, items=3, size=120)
+    assert start == 10.25
+    metrics.lap("transform", start, items=3)
+
+    snapshot = metrics.snapshot()
+    assert snapshot["clean"]["total_ms"] == 250.0
+    assert snapshot["transform"]["total_ms"] == 500.0
+    assert (snapshot["clean"]["items"], snapshot["clean"]["size"]) == (3, 120)
+    assert snapshot["transform"]["size"] == 0
+
+
+def test_snapshot_contents():
+    metrics = StageMetrics()
+    metrics.record("clean", MS_1, items=2, size=50)
+    metrics.record("clean", MS_10, items=3, size=70)
+    metrics.record("urgency", MS_100)
+
+    snapshot = metrics.snapshot()
+    assert set(snapshot) == {"clean", "urgency"}
+    assert snapshot["clean"] == {
+        "calls": 2,
+        "items": 5,
+        "size": 120,
+        "total_ms": 11.0,
+        "mean_ms": 5.5,
+        "min_ms": 1.0,
+        "p50_ms": 1.0,
+        "p95_ms": 10.0,
+        "p99_ms": 10.0,
+        "max_ms": 10.0,
+    }
+    assert (snapshot["urgency"]["calls"], snapshot["urgency"]["items"]) == (1, 1)
+
+    metrics.reset()
+    assert metrics.snapshot() == {}
+
+
+def test_sinks_get_every_sample_and_errors_are_counted():
+    metrics = StageMetrics()
+    samples = []
+
+    def collect(*sample):
+        samples.append(sample)
+
+    def failing(*sample):
+        raise RuntimeError("statsd is down")
+
+    metrics.add_sink(collect)
+    metrics.add_sink(failing)
+    metrics.record("clean", 0.002, items=4, size=90)
+    metrics.record("category", 0.003)
+
+    assert samples == [("clean", 0.002, 4, 90), ("category", 0.003, 1, 0)]
+    assert metrics.sink_errors == 2
+    assert metrics.snapshot()["category"]["calls"] == 1
+
+    metrics.remove_sink(failing)
+    metrics.record("urgency", 0.001)
+    assert metrics.sink_errors == 2
+    assert len(samples) == 3
@@ -0,0 +1,49 @@
+"""
+test_text_processing.py — Train/Serve Text Parity
+Every clean_text backend must produce byte-identical output to the NLTK
+reference, and the vendored stopword list must match NLTK's wherever a
+word can survive cleaning (the same checks as `text_processing.py --parity`).
+"""
+import pytest
+
+import text_processing
+from text_processing import EDGE_CASES, build_corpus, check_parity, check_stopwords
+
+nltk = pytest.importorskip("nltk")
+pytestmark = pytest.mark.usefixtures("wordnet")
+
+
+@pytest.mark.parametrize("name", [name for name in text_processing.BACKENDS
+                                  if name != text_processing.REFERENCE_BACKEND])
+def test_backend_matches_reference_on_edge_cases(name):
+    assert check_parity(EDGE_CASES, [name]) == {name: []}
+
+
+def test_backends_match_reference_on_seeded_sample():
+    corpus = build_corpus(500, seed=7)
+    mismatches = check_parity(corpus)
+    assert mismatches and all(not found for found in mismatches.values()), {
+        name: found[:3] for name, found in mismatches.items()
+    }
+
+
+def test_parity_check_reports_differences(monkeypatch):
+    monkeypatch.setitem(text_processing.BACKENDS, "upper", lambda: lambda text: text.upper())
+    mismatches = check_parity(["running mice"], ["upper"])
+    assert mismatches == {"upper": [("running mice", "running mouse", "RUNNING MICE")]}
+
+
+def test_fast_backend_is_stable_across_cache_hits():
+    cleaner = text_processing.get_backend("fast")
+    corpus = build_corpus(50, seed=1)
+    first = [cleaner(text) for text in corpus]
+    assert [cleaner(text) for text in corpus] == first
+
+
+def test_vendored_stopwords_match_nltk():
+    diff = check_stopwords()
+    if diff is None:
+        pytest.skip("NLTK stopwords corpus is not installed")
+    only_nltk, only_vendored = diff
+    reachable = [w for w in only_nltk + only_vendored if text_processing._survives_cleaning(w)]
+    assert reachable == []
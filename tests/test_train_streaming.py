@@ -0,0 +1,63 @@
+"""
+test_train_streaming.py — Chunked idf vs. In-Memory TF-IDF
+The idf that train_streaming.fit_vectorizer accumulates chunk by chunk must
+equal what TfidfTransformer(smooth_idf=True) learns from the same training
+rows in one go, whatever the chunk size.
+"""
+import csv
+
+import numpy as np
+import pytest
+from sklearn.feature_extraction.text import TfidfTransformer
+
+from train_streaming import TEST_EVERY, fit_vectorizer, iter_chunks
+
+N_FEATURES = 2 ** 10
+ROWS = [
+    ("invoice charged twice this month", "Billing Issue", "High"),
+    ("cannot log in after password reset", "Account Access", "High"),
+    ("please add dark mode to the app", "Feature Request", "Low"),
+    ("the app crashes when I upload a file", "Technical Support", "Medium"),
+    ("refund for the duplicate invoice please", "Billing Issue", "Medium"),
+    ("great service, thank you team", "Feedback", "Low"),
+    ("locked out of my account again", "Account Access", "High"),
+    ("upload fails with error 500", "Technical Support", "High"),
+    ("export to csv would be useful", "Feature Request", "Low"),
+    ("charged twice, refund the invoice", "Billing Issue", "High"),
+    ("password reset link expired", "Account Access", "Medium"),
+    ("thank you for the quick fix", "Feedback", "Low"),
+]
+
+
+@pytest.fixture
+def small_csv(tmp_path):
+    path = tmp_path / "cleaned_emails.csv"
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["email_text", "category", "urgency"])
+        writer.writerows(ROWS)
+    return str(path)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 5, 100])
+def test_idf_matches_tfidf_transformer(small_csv, chunk_size):
+    vectorizer, cat_encoder, urg_encoder, n_rows, n_docs = fit_vectorizer(small_csv, chunk_size, N_FEATURES)
+
+    train = [text for i, (text, _, _) in enumerate(ROWS) if i % TEST_EVERY != TEST_EVERY - 1]
+    counts = vectorizer[0].transform(train)
+    expected = TfidfTransformer(smooth_idf=True, sublinear_tf=True).fit(counts)
+    np.testing.assert_allclose(vectorizer[-1].idf_, expected.idf_)
+
+    # The fitted pipeline then transforms like the in-memory one
+    np.testing.assert_allclose(vectorizer.transform(train).toarray(), expected.transform(counts).toarray())
+    assert (n_rows, n_docs) == (len(ROWS), len(train))
+    assert list(cat_encoder.classes_) == sorted({category for _, category, _ in ROWS})
+    assert list(urg_encoder.classes_) == ["High", "Low", "Medium"]
+
+
+def test_held_out_rows_do_not_depend_on_chunk_size(small_csv):
+    def held_out(chunk_size):
+        return [text for texts, _, _, is_test in iter_chunks(small_csv, chunk_size)
+                for text, test in zip(texts, is_test) if test]
+
+    assert held_out(1) == held_out(5) == held_out(100) == [ROWS[4][0], ROWS[9][0]]
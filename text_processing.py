@@ -0,0 +1,277 @@
+"""
+text_processing.py — Shared Text Processing for Training & Serving
+Single home of the NLTK setup and clean_text. Both preprocess.py (training)
+and classifier.py (serving) import from here, so the two can't drift.
+
+Importing this module never touches NLTK: the stopword list is vendored and
+the WordNet lemmatizer is loaded on the first clean_text call. Missing NLTK
+data is downloaded then, unless EMAIL_CLASSIFIER_OFFLINE=1 is set.
+
+Backends:
+    nltk — the reference regex chain + WordNet lemmatizer, step by step
+    fast — TextNormalizer (text_normalizer.py), byte-identical output
+
+Usage:
+    python text_processing.py --parity             # every backend vs. reference
+    python text_processing.py --bench              # throughput per backend
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from functools import lru_cache
+
+from text_normalizer import TextNormalizer, reference_normalize
+
+# Set EMAIL_CLASSIFIER_OFFLINE=1 to never reach out to the NLTK downloader
+OFFLINE = os.environ.get("EMAIL_CLASSIFIER_OFFLINE", "").lower() in ("1", "true", "yes")
+REFERENCE_BACKEND = "nltk"
+DEFAULT_BACKEND = os.environ.get("EMAIL_CLASSIFIER_TEXT_BACKEND", "fast")
+
+# Vendored copy of nltk.corpus.stopwords.words("english"), so cleaning needs
+# no corpus download. `--parity` checks it against the NLTK corpus if present.
+STOP_WORDS = frozenset("""
+a about above after again against ain all am an and any are aren aren't as at
+be because been before being below between both but by can couldn couldn't d
+did didn didn't do does doesn doesn't doing don don't down during each few for
+from further had hadn hadn't has hasn hasn't have haven haven't having he he'd
+he'll he's her here hers herself him himself his how i i'd i'll i'm i've if in
+into is isn isn't it it'd it'll it's its itself just ll m ma me mightn mightn't
+more most mustn mustn't my myself needn needn't no nor not now o of off on once
+only or other our ours ourselves out over own re s same shan shan't she she'd
+she'll she's should should've shouldn shouldn't so some such t than that
+that'll the their theirs them themselves then there these they they'd they'll
+they're they've this those through to too under until up ve very was wasn
+wasn't we we'd we'll we're we've were weren weren't what when where which while
+who whom why will with won won't wouldn wouldn't y you you'd you'll you're
+you've your yours yourself yourselves
+""".split())
+
+
+# ─── Lazy NLTK Resources ────────────────────────────────────────────────────
+def ensure_nltk_resource(name, path):
+    """Make sure an NLTK data package is installed, downloading it if allowed."""
+    import nltk
+
+    for candidate in (path, f"{path}.zip"):
+        try:
+            nltk.data.find(candidate)
+            return
+        except LookupError:
+            pass
+    if OFFLINE or not nltk.download(name, quiet=True):
+        raise LookupError(
+            f"NLTK resource '{name}' is not installed. Install it ahead of time with "
+            f"`python -m nltk.downloader {name}` (or point NLTK_DATA at a copy)."
+        )
+
+
+@lru_cache(maxsize=1)
+def get_lemmatizer():
+    """The WordNet lemmatizer, imported and loaded on first use."""
+    from nltk.stem import WordNetLemmatizer
+
+    ensure_nltk_resource("wordnet", "corpora/wordnet")
+    return WordNetLemmatizer()
+
+
+def lemmatize(word: str) -> str:
+    return get_lemmatizer().lemmatize(word)
+
+
+# ─── Backend Registry ───────────────────────────────────────────────────────
+def _nltk_backend():
+    return lambda text: reference_normalize(text, STOP_WORDS, lemmatize)
+
+
+def _fast_backend():
+    return TextNormalizer(STOP_WORDS, lemmatize)
+
+
+BACKENDS = {
+    "nltk": _nltk_backend,
+    "fast": _fast_backend,
+}
+
+
+def register_backend(name, factory):
+    """Register a factory returning a callable text -> cleaned text."""
+    BACKENDS[name] = factory
+
+
+def get_backend(name):
+    """Build a fresh cleaner for a registered backend."""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown text backend '{name}'. Available: {sorted(BACKENDS)}")
+    return BACKENDS[name]()
+
+
+_active = get_backend(DEFAULT_BACKEND)
+_active_name = DEFAULT_BACKEND
+
+
+def set_backend(name):
+    """Switch the backend used by clean_text for this process."""
+    global _active, _active_name
+    _active = get_backend(name)
+    _active_name = name
+
+
+def active_backend() -> str:
+    return _active_name
+
+
+def clean_text(text: str) -> str:
+    """Full cleaning pipeline for a single email text.
+
+    Removes HTML tags, URLs and email addresses, keeps letters only,
+    lowercases, drops stopwords and short tokens, then lemmatizes.
+    """
+    return _active(text)
+
+
+# ─── Parity & Benchmark ─────────────────────────────────────────────────────
+EDGE_CASES = [
+    "",
+    "   \t\n  ",
+    "<p>Hello <b>World</b></p>",
+    "Visit http://example.com/path?x=1 or www.example.org now",
+    "http://a.com<b>tail</b> and www.x.com<i>y</i>",
+    "mail me at john.doe@example.com<br>thanks",
+    "x@y.com<b>z</b> user@host",
+    "foo@http://bar.com/baz.html and <a href='mailto:a@b.co'>link</a>",
+    "Numbers 12345 and s3cr3t p4ssw0rd!!! don't won't can't",
+    "ÀÉÎÕÜ café naïve résumé straße İstanbul Kelvin K and  nbsp em",
+    "tabs\tand\x1cunit\x1fseparators line para",
+    "RUNNING Runners ran geese Geese mice CHILDREN analyses",
+    "<unclosed tag http://x.y > still here",
+    "www.",
+    "@@@ a@b.c a@@b..c",
+    "The The THE the a an and or but Is IS",
+]
+
+
+def build_corpus(samples, seed=42):
+    """Edge cases plus generated emails with extra markup, links and addresses."""
+    from generate_dataset import CATEGORIES, URGENCY_PREFIXES, generate_email
+
+    rng = random.Random(seed)
+    corpus = list(EDGE_CASES)
+    categories = list(CATEGORIES)
+    urgencies = list(URGENCY_PREFIXES)
+    for i in range(samples):
+        text = generate_email(categories[i % len(categories)], urgencies[i % len(urgencies)], rng)
+        if i % 5 == 0:
+            text = f"<div>{text}</div> <a href='https://x.io/{i}'>x.io</a>"
+        if i % 7 == 0:
+            text += f" contact: agent{i}@support.example.com<br/>www.help{i}.net"
+        corpus.append(text)
+    return corpus
+
+
+def check_parity(corpus, backends=None):
+    """Return {backend: [(text, expected, got), ...]} mismatches vs. the reference."""
+    reference = get_backend(REFERENCE_BACKEND)
+    expected = [reference(text) for text in corpus]
+    mismatches = {}
+    for name in backends or BACKENDS:
+        if name == REFERENCE_BACKEND:
+            continue
+        cleaner = get_backend(name)
+        mismatches[name] = [
+            (text, want, got)
+            for text, want in zip(corpus, expected)
+            if (got := cleaner(text)) != want
+        ]
+    return mismatches
+
+
+def check_stopwords():
+    """Compare STOP_WORDS with the NLTK corpus: (only_in_nltk, only_vendored).
+
+    Returns None when the corpus is not installed.
+    """
+    from nltk.corpus import stopwords
+
+    try:
+        words = set(stopwords.words("english"))
+    except LookupError:
+        return None
+    return sorted(words - STOP_WORDS), sorted(STOP_WORDS - words)
+
+
+def _survives_cleaning(word):
+    # Only all-letter words longer than two characters ever reach the filter
+    return len(word) > 2 and word.isascii() and word.isalpha()
+
+
+def benchmark(corpus, backends=None, repeat=3):
+    """Return {backend: (emails_per_sec, mb_per_sec)}, best of `repeat` runs."""
+    size_mb = sum(len(text.encode("utf-8")) for text in corpus) / 1e6
+    results = {}
+    for name in backends or BACKENDS:
+        best = float("inf")
+        for _ in range(repeat):
+            cleaner = get_backend(name)  # cold cache every run
+            start = time.perf_counter()
+            for text in corpus:
+                cleaner(text)
+            best = min(best, time.perf_counter() - start)
+        results[name] = (len(corpus) / best, size_mb / best)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared text processing utilities")
+    parser.add_argument("--parity", action="store_true", help="Check every backend against the reference")
+    parser.add_argument("--bench", action="store_true", help="Measure throughput of every backend")
+    parser.add_argument("--backend", action="append", choices=sorted(BACKENDS),
+                        help="Limit to these backends (repeatable)")
+    parser.add_argument("--samples", type=int, default=5000, help="Generated emails (default: 5000)")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for the corpus (default: 42)")
+    args = parser.parse_args()
+
+    if not (args.parity or args.bench):
+        parser.print_help()
+        return
+
+    corpus = build_corpus(args.samples, args.seed)
+    failed = False
+
+    if args.parity:
+        print(f"🔍 Parity check over {len(corpus)} texts (reference: {REFERENCE_BACKEND})")
+        for name, mismatches in check_parity(corpus, args.backend).items():
+            if mismatches:
+                failed = True
+                print(f"   ❌ {name}: {len(mismatches)} texts differ")
+                for text, want, got in mismatches[:3]:
+                    print(f"      input:    {text[:80]!r}")
+                    print(f"      expected: {want[:80]!r}")
+                    print(f"      got:      {got[:80]!r}")
+            else:
+                print(f"   ✅ {name}: byte-identical")
+
+        diff = check_stopwords()
+        if diff is None:
+            print("   ⚠ NLTK stopwords corpus not installed; vendored list not compared")
+        else:
+            differing = [w for w in diff[0] + diff[1] if _survives_cleaning(w)]
+            if differing:
+                failed = True
+                print(f"   ❌ vendored stopwords differ from NLTK: {differing}")
+            else:
+                print(f"   ✅ vendored stopwords match NLTK "
+                      f"({len(diff[0]) + len(diff[1])} unreachable entries differ)")
+
+    if args.bench:
+        print(f"\n⏱ Throughput over {len(corpus)} texts")
+        for name, (eps, mbps) in benchmark(corpus, args.backend).items():
+            print(f"   {name:<8} {eps:>12,.0f} emails/s  {mbps:>8.2f} MB/s")
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
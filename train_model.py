@@ -2,11 +2,17 @@
 train_model.py — Model Training & Evaluation
 TF-IDF + XGBoost (category) + Logistic Regression (urgency)
 """
+import argparse
+import json
 import os
+import sys
+import time
+from contextlib import contextmanager
 import numpy as np
 import joblib
 
-from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer, TfidfVectorizer
+from sklearn.pipeline import make_pipeline
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import LabelEncoder
 from sklearn.linear_model import LogisticRegression
@@ -15,6 +21,10 @@ from sklearn.metrics import (
     f1_score, classification_report, confusion_matrix
 )
 
+from compiled_scorer import SCORER_NAME, compile_scorer
+from feature_cache import FEATURE_CACHE_DIR, fingerprint, load_features, save_features
+from model_bundle import BUNDLE_NAME, export_bundle
+
 try:
     from xgboost import XGBClassifier
     HAS_XGBOOST = True
@@ -22,6 +32,49 @@ except ImportError:
     HAS_XGBOOST = False
     print("⚠ XGBoost not installed, falling back to Logistic Regression for category model.")
 
+# XGBoost "hist" builds a histogram per column per tree node, so its fit
+# time grows with the hash space even though the matrix stays just as sparse
+HASHING_FEATURES = 2 ** 16
+XGB_MAX_FEATURES = 2 ** 16
+SPLIT = {"test_size": 0.2, "random_state": 42}
+VALIDATION_SIZE = 0.1  # share of the training rows used for early stopping + cascade calibration
+CASCADE_THRESHOLDS = np.round(np.arange(0.50, 1.00, 0.01), 2)
+REPORT_THRESHOLDS = [0.5, 0.6, 0.7, 0.8, 0.9, 0.95, 0.99]
+
+
+class PhaseTimer:
+    """Wall time and peak RSS per training phase."""
+
+    def __init__(self):
+        self.phases = []
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - start, peak_rss_mb()))
+
+    def report(self):
+        print(f"\n⏱ Training phases")
+        print(f"   {'phase':<14}{'seconds':>10}{'peak RSS MB':>14}")
+        for name, seconds, peak in self.phases:
+            peak = f"{peak:>14.1f}" if peak is not None else f"{'n/a':>14}"
+            print(f"   {name:<14}{seconds:>10.2f}{peak}")
+        print(f"   {'total':<14}{sum(p[1] for p in self.phases):>10.2f}")
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far (None where unsupported)."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / 1e6 if sys.platform == "darwin" else peak / 1024
+
 
 def load_data(path):
     """Load cleaned CSV without pandas dependency."""
@@ -36,6 +89,138 @@ def load_data(path):
     return texts, categories, urgencies
 
 
+def build_vectorizer(features="tfidf", n_features=HASHING_FEATURES, max_features=5000, ngram_range=(1, 2)):
+    """TF-IDF over a learned vocabulary, or over hashed features.
+
+    The hashing mode never builds a vocabulary: n-grams are hashed straight
+    into n_features columns and only an idf vector is learned, so neither
+    training nor serving holds a term dictionary.
+    """
+    ngram_range = tuple(ngram_range)
+    if features == "hashing":
+        return make_pipeline(
+            HashingVectorizer(
+                n_features=n_features, ngram_range=ngram_range,
+                alternate_sign=False, norm=None,
+            ),
+            TfidfTransformer(sublinear_tf=True),
+        )
+    return TfidfVectorizer(max_features=max_features, ngram_range=ngram_range, sublinear_tf=True)
+
+
+def warn_wide_features(n_columns):
+    """Warn when XGBoost would train on more columns than it handles well."""
+    if HAS_XGBOOST and n_columns > XGB_MAX_FEATURES:
+        print(f"⚠ {n_columns:,} feature columns: XGBoost hist fit time grows with the column count "
+              f"and is far slower than with {XGB_MAX_FEATURES:,} or fewer. Lower --n-features "
+              f"(see feature_benchmark.py for the trade-off).")
+
+
+def vectorize(input_path, tfidf, cache_dir=None):
+    """Fit the (unfitted) vectorizer and split the data, or reuse a cached result.
+
+    Returns a dict with tfidf, cat_encoder, urg_encoder, X_train, X_test,
+    yc_train, yc_test, yu_train and yu_test. Pass cache_dir=None to skip
+    the feature cache.
+    """
+    key = None
+    if cache_dir:
+        key = fingerprint(input_path, tfidf, SPLIT)
+        cached = load_features(cache_dir, key)
+        if cached is not None:
+            print(f"\n♻ Reusing cached features {key} (from {cache_dir})")
+            rows = cached["X_train"].shape[0] + cached["X_test"].shape[0]
+            print(f"   Feature matrix shape: ({rows}, {cached['X_train'].shape[1]})")
+            return cached
+
+    # Load data
+    texts, categories, urgencies = load_data(input_path)
+    print(f"📂 Loaded {len(texts)} samples")
+
+    # ─── TF-IDF Vectorization ───────────────────────────────────────────
+    if isinstance(tfidf, TfidfVectorizer):
+        print(f"\n🔧 Fitting TF-IDF vectorizer (max_features={tfidf.max_features})...")
+    else:
+        print(f"\n🔧 Fitting hashed TF-IDF (n_features={tfidf[0].n_features})...")
+    X = tfidf.fit_transform(texts)
+    print(f"   Feature matrix shape: {X.shape}")
+
+    # ─── Encode Labels ──────────────────────────────────────────────────
+    cat_encoder = LabelEncoder()
+    urg_encoder = LabelEncoder()
+    y_cat = cat_encoder.fit_transform(categories)
+    y_urg = urg_encoder.fit_transform(urgencies)
+
+    # ─── Split Data ─────────────────────────────────────────────────────
+    X_train, X_test, yc_train, yc_test, yu_train, yu_test = train_test_split(
+        X, y_cat, y_urg, stratify=y_cat, **SPLIT
+    )
+
+    features = {
+        "tfidf": tfidf, "cat_encoder": cat_encoder, "urg_encoder": urg_encoder,
+        "yc_train": yc_train, "yc_test": yc_test, "yu_train": yu_train, "yu_test": yu_test,
+    }
+    if key is not None:
+        save_features(cache_dir, key, X_train, X_test, **features)
+        print(f"   💾 Cached features as {key}")
+    features.update(X_train=X_train, X_test=X_test)
+    return features
+
+
+def build_category_xgb(args, n_estimators, early_stopping_rounds=None):
+    """XGBoost category model: histogram trees, explicit thread count."""
+    return XGBClassifier(
+        n_estimators=n_estimators,
+        max_depth=6,
+        learning_rate=0.1,
+        tree_method="hist",
+        n_jobs=args.n_jobs,
+        early_stopping_rounds=early_stopping_rounds,
+        eval_metric="mlogloss",
+        random_state=42,
+        verbosity=0,
+    )
+
+
+def calibrate_threshold(model, X_val, y_val, precision):
+    """Lowest confidence threshold whose accepted predictions reach `precision`.
+
+    Emails the linear model is at least this confident about are answered
+    by it; the rest go to XGBoost. Returns 1.0 (escalate nearly all) when no
+    candidate threshold is precise enough.
+    """
+    proba = model.predict_proba(X_val)
+    confidence = proba.max(axis=1)
+    correct = model.classes_[proba.argmax(axis=1)] == y_val
+    for threshold in CASCADE_THRESHOLDS:
+        accepted = confidence >= threshold
+        if not accepted.any() or correct[accepted].mean() >= precision:
+            return float(threshold)
+    return 1.0
+
+
+def print_cascade_report(fast_model, X_test, xgb_pred, y_test, chosen):
+    """Escalation rate and accuracy of the cascade for a range of thresholds."""
+    proba = fast_model.predict_proba(X_test)
+    confidence = proba.max(axis=1)
+    fast_pred = fast_model.classes_[proba.argmax(axis=1)]
+
+    print(f"\n{'='*60}")
+    print(f"📊 Category Cascade — Linear first, XGBoost when unsure")
+    print(f"{'='*60}")
+    print(f"  Linear only:  {accuracy_score(y_test, fast_pred):.4f}")
+    print(f"  XGBoost only: {accuracy_score(y_test, xgb_pred):.4f}\n")
+    print(f"    {'threshold':>9}  {'escalated':>9}  {'accuracy':>8}  {'linear-answered acc':>19}")
+    for threshold in sorted(set(REPORT_THRESHOLDS) | {chosen}):
+        escalate = confidence < threshold
+        pred = np.where(escalate, xgb_pred, fast_pred)
+        accepted = ~escalate
+        accepted_acc = f"{(fast_pred[accepted] == y_test[accepted]).mean():.4f}" if accepted.any() else "-"
+        marker = "→" if threshold == chosen else " "
+        print(f"  {marker} {threshold:>9.2f}  {escalate.mean():>9.1%}  "
+              f"{accuracy_score(y_test, pred):>8.4f}  {accepted_acc:>19}")
+
+
 def print_metrics(name, y_true, y_pred, labels):
     """Print evaluation metrics."""
     print(f"\n{'='*60}")
@@ -67,78 +252,76 @@ def print_metrics(name, y_true, y_pred, labels):
     return acc
 
 
-def main():
-    input_path = os.path.join("data", "cleaned_emails.csv")
-    model_dir = "models"
-    os.makedirs(model_dir, exist_ok=True)
-
-    if not os.path.exists(input_path):
-        print(f"❌ {input_path} not found. Run preprocess.py first.")
-        return
+def print_confusion_metrics(name, cm, labels):
+    """Print the same report as print_metrics from a confusion matrix.
 
-    # Load data
-    texts, categories, urgencies = load_data(input_path)
-    print(f"📂 Loaded {len(texts)} samples")
+    Used by streaming evaluation, which accumulates the matrix chunk by
+    chunk instead of keeping every prediction.
+    """
+    cm = np.asarray(cm, dtype=np.int64)
+    support = cm.sum(axis=1)
+    predicted = cm.sum(axis=0)
+    tp = np.diag(cm)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        precision = np.where(predicted > 0, tp / predicted, 0.0)
+        recall = np.where(support > 0, tp / support, 0.0)
+        f1 = np.where(precision + recall > 0, 2 * precision * recall / (precision + recall), 0.0)
+    total = support.sum()
+    weights = support / total if total else support
 
-    # ─── TF-IDF Vectorization ───────────────────────────────────────────
-    print("\n🔧 Fitting TF-IDF vectorizer (max_features=5000)...")
-    tfidf = TfidfVectorizer(max_features=5000, ngram_range=(1, 2), sublinear_tf=True)
-    X = tfidf.fit_transform(texts)
-    print(f"   Feature matrix shape: {X.shape}")
+    print(f"\n{'='*60}")
+    print(f"📊 {name} — Evaluation Results")
+    print(f"{'='*60}")
+    acc = tp.sum() / total if total else 0.0
+    print(f"  Accuracy:  {acc:.4f}  {'✅' if acc > 0.85 else '⚠'}")
+    print(f"  Precision: {(precision * weights).sum():.4f}")
+    print(f"  Recall:    {(recall * weights).sum():.4f}")
+    print(f"  F1 Score:  {(f1 * weights).sum():.4f}")
 
-    # ─── Encode Labels ──────────────────────────────────────────────────
-    cat_encoder = LabelEncoder()
-    urg_encoder = LabelEncoder()
-    y_cat = cat_encoder.fit_transform(categories)
-    y_urg = urg_encoder.fit_transform(urgencies)
+    print(f"\n📋 Classification Report:")
+    width = max(len(l) for l in labels)
+    print(f"{'':>{width}}  precision    recall  f1-score   support")
+    for i, label in enumerate(labels):
+        print(f"{label:>{width}}  {precision[i]:>9.2f} {recall[i]:>9.2f} {f1[i]:>9.2f} {support[i]:>9}")
 
-    # ─── Split Data ─────────────────────────────────────────────────────
-    X_train, X_test, yc_train, yc_test, yu_train, yu_test = train_test_split(
-        X, y_cat, y_urg, test_size=0.2, random_state=42, stratify=y_cat
-    )
-    print(f"   Train: {X_train.shape[0]} | Test: {X_test.shape[0]}")
+    print(f"\n🔢 Confusion Matrix:")
+    max_label_len = max(len(l) for l in labels)
+    header = " " * (max_label_len + 2) + "  ".join(f"{l[:6]:>6}" for l in labels)
+    print(header)
+    for i, row in enumerate(cm):
+        row_str = "  ".join(f"{v:>6}" for v in row)
+        print(f"  {labels[i]:<{max_label_len}} {row_str}")
 
-    # ─── Train Category Model ───────────────────────────────────────────
-    print("\n🚀 Training Category Classifier...")
-    if HAS_XGBOOST:
-        cat_model = XGBClassifier(
-            n_estimators=200,
-            max_depth=6,
-            learning_rate=0.1,
-            use_label_encoder=False,
-            eval_metric="mlogloss",
-            random_state=42,
-            verbosity=0,
-        )
-    else:
-        cat_model = LogisticRegression(max_iter=1000, random_state=42, C=10)
-
-    cat_model.fit(X_train, yc_train)
-    yc_pred = cat_model.predict(X_test)
-    cat_acc = print_metrics(
-        "Category Classifier",
-        yc_test, yc_pred,
-        cat_encoder.classes_.tolist()
-    )
+    return acc
 
-    # ─── Train Urgency Model ────────────────────────────────────────────
-    print("\n🚀 Training Urgency Classifier...")
-    urg_model = LogisticRegression(max_iter=1000, random_state=42, C=10)
-    urg_model.fit(X_train, yu_train)
-    yu_pred = urg_model.predict(X_test)
-    urg_acc = print_metrics(
-        "Urgency Classifier",
-        yu_test, yu_pred,
-        urg_encoder.classes_.tolist()
-    )
 
-    # ─── Save Models ────────────────────────────────────────────────────
+def save_models(model_dir, tfidf, cat_model, urg_model, cat_encoder, urg_encoder, cat_acc, urg_acc,
+                cat_fast_model=None, cascade=None):
+    """Save all artifacts (pickles + bundle) and print the summary."""
     joblib.dump(tfidf, os.path.join(model_dir, "tfidf_vectorizer.pkl"))
     joblib.dump(cat_model, os.path.join(model_dir, "category_model.pkl"))
     joblib.dump(urg_model, os.path.join(model_dir, "urgency_model.pkl"))
     joblib.dump(cat_encoder, os.path.join(model_dir, "category_encoder.pkl"))
     joblib.dump(urg_encoder, os.path.join(model_dir, "urgency_encoder.pkl"))
 
+    fast_path = os.path.join(model_dir, "category_fast_model.pkl")
+    cascade_path = os.path.join(model_dir, "cascade.json")
+    if cat_fast_model is not None:
+        joblib.dump(cat_fast_model, fast_path)
+        with open(cascade_path, "w", encoding="utf-8") as f:
+            json.dump(cascade, f, indent=2)
+    else:
+        # Don't leave a first stage that belongs to older models behind
+        for path in (fast_path, cascade_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    export_bundle(
+        tfidf, cat_model, urg_model, cat_encoder, urg_encoder,
+        os.path.join(model_dir, BUNDLE_NAME), cat_fast_model, cascade,
+    )
+    compile_scorer(tfidf, urg_model).save(os.path.join(model_dir, SCORER_NAME))
+
     print(f"\n{'='*60}")
     print(f"✅ All models saved to '{model_dir}/'")
     print(f"   - tfidf_vectorizer.pkl")
@@ -146,6 +329,10 @@ def main():
     print(f"   - urgency_model.pkl   (accuracy: {urg_acc:.2%})")
     print(f"   - category_encoder.pkl")
     print(f"   - urgency_encoder.pkl")
+    if cat_fast_model is not None:
+        print(f"   - category_fast_model.pkl + cascade.json  (threshold: {cascade['threshold']:.2f})")
+    print(f"   - {BUNDLE_NAME}  (all of the above, memory-mappable)")
+    print(f"   - {SCORER_NAME}  (compiled urgency scorer)")
     print(f"{'='*60}")
 
     overall = (cat_acc + urg_acc) / 2
@@ -155,5 +342,145 @@ def main():
         print(f"\n⚠ Overall accuracy: {overall:.2%} — below 85% target")
 
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Train the category and urgency models")
+    parser.add_argument("--features", choices=["tfidf", "hashing"], default="tfidf",
+                        help="tfidf: learned 5,000-term vocabulary (default); "
+                             "hashing: feature hashing + idf, no vocabulary")
+    parser.add_argument("--n-features", type=int, default=HASHING_FEATURES,
+                        help=f"Hash space size for --features hashing (default: {HASHING_FEATURES})")
+    parser.add_argument("--streaming", action="store_true",
+                        help="Out-of-core training: read the CSV in chunks, train incrementally "
+                             "(implies --features hashing)")
+    parser.add_argument("--chunk-size", type=int, default=20000,
+                        help="Rows per chunk for --streaming (default: 20000)")
+    parser.add_argument("--epochs", type=int, default=3,
+                        help="Passes over the data for the incremental linear models (default: 3)")
+    parser.add_argument("--n-jobs", type=int, default=os.cpu_count() or 1,
+                        help="XGBoost threads (default: all cores)")
+    parser.add_argument("--max-rounds", type=int, default=200,
+                        help="Maximum XGBoost boosting rounds (default: 200)")
+    parser.add_argument("--early-stopping-rounds", type=int, default=20,
+                        help="Stop XGBoost after this many rounds without validation improvement "
+                             "(default: 20, 0 disables early stopping)")
+    parser.add_argument("--refit", action="store_true",
+                        help="After early stopping, refit XGBoost on the whole training split with the "
+                             "best round count (a second fit; the default ships the early-stopped model). "
+                             "The cascade's linear stage is never refit: its threshold is calibrated for it")
+    parser.add_argument("--no-cascade", dest="cascade", action="store_false",
+                        help="Don't train the linear first stage for EmailClassifier(cascade=True)")
+    parser.add_argument("--cascade-precision", type=float, default=0.995,
+                        help="Accuracy the linear stage must reach on the emails it answers, "
+                             "used to calibrate the cascade threshold (default: 0.995)")
+    parser.add_argument("--feature-cache-dir", default=FEATURE_CACHE_DIR,
+                        help=f"Where fitted vectorizers + feature matrices are cached (default: {FEATURE_CACHE_DIR})")
+    parser.add_argument("--no-feature-cache", dest="feature_cache", action="store_false",
+                        help="Always refit the vectorizer and don't write the cache")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    input_path = os.path.join("data", "cleaned_emails.csv")
+    model_dir = "models"
+    os.makedirs(model_dir, exist_ok=True)
+
+    if not os.path.exists(input_path):
+        print(f"❌ {input_path} not found. Run preprocess.py first.")
+        return
+
+    if args.streaming:
+        from train_streaming import train_streaming
+        train_streaming(input_path, model_dir, args)
+        return
+
+    timer = PhaseTimer()
+    with timer.phase("vectorize"):
+        features = vectorize(
+            input_path,
+            build_vectorizer(args.features, args.n_features),
+            args.feature_cache_dir if args.feature_cache else None,
+        )
+    tfidf = features["tfidf"]
+    cat_encoder, urg_encoder = features["cat_encoder"], features["urg_encoder"]
+    X_train, X_test = features["X_train"], features["X_test"]
+    yc_train, yc_test = features["yc_train"], features["yc_test"]
+    yu_train, yu_test = features["yu_train"], features["yu_test"]
+    print(f"   Train: {X_train.shape[0]} | Test: {X_test.shape[0]}")
+    warn_wide_features(X_train.shape[1])
+
+    # Validation split carved out of the training rows, for early stopping
+    # and cascade calibration; the test split stays untouched for evaluation
+    use_cascade = HAS_XGBOOST and args.cascade
+    if HAS_XGBOOST and (args.early_stopping_rounds or use_cascade):
+        X_fit, X_val, yc_fit, yc_val = train_test_split(
+            X_train, yc_train, test_size=VALIDATION_SIZE, random_state=42, stratify=yc_train
+        )
+
+    # ─── Train Category Model ───────────────────────────────────────────
+    print("\n🚀 Training Category Classifier...")
+    with timer.phase("category fit"):
+        if HAS_XGBOOST and args.early_stopping_rounds:
+            # One fit: the early-stopped model is shipped as is and predicts
+            # with its best round (the validation rows are left out of it)
+            cat_model = build_category_xgb(args, args.max_rounds, args.early_stopping_rounds)
+            cat_model.fit(X_fit, yc_fit, eval_set=[(X_val, yc_val)], verbose=False)
+            n_rounds = cat_model.best_iteration + 1
+            print(f"   Early stopping: best round {n_rounds} of {args.max_rounds}")
+        elif HAS_XGBOOST:
+            cat_model = build_category_xgb(args, args.max_rounds)
+            cat_model.fit(X_train, yc_train)
+        else:
+            cat_model = LogisticRegression(max_iter=1000, random_state=42, C=10)
+            cat_model.fit(X_train, yc_train)
+
+    if HAS_XGBOOST and args.early_stopping_rounds and args.refit:
+        # Optional second fit on every training row, with the chosen rounds
+        print(f"\n🚀 Refitting Category Classifier on the full training split ({n_rounds} rounds)...")
+        with timer.phase("category refit"):
+            cat_model = build_category_xgb(args, n_rounds)
+            cat_model.fit(X_train, yc_train)
+
+    # ─── Train Cascade First Stage ──────────────────────────────────────
+    cat_fast_model = cascade = None
+    if use_cascade:
+        print("\n🚀 Training Cascade First Stage (Logistic Regression)...")
+        with timer.phase("cascade fit"):
+            # The threshold only holds for the model it was calibrated on, so
+            # ship that model: fit without the validation rows, calibrate on them
+            cat_fast_model = LogisticRegression(max_iter=1000, random_state=42, C=10).fit(X_fit, yc_fit)
+            threshold = calibrate_threshold(cat_fast_model, X_val, yc_val, args.cascade_precision)
+            cascade = {"threshold": threshold, "target_precision": args.cascade_precision}
+        print(f"   Threshold {threshold:.2f}: lowest confidence whose accepted emails are "
+              f"≥ {args.cascade_precision:.1%} correct on validation")
+
+    # ─── Train Urgency Model ────────────────────────────────────────────
+    print("\n🚀 Training Urgency Classifier...")
+    with timer.phase("urgency fit"):
+        urg_model = LogisticRegression(max_iter=1000, random_state=42, C=10)
+        urg_model.fit(X_train, yu_train)
+
+    # ─── Evaluate ───────────────────────────────────────────────────────
+    with timer.phase("evaluation"):
+        yc_pred = cat_model.predict(X_test)
+        cat_acc = print_metrics(
+            "Category Classifier",
+            yc_test, yc_pred,
+            cat_encoder.classes_.tolist()
+        )
+        urg_acc = print_metrics(
+            "Urgency Classifier",
+            yu_test, urg_model.predict(X_test),
+            urg_encoder.classes_.tolist()
+        )
+        if use_cascade:
+            print_cascade_report(cat_fast_model, X_test, yc_pred, yc_test, cascade["threshold"])
+
+    # ─── Save Models ────────────────────────────────────────────────────
+    save_models(model_dir, tfidf, cat_model, urg_model, cat_encoder, urg_encoder, cat_acc, urg_acc,
+                cat_fast_model, cascade)
+    timer.report()
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,194 @@
+"""
+train_streaming.py — Out-of-Core Incremental Training
+Backs `python train_model.py --streaming`. Reads data/cleaned_emails.csv in
+chunks so peak memory depends on the chunk size, not on the dataset size.
+
+    pass 1 — label sets + document frequencies → idf of the hashed features
+    pass 2 — SGD logistic regression trained with partial_fit (urgency, and
+             category when XGBoost is missing), one pass per epoch
+    pass 3 — XGBoost category model over an external-memory DMatrix fed
+             by the same chunk iterator (pages are cached on disk)
+    eval   — held-out rows scored chunk by chunk into confusion matrices
+
+Every TEST_EVERY-th row is held out, so the split is deterministic and
+needs no shuffled copy of the data.
+"""
+import csv
+import os
+import tempfile
+import time
+
+import numpy as np
+from sklearn.linear_model import SGDClassifier
+from sklearn.preprocessing import LabelEncoder
+
+from train_model import HAS_XGBOOST, build_vectorizer, print_confusion_metrics, save_models, warn_wide_features
+
+if HAS_XGBOOST:
+    import xgboost as xgb
+    from xgboost import XGBClassifier
+
+TEST_EVERY = 5  # 20% held out
+
+
+def iter_chunks(path, chunk_size):
+    """Yield (texts, categories, urgencies, is_test) for each chunk of the CSV."""
+    with open(path, "r", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        texts, categories, urgencies, is_test = [], [], [], []
+        for i, row in enumerate(reader):
+            texts.append(row["email_text"])
+            categories.append(row["category"])
+            urgencies.append(row["urgency"])
+            is_test.append(i % TEST_EVERY == TEST_EVERY - 1)
+            if len(texts) >= chunk_size:
+                yield texts, categories, urgencies, np.array(is_test)
+                texts, categories, urgencies, is_test = [], [], [], []
+        if texts:
+            yield texts, categories, urgencies, np.array(is_test)
+
+
+def _select(items, mask):
+    return [item for item, keep in zip(items, mask) if keep]
+
+
+def fit_vectorizer(path, chunk_size, n_features):
+    """Pass 1: fit the hashed TF-IDF idf and collect the label sets."""
+    vectorizer = build_vectorizer("hashing", n_features)
+    hasher, transformer = vectorizer[0], vectorizer[-1]
+
+    df = np.zeros(n_features, dtype=np.int64)
+    n_docs = 0
+    n_rows = 0
+    categories, urgencies = set(), set()
+    for texts, cats, urgs, is_test in iter_chunks(path, chunk_size):
+        categories.update(cats)
+        urgencies.update(urgs)
+        n_rows += len(texts)
+        if is_test.all():
+            continue
+        X = hasher.transform(_select(texts, ~is_test))
+        # HashingVectorizer sums duplicates, so each row lists a column once
+        df += np.bincount(X.indices, minlength=n_features)
+        n_docs += X.shape[0]
+
+    # Same smoothed idf as TfidfTransformer(smooth_idf=True)
+    transformer.idf_ = np.log((1 + n_docs) / (1 + df)) + 1
+    cat_encoder = LabelEncoder().fit(sorted(categories))
+    urg_encoder = LabelEncoder().fit(sorted(urgencies))
+    return vectorizer, cat_encoder, urg_encoder, n_rows, n_docs
+
+
+def iter_features(path, chunk_size, vectorizer, cat_encoder, urg_encoder, test, seed=None):
+    """Yield (X, y_cat, y_urg) for the train (or test) rows of each chunk."""
+    rng = np.random.default_rng(seed) if seed is not None else None
+    for texts, cats, urgs, is_test in iter_chunks(path, chunk_size):
+        mask = is_test if test else ~is_test
+        if not mask.any():
+            continue
+        texts, cats, urgs = _select(texts, mask), _select(cats, mask), _select(urgs, mask)
+        X = vectorizer.transform(texts)
+        y_cat = cat_encoder.transform(cats)
+        y_urg = urg_encoder.transform(urgs)
+        if rng is not None:
+            order = rng.permutation(X.shape[0])
+            X, y_cat, y_urg = X[order], y_cat[order], y_urg[order]
+        yield X, y_cat, y_urg
+
+
+if HAS_XGBOOST:
+    class _ChunkIter(xgb.DataIter):
+        """Feeds training chunks to XGBoost's external-memory DMatrix."""
+
+        def __init__(self, make_batches, cache_dir):
+            self._make_batches = make_batches
+            self._batches = None
+            super().__init__(cache_prefix=os.path.join(cache_dir, "xgb"))
+
+        def next(self, input_data):
+            if self._batches is None:
+                self._batches = self._make_batches()
+            batch = next(self._batches, None)
+            if batch is None:
+                return False
+            X, y_cat, _ = batch
+            input_data(data=X, label=y_cat)
+            return True
+
+        def reset(self):
+            self._batches = None
+
+
+def _train_xgboost(make_batches, n_classes, n_jobs):
+    params = {
+        "tree_method": "hist",
+        "nthread": n_jobs,
+        "max_depth": 6,
+        "eta": 0.1,
+        "eval_metric": "mlogloss" if n_classes > 2 else "logloss",
+        "seed": 42,
+        "verbosity": 0,
+    }
+    if n_classes > 2:
+        params.update(objective="multi:softprob", num_class=n_classes)
+    else:
+        params["objective"] = "binary:logistic"
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        dtrain = xgb.ExtMemQuantileDMatrix(_ChunkIter(make_batches, cache_dir), max_bin=256)
+        booster = xgb.train(params, dtrain, num_boost_round=200)
+        del dtrain  # release the on-disk cache before the directory goes away
+
+    cat_model = XGBClassifier()
+    cat_model.load_model(bytearray(booster.save_raw("ubj")))
+    return cat_model
+
+
+def train_streaming(input_path, model_dir, args):
+    """Train both models out of core and save them like train_model.main()."""
+    start = time.perf_counter()
+    if args.features != "hashing":
+        print("ℹ Streaming mode uses hashed features (a vocabulary needs the full corpus)")
+
+    # ─── Pass 1: idf + labels ───────────────────────────────────────────
+    print(f"\n🔧 Pass 1: fitting hashed TF-IDF (n_features={args.n_features}, chunk size {args.chunk_size})...")
+    vectorizer, cat_encoder, urg_encoder, n_rows, n_train = fit_vectorizer(
+        input_path, args.chunk_size, args.n_features
+    )
+    print(f"   Rows: {n_rows} | Train: {n_train} | Test: {n_rows - n_train}")
+    warn_wide_features(args.n_features)
+
+    def batches(test=False, seed=None):
+        return iter_features(input_path, args.chunk_size, vectorizer, cat_encoder, urg_encoder, test, seed)
+
+    # ─── Pass 2: incremental linear models ──────────────────────────────
+    urg_classes = np.arange(len(urg_encoder.classes_))
+    cat_classes = np.arange(len(cat_encoder.classes_))
+    urg_model = SGDClassifier(loss="log_loss", alpha=1e-6, random_state=42)
+    cat_model = None if HAS_XGBOOST else SGDClassifier(loss="log_loss", alpha=1e-6, random_state=42)
+
+    print(f"\n🚀 Training linear model(s) incrementally ({args.epochs} epoch(s))...")
+    for epoch in range(args.epochs):
+        for X, y_cat, y_urg in batches(seed=epoch):
+            urg_model.partial_fit(X, y_urg, classes=urg_classes)
+            if cat_model is not None:
+                cat_model.partial_fit(X, y_cat, classes=cat_classes)
+        print(f"   Epoch {epoch + 1}/{args.epochs} done ({time.perf_counter() - start:.1f}s)")
+
+    # ─── Pass 3: XGBoost over external memory ───────────────────────────
+    if HAS_XGBOOST:
+        print("\n🚀 Training Category Classifier (XGBoost, external memory)...")
+        cat_model = _train_xgboost(batches, len(cat_classes), args.n_jobs)
+
+    # ─── Streaming evaluation ───────────────────────────────────────────
+    cat_cm = np.zeros((len(cat_classes), len(cat_classes)), dtype=np.int64)
+    urg_cm = np.zeros((len(urg_classes), len(urg_classes)), dtype=np.int64)
+    for X, y_cat, y_urg in batches(test=True):
+        np.add.at(cat_cm, (y_cat, np.asarray(cat_model.predict(X), dtype=np.int64)), 1)
+        np.add.at(urg_cm, (y_urg, np.asarray(urg_model.predict(X), dtype=np.int64)), 1)
+
+    cat_acc = print_confusion_metrics("Category Classifier", cat_cm, cat_encoder.classes_.tolist())
+    urg_acc = print_confusion_metrics("Urgency Classifier", urg_cm, urg_encoder.classes_.tolist())
+
+    save_models(model_dir, vectorizer, cat_model, urg_model, cat_encoder, urg_encoder, cat_acc, urg_acc)
+    print(f"\n⏱ Streaming training finished in {time.perf_counter() - start:.1f}s")